@@ -0,0 +1,40 @@
+"""populate default wikidata endpoint paths
+
+Revision ID: 02c59a07f58d
+Revises: 730f26572761
+Create Date: 2026-10-17 10:41:07.553190
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '02c59a07f58d'
+down_revision: str | Sequence[str] | None = '730f26572761'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+WIKIDATA_ENDPOINT_PATHS = {
+    "films": "?query={query}",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for capability, endpoint_path in WIKIDATA_ENDPOINT_PATHS.items():
+        op.execute(
+            f"UPDATE data_source_capabilities SET endpoint_path = '{endpoint_path}' "
+            f"WHERE capability = '{capability}' AND endpoint_path IS NULL "
+            "AND data_source_id = (SELECT id FROM data_sources WHERE name = 'wikidata')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for capability, endpoint_path in WIKIDATA_ENDPOINT_PATHS.items():
+        op.execute(
+            "UPDATE data_source_capabilities SET endpoint_path = NULL "
+            f"WHERE capability = '{capability}' AND endpoint_path = '{endpoint_path}' "
+            "AND data_source_id = (SELECT id FROM data_sources WHERE name = 'wikidata')"
+        )
@@ -0,0 +1,62 @@
+"""populate default films payload mappings
+
+Revision ID: 4c936a7aee7f
+Revises: b12fbf8d2c82
+Create Date: 2026-10-17 16:20:11.904317
+
+"""
+import json
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '4c936a7aee7f'
+down_revision: str | Sequence[str] | None = 'b12fbf8d2c82'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+FILMS_PAYLOAD_MAPPINGS = {
+    "tmdb": {
+        "id": "id",
+        "title": "title",
+        "original_title": "original_title",
+        "original_language": "original_language",
+        "runtime_minutes": "runtime",
+        "release_date": "release_date",
+        "imdb_id": "imdb_id",
+        "genres": "genres[].name",
+        "synopsis": "overview",
+    },
+    "wikidata": {
+        "records": "results.bindings[]",
+        "id": "film.value",
+        "title": "title.value",
+        "original_title": "original_title.value",
+        "original_language": "original_language.value",
+        "runtime_minutes": "runtime.value",
+        "release_date": "release_date.value",
+        "imdb_id": "imdb_id.value",
+        "tmdb_id": "tmdb_id.value",
+    },
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for source, mapping in FILMS_PAYLOAD_MAPPINGS.items():
+        op.execute(
+            f"UPDATE data_source_capabilities SET payload_mapping = '{json.dumps(mapping)}' "
+            "WHERE capability = 'films' AND payload_mapping IS NULL "
+            f"AND data_source_id = (SELECT id FROM data_sources WHERE name = '{source}')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for source, mapping in FILMS_PAYLOAD_MAPPINGS.items():
+        op.execute(
+            "UPDATE data_source_capabilities SET payload_mapping = NULL "
+            f"WHERE capability = 'films' AND payload_mapping = '{json.dumps(mapping)}' "
+            f"AND data_source_id = (SELECT id FROM data_sources WHERE name = '{source}')"
+        )
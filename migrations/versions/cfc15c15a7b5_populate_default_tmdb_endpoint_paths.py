@@ -0,0 +1,43 @@
+"""populate default tmdb endpoint paths
+
+Revision ID: cfc15c15a7b5
+Revises: 5a94c6334a35
+Create Date: 2026-10-16 09:12:40.118204
+
+"""
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'cfc15c15a7b5'
+down_revision: str | Sequence[str] | None = '5a94c6334a35'
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+TMDB_ENDPOINT_PATHS = {
+    "films": "/movie/{id}",
+    "people": "/person/{id}",
+    "assets": "/movie/{id}/images",
+    "updates": "/movie/changes",
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for capability, endpoint_path in TMDB_ENDPOINT_PATHS.items():
+        op.execute(
+            f"UPDATE data_source_capabilities SET endpoint_path = '{endpoint_path}' "
+            f"WHERE capability = '{capability}' AND endpoint_path IS NULL "
+            "AND data_source_id = (SELECT id FROM data_sources WHERE name = 'tmdb')"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for capability, endpoint_path in TMDB_ENDPOINT_PATHS.items():
+        op.execute(
+            "UPDATE data_source_capabilities SET endpoint_path = NULL "
+            f"WHERE capability = '{capability}' AND endpoint_path = '{endpoint_path}' "
+            "AND data_source_id = (SELECT id FROM data_sources WHERE name = 'tmdb')"
+        )
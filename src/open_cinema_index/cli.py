@@ -1,9 +1,61 @@
+import asyncio
 from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
 
 import typer
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine, event, select
 from sqlalchemy.orm import sessionmaker
 
+from open_cinema_index.models import DataSource
+from open_cinema_index.services.changes import ChangeFeed, prune_changes
+from open_cinema_index.services.checkpoints import RunCheckpoint
+from open_cinema_index.services.clusters import EntityClusters, IdentityCollisionError
+from open_cinema_index.services.data_sources import (
+    DataSourceDisabledError,
+    DataSourceNotConfiguredError,
+    DataSourceService,
+    FetchPlan,
+    RunNotResumableError,
+)
+from open_cinema_index.services.dumps import DumpSummary, dump_location, import_dump
+from open_cinema_index.services.fetch import (
+    CapabilityNotConfiguredError,
+    FetchEngine,
+    FetchRequest,
+    FetchResponse,
+    FetchSummary,
+    chain_expanders,
+    requests_for_ids,
+)
+from open_cinema_index.services.http_client import HttpClientRegistry
+from open_cinema_index.services.incremental import UpdatesFeed
+from open_cinema_index.services.mappings import InvalidPayloadMappingError
+from open_cinema_index.services.normalize import Normalizer
+from open_cinema_index.services.people_matching import (
+    MIN_NAME_SCORE,
+    PersonNameIndex,
+    person_candidates,
+    score_person_candidates,
+)
+from open_cinema_index.services.rate_limits import RateLimiterRegistry
+from open_cinema_index.services.raw_store import RawStore
+from open_cinema_index.services.refresh import (
+    RefreshScheduler,
+    records_per_request,
+    refresh_interval,
+    refresh_requests,
+    request_budget,
+)
+from open_cinema_index.services.resolve import IdentifierIndex, film_merge_candidates
+from open_cinema_index.services.title_matching import MIN_TITLE_SCORE, TitleLshIndex, score_candidates
+from open_cinema_index.services.vocabulary import default_vocabulary
+from open_cinema_index.services.wikidata import WikidataFilmPlanner, is_planning_response, uses_sparql
+
+RATE_LIMIT_STATE_DIR = Path("data") / "rate-limits"
+# Records refreshed per run for sources without rate limits.
+REFRESH_REQUESTS_WITHOUT_LIMITS = 1000
+
 app = typer.Typer(
     name="oci",
     help="Open Cinema Index — film ingestion and indexing toolkit",
@@ -38,30 +90,500 @@ def session_scope():
 
 @app.command()
 def fetch(
-    source: str = typer.Argument(..., help="Source name (e.g. tmdb, imdb)"),
-    film_id: str | None = typer.Option(None, "--film-id", help="Fetch a specific film by source identifier"),
-    since: str | None = typer.Option(None, "--since", help="Fetch items updated since this date (YYYY-MM-DD)"),
+    source: str | None = typer.Argument(
+        None, help="Source name (e.g. tmdb, imdb); omit to refresh what is due, or with --resume"
+    ),
+    film_id: list[str] | None = typer.Option(  # noqa: B008 - typer declares options via defaults
+        None, "--film-id", help="Fetch a specific film by source identifier (repeatable)"
+    ),
+    year: list[int] | None = typer.Option(  # noqa: B008 - typer declares options via defaults
+        None, "--year", help="Fetch all films released in a year (repeatable, SPARQL sources only)"
+    ),
+    since: str | None = typer.Option(
+        None, "--since", help="Fetch items updated since this date (YYYY-MM-DD) instead of the stored cursor"
+    ),
+    dump: Path | None = typer.Option(  # noqa: B008 - typer declares options via defaults
+        None, "--dump", help="Dump file to import (file sources; defaults to the source's base_url)"
+    ),
+    capability: str = typer.Option("films", "--capability", help="Capability of the dump's records (file sources)"),
+    offset: int = typer.Option(0, "--offset", help="Resume a dump import at this uncompressed byte offset"),
+    resume: int | None = typer.Option(
+        None, "--resume", help="Continue an interrupted or failed run from its last checkpoint"
+    ),
+    budget_minutes: int = typer.Option(
+        60, "--budget-minutes", help="Without a source: refresh as many due records as rate limits allow in this time"
+    ),
+    concurrency: int = typer.Option(16, "--concurrency", help="Maximum number of requests kept in flight"),
+    pool_size: int | None = typer.Option(
+        None, "--pool-size", help="Keep-alive connections per source (defaults to --concurrency)"
+    ),
 ):
     """
     Fetch raw data from a source without normalization.
+
+    Without --film-id or --year, fetches what changed since the source's last successful run.
+    Without a source, refreshes the most overdue records of every source with a refresh interval.
     """
-    pass
+    if source is None and (film_id or year or since):
+        raise typer.BadParameter("--film-id, --year and --since need a source.", param_hint="SOURCE")
+    http_clients = HttpClientRegistry()
+    # Shared bucket state lets several `oci fetch` processes on one machine draw from one quota.
+    rate_limiters = RateLimiterRegistry(state_dir=RATE_LIMIT_STATE_DIR)
+    if source is None and resume is None:
+        with session_scope() as session:
+            service = DataSourceService(session, rate_limiters=rate_limiters)
+            failed = _refresh_due(
+                session,
+                service,
+                http_clients,
+                budget=timedelta(minutes=budget_minutes),
+                concurrency=concurrency,
+                pool_size=pool_size,
+            )
+        rate_limiters.close()
+        http_clients.close()
+        if failed:
+            raise typer.Exit(code=1)
+        return
+
+    with session_scope() as session:
+        service = DataSourceService(session, rate_limiters=rate_limiters)
+        checkpoint = None
+        try:
+            if resume is not None:
+                plan = service.resume_fetch(resume)
+                checkpoint = RunCheckpoint.load(plan.run)
+                plan.cursors.update(checkpoint.cursors)
+            else:
+                plan = service.prepare_fetch(source)
+            if source is not None and source != plan.data_source.name:
+                raise RunNotResumableError(f"Run {resume} belongs to '{plan.data_source.name}', not '{source}'.")
+            from_dump = plan.data_source.kind == "file"
+            if from_dump and checkpoint is not None:
+                dump, capability, offset = Path(checkpoint.dump["path"]), checkpoint.dump["capability"], None
+            elif from_dump:
+                dump = dump or dump_location(plan.data_source)
+                if dump is None:
+                    raise DataSourceNotConfiguredError(f"Data source '{source}' has no dump file; pass --dump.")
+            elif checkpoint is not None:
+                requests, expanders = _resume_requests(plan, checkpoint)
+            else:
+                requests, expanders = _plan_requests(service, plan, film_id, year, since)
+        except (
+            DataSourceNotConfiguredError,
+            DataSourceDisabledError,
+            CapabilityNotConfiguredError,
+            RunNotResumableError,
+        ) as exc:
+            typer.echo(str(exc), err=True)
+            raise typer.Exit(code=1) from exc
+
+        run_id = plan.run.id
+        raw_store = RawStore(session, plan.data_source, plan.run)
+        if from_dump:
+            dump_summary = None
+            if checkpoint is not None:
+                dump_summary = DumpSummary(**{name: checkpoint.dump[name] for name in _DUMP_PROGRESS})
+                offset = dump_summary.end_offset
+
+            def save_dump_checkpoint(progress: DumpSummary) -> None:
+                progress_state = {name: getattr(progress, name) for name in _DUMP_PROGRESS}
+                dump_state = {"path": str(dump), "capability": capability, **progress_state}
+                RunCheckpoint(cursors=plan.cursors, dump=dump_state).save(plan.run)
+                # Committing at each checkpoint keeps the transaction small and makes the import resumable.
+                session.commit()
+
+            dump_summary = import_dump(
+                service,
+                plan,
+                raw_store,
+                dump,
+                capability=capability,
+                start_offset=offset,
+                on_checkpoint=save_dump_checkpoint,
+                summary=dump_summary,
+            )
+        else:
+            client = http_clients.client_for(plan.data_source, pool_size=pool_size or concurrency)
+            scheduler = None
+            if refresh_interval(plan.data_source) is not None and not uses_sparql(plan.data_source):
+                scheduler = RefreshScheduler(session, plan.data_source)
+            summary = _run_requests(
+                session,
+                service,
+                plan,
+                raw_store,
+                client,
+                requests,
+                expanders,
+                concurrency=concurrency,
+                checkpoint=checkpoint,
+                scheduler=scheduler,
+            )
+    rate_limiters.close()
+    http_clients.close()
+
+    if from_dump:
+        typer.echo(
+            f"Run {run_id}: imported {dump_summary.records} records, skipped {dump_summary.skipped}, "
+            f"offsets {dump_summary.start_offset}-{dump_summary.end_offset}"
+        )
+        _echo_raw_data(raw_store)
+        return
+    _echo_fetch_report(run_id, summary, raw_store, client)
+    if summary.failed:
+        typer.echo(f"Resume with: oci fetch --resume {run_id}", err=True)
+        raise typer.Exit(code=1)
+
+
+def _refresh_due(
+    session,
+    service: DataSourceService,
+    http_clients: HttpClientRegistry,
+    *,
+    budget: timedelta,
+    concurrency: int,
+    pool_size: int | None,
+) -> bool:
+    """Refresh the most overdue records of every scheduled source; return whether any request failed."""
+    failed = False
+    sources = session.scalars(
+        select(DataSource).where(DataSource.enabled).where(DataSource.kind != "file").order_by(DataSource.name)
+    )
+    for data_source in sources:
+        if refresh_interval(data_source) is None:
+            continue
+        scheduler = RefreshScheduler(session, data_source)
+        scheduler.sync_identifiers()
+        allowed = request_budget(data_source, budget)
+        if allowed is None:
+            allowed = REFRESH_REQUESTS_WITHOUT_LIMITS
+        keys = scheduler.claim(allowed * records_per_request(data_source))
+        if not keys:
+            typer.echo(f"{data_source.name}: nothing due")
+            continue
+        try:
+            batches = refresh_requests(data_source, scheduler.capability, keys)
+        except CapabilityNotConfiguredError as exc:
+            scheduler.release(keys)
+            typer.echo(str(exc), err=True)
+            continue
+
+        plan = service.prepare_fetch(data_source.name)
+        raw_store = RawStore(session, data_source, plan.run)
+        client = http_clients.client_for(data_source, pool_size=pool_size or concurrency)
+        typer.echo(f"{data_source.name}: refreshing {len(keys)} due records in {len(batches)} requests")
+        engine = FetchEngine(
+            service,
+            plan,
+            transport=client,
+            concurrency=concurrency,
+            sink=raw_store.add,
+        )
+        summary = asyncio.run(engine.run(batches))
+        raw_store.flush()
+        missed = {key for request in engine.failed_requests for key in batches[request]}
+        # A 404 for a SPARQL batch says nothing about the records in it; only single-record requests are dropped.
+        gone = set() if uses_sparql(data_source) else {request.resource_key for request in engine.not_found_requests}
+        scheduler.track(key for key in keys if key not in missed and key not in gone)
+        scheduler.release(missed)
+        scheduler.drop(gone)
+        session.commit()
+        _echo_fetch_report(plan.run.id, summary, raw_store, client)
+        failed = failed or bool(summary.failed)
+    return failed
+
+
+def _run_requests(
+    session,
+    service: DataSourceService,
+    plan: FetchPlan,
+    raw_store: RawStore,
+    client,
+    requests: list[FetchRequest],
+    expanders: dict,
+    *,
+    concurrency: int,
+    checkpoint: RunCheckpoint | None = None,
+    scheduler: RefreshScheduler | None = None,
+) -> FetchSummary:
+    def save_checkpoint(pending: list[FetchRequest], failed: list[FetchRequest], progress: FetchSummary) -> None:
+        raw_store.flush()
+        if scheduler is not None:
+            scheduler.flush()
+        state = {name: expander.checkpoint_state() for name, expander in expanders.items()}
+        RunCheckpoint.for_fetch(pending, failed, progress, plan.cursors, state).save(plan.run)
+        # Everything fetched so far becomes durable together with the work list that follows it.
+        session.commit()
+
+    def store(response: FetchResponse) -> None:
+        if is_planning_response(response):
+            return
+        raw_store.add(response)
+        if scheduler is not None:
+            scheduler.add(response)
+
+    engine = FetchEngine(
+        service,
+        plan,
+        transport=client,
+        concurrency=concurrency,
+        sink=store,
+        expand=chain_expanders(*(expander.expand for expander in expanders.values())),
+        summary=checkpoint.fetch_summary() if checkpoint is not None else None,
+        checkpoint=save_checkpoint,
+    )
+    summary = asyncio.run(engine.run(requests))
+    raw_store.flush()
+    if scheduler is not None:
+        scheduler.flush()
+
+        def scheduled(requests: list[FetchRequest]) -> list[str]:
+            return [
+                request.resource_key
+                for request in requests
+                if request.capability == scheduler.capability and request.resource_key is not None
+            ]
+
+        # An unchanged record was still checked, so it is not due again until one interval from now.
+        scheduler.track(scheduled(engine.not_modified_requests))
+        scheduler.drop(scheduled(engine.not_found_requests))
+    return summary
+
+
+def _echo_fetch_report(run_id: int, summary: FetchSummary, raw_store: RawStore, client) -> None:
+    typer.echo(
+        f"Run {run_id}: fetched {summary.fetched}, not modified {summary.not_modified}, "
+        f"not found {summary.not_found}, failed {summary.failed}, coalesced {summary.coalesced}, "
+        f"retried {summary.retried} (backoff {summary.backoff_seconds:.1f}s)"
+    )
+    _echo_raw_data(raw_store)
+    stats = client.stats
+    typer.echo(
+        f"HTTP: {stats.requests} requests, pool hits {stats.pool_hits}, misses {stats.pool_misses}, "
+        f"latency mean {stats.mean_latency * 1000:.0f}ms p95 {stats.latency_percentile(95) * 1000:.0f}ms"
+    )
+
+
+def _echo_raw_data(raw_store: RawStore) -> None:
+    stored = raw_store.stats
+    typer.echo(
+        f"Raw data: {stored.payloads} payloads, {stored.new_blobs} new, {stored.deduplicated} unchanged, "
+        f"{stored.bytes_in} bytes in, {stored.bytes_stored} bytes stored"
+    )
+
+
+# DumpSummary fields carried in a dump import's checkpoint.
+_DUMP_PROGRESS = ("records", "skipped", "start_offset", "end_offset")
+
+
+def _plan_requests(
+    service: DataSourceService,
+    plan: FetchPlan,
+    film_id: list[str] | None,
+    year: list[int] | None,
+    since: str | None,
+) -> tuple[list[FetchRequest], dict]:
+    source = plan.data_source.name
+    planner = WikidataFilmPlanner(plan.data_source) if uses_sparql(plan.data_source) else None
+    if year and planner is None:
+        raise CapabilityNotConfiguredError(f"Data source '{source}' cannot list films by year.")
+    requests = []
+    expanders = {}
+    if film_id and planner is not None:
+        requests.extend(planner.requests_for_ids(film_id))
+    elif film_id:
+        requests.extend(requests_for_ids(plan.data_source, "films", film_id))
+    if year:
+        requests.extend(planner.requests_for_years(year))
+    if planner is not None:
+        expanders["wikidata"] = planner
+    if since or not (film_id or year):
+        since = since or service.cursor_value(plan.data_source, "updates")
+        if since is None:
+            raise CapabilityNotConfiguredError(
+                f"No updates cursor stored for '{source}' yet; run once with --since to start from a date."
+            )
+        feed = UpdatesFeed(plan, since)
+        requests.extend(feed.requests())
+        expanders["updates"] = feed
+    return requests, expanders
+
+
+def _resume_requests(plan: FetchPlan, checkpoint: RunCheckpoint) -> tuple[list[FetchRequest], dict]:
+    expanders = {}
+    if "wikidata" in checkpoint.state:
+        expanders["wikidata"] = WikidataFilmPlanner(plan.data_source)
+    if "updates" in checkpoint.state:
+        expanders["updates"] = UpdatesFeed(plan, checkpoint.state["updates"]["since"])
+    for name, expander in expanders.items():
+        expander.restore(checkpoint.state[name])
+    return checkpoint.requests, expanders
 
 
 @app.command()
-def normalize(source: str | None = typer.Option(None, "--source", help="Normalize data from a specific source")):
+def normalize(
+    source: str | None = typer.Option(None, "--source", help="Normalize data from a specific source"),
+    batch_size: int = typer.Option(1000, "--batch-size", help="Raw payloads read and written per transaction"),
+    workers: int = typer.Option(1, "--workers", help="Processes that decode and map payloads in parallel"),
+):
     """
     Normalize raw source data into canonical film entities.
+
+    Without --source, normalizes every source whose films capability has a payload_mapping.
     """
-    pass
+    with session_scope() as session:
+        query = select(DataSource).order_by(DataSource.name)
+        if source is not None:
+            query = query.where(DataSource.name == source)
+        data_sources = session.scalars(query).all()
+        if source is not None and not data_sources:
+            typer.echo(f"Data source '{source}' is not configured.", err=True)
+            raise typer.Exit(code=1)
+
+        for data_source in data_sources:
+            try:
+                normalizer = Normalizer(session, data_source, batch_size=batch_size, workers=workers)
+            except (CapabilityNotConfiguredError, InvalidPayloadMappingError) as exc:
+                if source is None and isinstance(exc, CapabilityNotConfiguredError):
+                    continue
+                typer.echo(str(exc), err=True)
+                raise typer.Exit(code=1) from exc
+            # One transaction per batch keeps locks short and lets an interrupted run continue where it stopped.
+            summary = normalizer.run(on_batch=lambda _: session.commit())
+            typer.echo(
+                f"{data_source.name}: normalized {summary.payloads} payloads into {summary.records} records, "
+                f"{summary.films_created} new films, {summary.claims} claims written, skipped {summary.skipped}, "
+                f"rejected {summary.rejected}"
+            )
+            if summary.rejected:
+                typer.echo(
+                    "  most rejected: "
+                    + ", ".join(f"{reason} ({count})" for reason, count in summary.rejects.most_common(5))
+                )
+
+        used = {kind: stats for kind, stats in default_vocabulary.stats().items() if stats.hits + stats.misses}
+        if used:
+            typer.echo(
+                "vocabulary cache: "
+                + ", ".join(f"{kind} {stats.size} spellings, {stats.hit_rate:.1%} hits" for kind, stats in used.items())
+            )
 
 
 @app.command()
-def resolve(entity: str = typer.Argument(..., help="Entity type to resolve (films, people)")):
+def resolve(
+    entity: str = typer.Argument(..., help="Entity type to resolve (films, people)"),
+    min_title_score: float = typer.Option(
+        MIN_TITLE_SCORE, "--min-title-score", help="Lowest score (0-1) of a title match worth listing"
+    ),
+    min_name_score: float = typer.Option(
+        MIN_NAME_SCORE, "--min-name-score", help="Lowest score (0-1) of a name match worth listing"
+    ),
+    merge: tuple[int, int] | None = typer.Option(
+        None, "--merge", help="Mark two entities as the same by hand and merge their clusters"
+    ),
+    split: tuple[int, int] | None = typer.Option(
+        None, "--split", help="Mark two entities as distinct by hand (an identity collision) and split their cluster"
+    ),
+    note: str | None = typer.Option(None, "--note", help="Why two entities are distinct, recorded with --split"),
+    full: bool = typer.Option(False, "--full", help="Resolve every entity, not just those changed since the last run"),
+):
     """
     Resolve duplicate or conflicting entities.
+
+    For films, streams merge candidates as tab-separated "film_id, other_film_id, evidence, value" lines:
+    films that share an identifier (evidence is the scheme), then films with similar titles released
+    around the same year (evidence "title", value the score). For people, streams
+    "person_id, other_person_id, name, score" lines for people with similar names born around the same year.
+
+    Only entities changed since the last run are looked at, unless this is the first run or --full is given.
+    Merged entities are kept as clusters, each with a canonical id. With --merge or --split, only
+    updates the clusters by hand and prints the canonical ids of both entities.
     """
-    pass
+    if entity not in ("films", "people"):
+        typer.echo(f"Resolving '{entity}' is not supported yet.", err=True)
+        raise typer.Exit(code=1)
+    entity_type = "film" if entity == "films" else "person"
+    with session_scope() as session:
+        clusters = EntityClusters(session, entity_type)
+        if merge is not None or split is not None:
+            _resolve_by_hand(clusters, merge, split, note)
+            return
+        changes = ChangeFeed(session, "resolve", entity_type)
+        changed = None if full or changes.first_run else changes.entity_ids()
+        if entity == "people":
+            _resolve_people(session, clusters, min_name_score, changed)
+        else:
+            _resolve_films(session, clusters, min_title_score, changed)
+        changes.advance()
+        prune_changes(session)
+
+
+def _resolve_by_hand(
+    clusters: EntityClusters, merge: tuple[int, int] | None, split: tuple[int, int] | None, note: str | None
+) -> None:
+    try:
+        if merge is not None:
+            canonical_id = clusters.merge(*merge)
+            typer.echo(f"{merge[0]}\t{canonical_id}\n{merge[1]}\t{canonical_id}")
+        if split is not None:
+            canonical_ids = clusters.split(*split, note=note)
+            typer.echo(f"{split[0]}\t{canonical_ids[0]}\n{split[1]}\t{canonical_ids[1]}")
+    except (IdentityCollisionError, ValueError) as exc:
+        typer.echo(str(exc), err=True)
+        raise typer.Exit(code=1) from exc
+
+
+def _resolve_films(session, clusters: EntityClusters, min_title_score: float, changed: set[int] | None) -> None:
+    index = IdentifierIndex()
+    linked = collisions = 0
+    for candidate in film_merge_candidates(session, index, film_ids=changed):
+        typer.echo(f"{candidate.film_id}\t{candidate.other_film_id}\t{candidate.scheme}\t{candidate.value}")
+        try:
+            clusters.merge(candidate.film_id, candidate.other_film_id, f"{candidate.scheme}:{candidate.value}")
+            linked += 1
+        except IdentityCollisionError:
+            collisions += 1
+
+    titles = TitleLshIndex(session)
+    indexed = titles.update()
+    # Releases recorded after a film's titles were indexed move its buckets to the right year.
+    titles.refresh_years(changed)
+    session.commit()
+    matches = 0
+    # The same changed films as the identifier join, so a film whose identifiers or credits changed is rechecked too.
+    pairs = titles.candidates(film_ids=changed)
+    for match in score_candidates(session, pairs, threshold=min_title_score):
+        if clusters.resolved(match.film_id, match.other_film_id):
+            continue
+        matches += 1
+        typer.echo(f"{match.film_id}\t{match.other_film_id}\ttitle\t{match.score}")
+    typer.echo(
+        f"films: {_changed_summary(changed)}; {len(index)} identifiers indexed, {linked} shared identifiers merged"
+        f" ({collisions} kept apart by identity collisions); "
+        f"{indexed} new titles indexed, {matches} more pairs with similar titles",
+        err=True,
+    )
+
+
+def _resolve_people(session, clusters: EntityClusters, min_name_score: float, changed: set[int] | None) -> None:
+    names = PersonNameIndex(session)
+    indexed = names.rebuild() if changed is None else names.update(changed)
+    session.commit()
+    matches = 0
+    pairs = person_candidates(session, person_ids=changed)
+    for match in score_person_candidates(session, pairs, threshold=min_name_score):
+        if clusters.resolved(match.person_id, match.other_person_id):
+            continue
+        matches += 1
+        typer.echo(f"{match.person_id}\t{match.other_person_id}\tname\t{match.score}")
+    typer.echo(
+        f"people: {_changed_summary(changed)}; {indexed} names indexed, {matches} pairs with similar names", err=True
+    )
+
+
+def _changed_summary(changed: set[int] | None) -> str:
+    return "all resolved" if changed is None else f"{len(changed)} changed since the last run"
 
 
 @app.command()
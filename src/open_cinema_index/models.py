@@ -1,7 +1,23 @@
 from datetime import datetime, timedelta, timezone
 
-from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Text,
+    UniqueConstraint,
+    event,
+    text,
+)
 from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.schema import DDL
 
 Base = declarative_base()
 
@@ -118,7 +134,18 @@ class Identifier(Base):
     source = Column(String, nullable=True)
     confidence = Column(Integer, nullable=True)
 
-    __table_args__ = (UniqueConstraint("scheme", "value", name="uq_identifier_scheme_value"),)
+    # Each source claims an identifier once; two sources may claim it for different films until they are resolved.
+    # NULLs never conflict in a unique constraint, so unsourced claims get a partial index of their own.
+    __table_args__ = (
+        UniqueConstraint("scheme", "value", "source", name="uq_identifier_scheme_value_source"),
+        Index(
+            "uq_identifier_scheme_value_unsourced",
+            "scheme",
+            "value",
+            unique=True,
+            sqlite_where=text("source IS NULL"),
+        ),
+    )
 
     film = relationship("Film", back_populates="identifiers")
 
@@ -276,6 +303,10 @@ class DataSourceRun(Base):
     error = Column(Text, nullable=True)
     items_fetched = Column(Integer, nullable=True)
     items_processed = Column(Integer, nullable=True)
+    retry_count = Column(Integer, nullable=True)
+    backoff_seconds = Column(Float, nullable=True)  # Total time requests spent waiting to be retried
+    checkpoint = Column(Text, nullable=True)  # JSON: pending work, cursors and offsets of an unfinished run
+    checkpointed_at = Column(DateTime(timezone=True), nullable=True)
 
     data_source = relationship("DataSource", back_populates="runs")
 
@@ -284,3 +315,256 @@ class DataSourceRun(Base):
         if self.started_at and self.completed_at:
             return self.completed_at - self.started_at
         return timedelta()
+
+
+class DataSourceCursor(Base):
+    __tablename__ = "data_source_cursors"
+
+    id = Column(Integer, primary_key=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id", ondelete="CASCADE"), nullable=False)
+    capability = Column(String, nullable=False)  # usually updates
+    value = Column(String, nullable=False)  # High-water mark: timestamp, date or ID
+    run_id = Column(Integer, ForeignKey("data_source_runs.id", ondelete="SET NULL"), nullable=True)  # Run that set it
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    __table_args__ = (UniqueConstraint("data_source_id", "capability", name="uq_data_source_cursor_capability"),)
+
+    data_source = relationship("DataSource")
+    run = relationship("DataSourceRun")
+
+
+class RefreshScheduleEntry(Base):
+    __tablename__ = "refresh_schedule"
+
+    id = Column(Integer, primary_key=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id", ondelete="CASCADE"), nullable=False)
+    capability = Column(String, nullable=False)  # usually films
+    resource_key = Column(String, nullable=False)  # Source identifier of the record
+    film_id = Column(Integer, ForeignKey("films.id", ondelete="SET NULL"), nullable=True)
+    next_due_at = Column(DateTime(timezone=True), nullable=False)
+    last_fetched_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint("data_source_id", "capability", "resource_key", name="uq_refresh_schedule_record"),
+        # Most overdue first: the scheduler reads this index in order and stops after one batch.
+        Index("ix_refresh_schedule_due", "data_source_id", "capability", "next_due_at"),
+    )
+
+    data_source = relationship("DataSource")
+    film = relationship("Film")
+
+
+class HttpCacheValidator(Base):
+    __tablename__ = "http_cache_validators"
+
+    id = Column(Integer, primary_key=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id", ondelete="CASCADE"), nullable=False)
+    url = Column(String, nullable=False)  # Resource URL without credentials
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)  # Last-Modified header, verbatim
+    checked_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (UniqueConstraint("data_source_id", "url", name="uq_http_cache_validator_source_url"),)
+
+    data_source = relationship("DataSource")
+
+
+class RawBlob(Base):
+    __tablename__ = "raw_blobs"
+
+    digest = Column(String, primary_key=True)  # SHA-256 of the uncompressed payload
+    codec = Column(String, nullable=False)  # identity, zlib, zlib-dict
+    dictionary_digest = Column(String, ForeignKey("raw_blobs.digest"), nullable=True)  # Preset dictionary blob
+    size = Column(Integer, nullable=False)  # Uncompressed bytes
+    stored_size = Column(Integer, nullable=False)
+    content = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class RawData(Base):
+    __tablename__ = "raw_data"
+
+    id = Column(Integer, primary_key=True)
+    data_source_id = Column(Integer, ForeignKey("data_sources.id", ondelete="CASCADE"), nullable=False)
+    run_id = Column(Integer, ForeignKey("data_source_runs.id", ondelete="SET NULL"), nullable=True)
+    capability = Column(String, nullable=False)
+    resource_key = Column(String, nullable=True)  # Source identifier of the fetched record, if known
+    url = Column(String, nullable=True)  # Without credentials
+    blob_digest = Column(String, ForeignKey("raw_blobs.digest"), nullable=False)
+    fetched_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    normalized_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_raw_data_source_normalized", "data_source_id", "normalized_at"),)
+
+    data_source = relationship("DataSource")
+    run = relationship("DataSourceRun")
+    blob = relationship("RawBlob")
+
+
+class TitleBucket(Base):
+    __tablename__ = "title_buckets"
+
+    id = Column(Integer, primary_key=True)
+    title_id = Column(Integer, ForeignKey("titles.id", ondelete="CASCADE"), nullable=False)
+    film_id = Column(Integer, ForeignKey("films.id", ondelete="CASCADE"), nullable=False)
+    year = Column(Integer, nullable=True)  # The film's earliest release year when the title was indexed
+    band = Column(Integer, nullable=False)  # MinHash band number
+    bucket = Column(Integer, nullable=False)  # 63-bit hash of the band's signature values
+
+    __table_args__ = (
+        UniqueConstraint("title_id", "band", name="uq_title_bucket_band"),
+        # Titles in the same bucket of a band, released within a year or so, are match candidates.
+        Index("ix_title_buckets_lookup", "band", "bucket", "year"),
+        # Serves the buckets of changed films in incremental resolve runs.
+        Index("ix_title_buckets_film", "film_id"),
+    )
+
+    title = relationship("Title")
+    film = relationship("Film")
+
+
+class PersonNameKey(Base):
+    __tablename__ = "person_name_keys"
+
+    id = Column(Integer, primary_key=True)
+    # No foreign key: a deleted person's keys are removed, and their counts lowered, when the change feed reports it.
+    person_id = Column(Integer, nullable=False)
+    kind = Column(String, nullable=False)  # trigram, phonetic
+    key = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ix_person_name_keys_lookup", "kind", "key"),
+        Index("ix_person_name_keys_person", "person_id"),
+    )
+
+
+class PersonKeyCount(Base):
+    __tablename__ = "person_key_counts"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # trigram, phonetic
+    key = Column(String, nullable=False)
+    names = Column(Integer, nullable=False)  # Names in people and alternate_names with this key
+
+    __table_args__ = (UniqueConstraint("kind", "key", name="uq_person_key_count"),)
+
+
+class EntityCluster(Base):
+    __tablename__ = "entity_clusters"
+
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String, nullable=False)  # film, person
+    entity_id = Column(Integer, nullable=False)
+    parent_id = Column(Integer, nullable=False)  # Equal to entity_id for a cluster's canonical entity
+
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", name="uq_entity_cluster_entity"),
+        Index("ix_entity_clusters_parent", "entity_type", "parent_id"),
+    )
+
+
+class EntityLink(Base):
+    __tablename__ = "entity_links"
+
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)  # The lower id of the pair
+    other_entity_id = Column(Integer, nullable=False)
+    evidence = Column(String, nullable=False)  # e.g. imdb:tt0133093, manual
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", "other_entity_id", "evidence", name="uq_entity_link"),
+        Index("ix_entity_links_other", "entity_type", "other_entity_id"),
+    )
+
+
+class IdentityCollision(Base):
+    __tablename__ = "identity_collisions"
+
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)  # The lower id of the pair
+    other_entity_id = Column(Integer, nullable=False)
+    note = Column(Text, nullable=True)  # Why the two are distinct, as recorded by whoever split them
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+    __table_args__ = (UniqueConstraint("entity_type", "entity_id", "other_entity_id", name="uq_identity_collision"),)
+
+
+class EntityChange(Base):
+    __tablename__ = "entity_changes"
+
+    # AUTOINCREMENT keeps change ids increasing even after consumed changes are pruned.
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String, nullable=False)  # film, person
+    entity_id = Column(Integer, nullable=False)
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+
+class StageWatermark(Base):
+    __tablename__ = "stage_watermarks"
+
+    id = Column(Integer, primary_key=True)
+    stage = Column(String, nullable=False)  # resolve, enrich
+    entity_type = Column(String, nullable=False)
+    change_id = Column(Integer, nullable=False)  # Last entity_changes id the stage has processed
+    updated_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
+
+    __table_args__ = (UniqueConstraint("stage", "entity_type", name="uq_stage_watermark_entity"),)
+
+
+# Claim tables whose inserts, updates and deletes are recorded in entity_changes, with the entity columns they touch.
+CHANGE_TRACKED_TABLES = {
+    "films": {"film": "id"},
+    "titles": {"film": "film_id"},
+    "releases": {"film": "film_id"},
+    "identifiers": {"film": "film_id"},
+    "metadata_assertions": {"film": "film_id"},
+    "assets": {"film": "film_id"},
+    "credits": {"film": "film_id", "person": "person_id"},
+    "people": {"person": "id"},
+    "alternate_names": {"person": "person_id"},
+}
+
+
+def change_tracking_triggers(table: str) -> list[str]:
+    """
+    SQLite triggers recording every change to a claim table in ``entity_changes``.
+
+    Triggers see Core bulk writes and cascaded deletes that ORM events
+    miss. An update that moves a row to another film or person records
+    both the entity it left and the one it joined. A change is not
+    recorded again while it is still the latest one, so a film's titles
+    inserted together take one row.
+    """
+    triggers = []
+    for operation, rows in (("INSERT", ("NEW",)), ("UPDATE", ("NEW", "OLD")), ("DELETE", ("OLD",))):
+        statements = "".join(
+            f"INSERT INTO entity_changes (entity_type, entity_id) SELECT '{entity_type}', {row}.{column} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM entity_changes WHERE id = (SELECT max(id) FROM entity_changes) "
+            f"AND entity_type = '{entity_type}' AND entity_id = {row}.{column})"
+            + (f" AND OLD.{column} IS NOT NEW.{column}" if operation == "UPDATE" and row == "OLD" else "")
+            + "; "
+            for entity_type, column in CHANGE_TRACKED_TABLES[table].items()
+            for row in rows
+        )
+        triggers.append(
+            f"CREATE TRIGGER track_{table}_{operation.lower()} AFTER {operation} ON {table} "
+            f"FOR EACH ROW BEGIN {statements}END"
+        )
+    return triggers
+
+
+for _table in CHANGE_TRACKED_TABLES:
+    for _trigger in change_tracking_triggers(_table):
+        event.listen(Base.metadata.tables[_table], "after_create", DDL(_trigger).execute_if(dialect="sqlite"))
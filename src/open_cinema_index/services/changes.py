@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+
+from open_cinema_index.models import EntityChange, StageWatermark
+
+# Pipeline stages that consume entity_changes, each with its own watermark per entity type.
+STAGES = ("resolve", "enrich")
+
+
+class ChangeFeed:
+    """
+    The films or people a pipeline stage has not seen change yet, from ``entity_changes``.
+
+    Triggers on the claim tables record a change for every film or person
+    whose rows are inserted, updated or deleted. A feed covers the changes
+    after the stage's watermark, up to the newest one when the feed was
+    created; ``advance`` moves the watermark there once the stage's work
+    is done. Changes made while the stage runs are left for its next run.
+
+    A stage that never ran has no watermark (``first_run``) and should
+    process everything, since changes from before tracking, or already
+    pruned, are not in the table.
+    """
+
+    def __init__(self, session, stage: str, entity_type: str):
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage '{stage}'; expected one of {', '.join(STAGES)}.")
+        self.session = session
+        self.stage = stage
+        self.entity_type = entity_type
+        self.since = session.scalar(
+            select(StageWatermark.change_id)
+            .where(StageWatermark.stage == stage)
+            .where(StageWatermark.entity_type == entity_type)
+        )
+        # Pruning may have emptied the table; the watermark never moves back.
+        self.until = max(session.scalar(select(func.max(EntityChange.id))) or 0, self.since or 0)
+
+    @property
+    def first_run(self) -> bool:
+        return self.since is None
+
+    def entity_ids(self) -> set[int]:
+        """Ids of the films or people changed after the watermark, including deleted ones."""
+        return set(
+            self.session.scalars(
+                select(EntityChange.entity_id)
+                .where(EntityChange.entity_type == self.entity_type)
+                .where(EntityChange.id > (self.since or 0))
+                .where(EntityChange.id <= self.until)
+                .distinct()
+            )
+        )
+
+    def advance(self) -> None:
+        """Mark every change the feed covers as processed by the stage."""
+        statement = insert(StageWatermark).values(stage=self.stage, entity_type=self.entity_type, change_id=self.until)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[StageWatermark.stage, StageWatermark.entity_type],
+                set_={"change_id": statement.excluded.change_id, "updated_at": datetime.now(timezone.utc)},
+            )
+        )
+        self.since = self.until
+
+
+def prune_changes(session) -> int:
+    """Delete the changes every stage with a watermark has processed; returns how many were deleted."""
+    processed = session.scalar(select(func.min(StageWatermark.change_id)))
+    if processed is None:
+        return 0
+    return session.execute(delete(EntityChange).where(EntityChange.id <= processed)).rowcount
@@ -0,0 +1,84 @@
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+
+from open_cinema_index.models import DataSourceRun
+from open_cinema_index.services.fetch import FetchRequest, FetchSummary
+
+# Counters carried over to a resumed run; failures are retried, so they start again from zero.
+_RESUMED_COUNTERS = ("requested", "fetched", "not_modified", "not_found", "retried", "backoff_seconds")
+
+
+def request_to_json(request: FetchRequest) -> dict:
+    return {
+        "capability": request.capability,
+        "path": request.path,
+        "params": [list(param) for param in request.params],
+        "resource_key": request.resource_key,
+    }
+
+
+def request_from_json(data: dict) -> FetchRequest:
+    return FetchRequest(
+        capability=data["capability"],
+        path=data["path"],
+        params=tuple((name, value) for name, value in data["params"]),
+        resource_key=data.get("resource_key"),
+    )
+
+
+@dataclass
+class RunCheckpoint:
+    """
+    Everything needed to continue an unfinished run, stored as JSON on ``DataSourceRun.checkpoint``.
+
+    ``requests`` holds the work that had not completed when the checkpoint was
+    taken: queued and in-flight requests, plus failed ones so a resumed run
+    retries them. ``state`` holds the serialized state of the planners that
+    expand responses into follow-up requests, keyed by planner name, and
+    ``dump`` the progress of a dump import.
+    """
+
+    requests: list[FetchRequest] = field(default_factory=list)
+    summary: dict[str, float] = field(default_factory=dict)
+    cursors: dict[str, str] = field(default_factory=dict)
+    state: dict[str, dict] = field(default_factory=dict)
+    dump: dict | None = None
+
+    def save(self, run: DataSourceRun) -> None:
+        run.checkpoint = self.to_json()
+        run.checkpointed_at = datetime.now(timezone.utc)
+
+    @classmethod
+    def load(cls, run: DataSourceRun) -> "RunCheckpoint | None":
+        return cls.from_json(run.checkpoint) if run.checkpoint else None
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["requests"] = [request_to_json(request) for request in self.requests]
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "RunCheckpoint":
+        data = json.loads(text)
+        data["requests"] = [request_from_json(request) for request in data.get("requests", [])]
+        return cls(**data)
+
+    @classmethod
+    def for_fetch(
+        cls,
+        pending: list[FetchRequest],
+        failed: list[FetchRequest],
+        summary: FetchSummary,
+        cursors: dict[str, str],
+        state: dict[str, dict],
+    ) -> "RunCheckpoint":
+        return cls(
+            requests=[*pending, *failed],
+            summary={name: getattr(summary, name) for name in _RESUMED_COUNTERS},
+            cursors=dict(cursors),
+            state=state,
+        )
+
+    def fetch_summary(self) -> FetchSummary:
+        return FetchSummary(**{name: self.summary.get(name, 0) for name in _RESUMED_COUNTERS})
@@ -0,0 +1,233 @@
+from collections.abc import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from open_cinema_index.models import EntityCluster, EntityLink, IdentityCollision
+
+ENTITY_TYPES = ("film", "person")
+# Keeps IN (...) lists well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK_SIZE = 500
+
+
+class IdentityCollisionError(Exception):
+    """Raised when a merge would put two entities marked as distinct into one cluster."""
+
+
+class EntityClusters:
+    """
+    Clusters of films or people that are the same work, as a disjoint-set forest in ``entity_clusters``.
+
+    Every clustered entity has a row pointing at its parent. Roots point at
+    themselves and are the cluster's canonical id, which is always the
+    lowest id in the cluster, so it does not change as long as the oldest
+    row stays. Entities without a row are clusters of their own. Lookups
+    compress the paths they walk, so parent chains stay short and
+    ``canonical_ids`` usually takes one query per chunk of ids.
+
+    ``merge`` unites two clusters in place and records its evidence in
+    ``entity_links``. ``split`` records an ``identity_collisions`` marker
+    and rebuilds just the affected cluster from its links, leaving out any
+    link that would join the two sides again. Later merges respect the
+    markers too.
+    """
+
+    def __init__(self, session, entity_type: str):
+        if entity_type not in ENTITY_TYPES:
+            raise ValueError(f"Unknown entity type '{entity_type}'; expected one of {', '.join(ENTITY_TYPES)}.")
+        self.session = session
+        self.entity_type = entity_type
+        self._collisions: dict[int, set[int]] | None = None
+
+    def find(self, entity_id: int) -> int:
+        """The canonical id of ``entity_id``'s cluster."""
+        return self.canonical_ids([entity_id])[entity_id]
+
+    def canonical_ids(self, entity_ids: Iterable[int]) -> dict[int, int]:
+        """The canonical id of each of ``entity_ids``, compressing every path walked on the way."""
+        requested = sorted(set(entity_ids))
+        parents: dict[int, int] = {}
+        frontier = requested
+        while frontier:
+            found = self._parents(frontier)
+            ancestors = set()
+            for entity_id in frontier:
+                parent = parents[entity_id] = found.get(entity_id, entity_id)
+                if parent not in parents:
+                    ancestors.add(parent)
+            frontier = sorted(ancestors)
+
+        roots: dict[int, int] = {}
+        for entity_id in parents:
+            path = []
+            node = entity_id
+            while node not in roots and parents[node] != node:
+                path.append(node)
+                node = parents[node]
+            root = roots.get(node, node)
+            roots.update(dict.fromkeys(path, root))
+            roots[node] = root
+        self._set_parents({entity_id: root for entity_id, root in roots.items() if parents[entity_id] != root})
+        return {entity_id: roots[entity_id] for entity_id in requested}
+
+    def members(self, entity_id: int) -> set[int]:
+        """Every entity in ``entity_id``'s cluster, itself included."""
+        root = self.find(entity_id)
+        members, frontier = {root}, [root]
+        while frontier:
+            children = set()
+            for start in range(0, len(frontier), _LOOKUP_CHUNK_SIZE):
+                children.update(
+                    self.session.scalars(
+                        select(EntityCluster.entity_id)
+                        .where(EntityCluster.entity_type == self.entity_type)
+                        .where(EntityCluster.parent_id.in_(frontier[start : start + _LOOKUP_CHUNK_SIZE]))
+                    )
+                )
+            frontier = sorted(children - members)
+            members.update(frontier)
+        return members
+
+    def resolved(self, entity_id: int, other_entity_id: int) -> bool:
+        """Whether two entities are already known to be the same (one cluster) or distinct (a marker)."""
+        if other_entity_id in self._load_collisions().get(entity_id, ()):
+            return True
+        return self.find(entity_id) == self.find(other_entity_id)
+
+    def merge(self, entity_id: int, other_entity_id: int, evidence: str = "manual") -> int:
+        """
+        Record that two entities are the same and unite their clusters; returns the canonical id.
+
+        Raises ``IdentityCollisionError``, recording nothing, when either
+        cluster holds an entity marked as distinct from one in the other.
+        """
+        roots = self.canonical_ids([entity_id, other_entity_id])
+        root, other_root = sorted((roots[entity_id], roots[other_entity_id]))
+        if root != other_root:
+            self._check_collisions(root, other_root)
+        if entity_id != other_entity_id:
+            self.session.execute(
+                insert(EntityLink).on_conflict_do_nothing(),
+                {
+                    "entity_type": self.entity_type,
+                    "entity_id": min(entity_id, other_entity_id),
+                    "other_entity_id": max(entity_id, other_entity_id),
+                    "evidence": evidence,
+                },
+            )
+        if root != other_root:
+            self._set_parents({root: root, other_root: root})
+        return root
+
+    def split(self, entity_id: int, other_entity_id: int, note: str | None = None) -> tuple[int, int]:
+        """
+        Mark two entities as distinct and separate them if they share a cluster.
+
+        Returns the canonical ids of both afterwards. The cluster is rebuilt
+        from its ``entity_links`` in the order they were recorded; links
+        that would unite the two sides of any marker are left out.
+        """
+        if entity_id == other_entity_id:
+            raise ValueError("An entity cannot be marked as distinct from itself.")
+        first, second = sorted((entity_id, other_entity_id))
+        self.session.execute(
+            insert(IdentityCollision).on_conflict_do_nothing(),
+            {"entity_type": self.entity_type, "entity_id": first, "other_entity_id": second, "note": note},
+        )
+        collisions = self._load_collisions()
+        collisions.setdefault(first, set()).add(second)
+        collisions.setdefault(second, set()).add(first)
+
+        roots = self.canonical_ids([first, second])
+        if roots[first] == roots[second]:
+            self._rebuild(self.members(first))
+            roots = self.canonical_ids([first, second])
+        return roots[entity_id], roots[other_entity_id]
+
+    def _rebuild(self, members: set[int]) -> None:
+        links = []
+        ordered = sorted(members)
+        for start in range(0, len(ordered), _LOOKUP_CHUNK_SIZE):
+            links.extend(
+                self.session.execute(
+                    select(EntityLink.id, EntityLink.entity_id, EntityLink.other_entity_id)
+                    .where(EntityLink.entity_type == self.entity_type)
+                    .where(EntityLink.entity_id.in_(ordered[start : start + _LOOKUP_CHUNK_SIZE]))
+                ).all()
+            )
+        collisions = self._load_collisions()
+        parents = {member: member for member in members}
+        clusters = {member: {member} for member in members}
+
+        def find(node: int) -> int:
+            while parents[node] != node:
+                parents[node] = node = parents[parents[node]]
+            return node
+
+        for _, first, second in sorted(links):
+            if second not in members:
+                continue
+            root, other_root = sorted((find(first), find(second)))
+            if root == other_root:
+                continue
+            if any(collisions.get(member, set()) & clusters[other_root] for member in clusters[root]):
+                continue
+            parents[other_root] = root
+            clusters[root] |= clusters.pop(other_root)
+        self._set_parents({member: find(member) for member in members})
+
+    def _check_collisions(self, root: int, other_root: int) -> None:
+        collisions = self._load_collisions()
+        if not collisions:
+            return
+        members = self.members(root)
+        if not any(member in collisions for member in members):
+            return
+        other_members = self.members(other_root)
+        for member in members:
+            distinct = collisions.get(member, set()) & other_members
+            if distinct:
+                raise IdentityCollisionError(
+                    f"{self.entity_type.capitalize()} {member} is marked as distinct from {min(distinct)}; "
+                    f"clusters {root} and {other_root} cannot be merged."
+                )
+
+    def _load_collisions(self) -> dict[int, set[int]]:
+        # Markers are set by hand, so there are few enough to keep in memory.
+        if self._collisions is None:
+            self._collisions = {}
+            for first, second in self.session.execute(
+                select(IdentityCollision.entity_id, IdentityCollision.other_entity_id).where(
+                    IdentityCollision.entity_type == self.entity_type
+                )
+            ):
+                self._collisions.setdefault(first, set()).add(second)
+                self._collisions.setdefault(second, set()).add(first)
+        return self._collisions
+
+    def _parents(self, entity_ids: list[int]) -> dict[int, int]:
+        parents = {}
+        for start in range(0, len(entity_ids), _LOOKUP_CHUNK_SIZE):
+            parents.update(
+                self.session.execute(
+                    select(EntityCluster.entity_id, EntityCluster.parent_id)
+                    .where(EntityCluster.entity_type == self.entity_type)
+                    .where(EntityCluster.entity_id.in_(entity_ids[start : start + _LOOKUP_CHUNK_SIZE]))
+                ).all()
+            )
+        return parents
+
+    def _set_parents(self, parents: dict[int, int]) -> None:
+        if not parents:
+            return
+        statement = insert(EntityCluster)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[EntityCluster.entity_type, EntityCluster.entity_id],
+                set_={"parent_id": statement.excluded.parent_id},
+            ),
+            [
+                {"entity_type": self.entity_type, "entity_id": entity_id, "parent_id": parent}
+                for entity_id, parent in parents.items()
+            ],
+        )
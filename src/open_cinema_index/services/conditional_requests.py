@@ -0,0 +1,104 @@
+from collections.abc import Iterable
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from open_cinema_index.models import DataSource, HttpCacheValidator
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK_SIZE = 500
+
+
+class ConditionalRequestCache:
+    """
+    ETag / Last-Modified validators for one data source, keyed by resource URL.
+
+    Validators for a batch of URLs are loaded with a few indexed ``IN`` queries
+    up front (``prime``); URLs discovered later in a run fall back to a point
+    lookup. New validators are buffered and written with one bulk upsert per
+    ``flush``, so conditional requests add no per-request database writes.
+    """
+
+    def __init__(self, session, data_source: DataSource):
+        self.session = session
+        self.data_source = data_source
+        self._validators: dict[str, tuple[str | None, str | None]] = {}
+        self._pending: dict[str, tuple[str | None, str | None]] = {}
+        self._checked: set[str] = set()
+
+    def prime(self, urls: Iterable[str]) -> None:
+        missing = [url for url in dict.fromkeys(urls) if url not in self._validators]
+        for start in range(0, len(missing), _LOOKUP_CHUNK_SIZE):
+            chunk = missing[start : start + _LOOKUP_CHUNK_SIZE]
+            self._validators.update(dict.fromkeys(chunk, (None, None)))
+            rows = self.session.execute(
+                select(HttpCacheValidator.url, HttpCacheValidator.etag, HttpCacheValidator.last_modified)
+                .where(HttpCacheValidator.data_source_id == self.data_source.id)
+                .where(HttpCacheValidator.url.in_(chunk))
+            )
+            for url, etag, last_modified in rows:
+                self._validators[url] = (etag, last_modified)
+
+    def request_headers(self, url: str) -> dict[str, str]:
+        """Conditional headers for ``url``, empty if nothing is stored for it."""
+        if url not in self._validators:
+            self.prime([url])
+        etag, last_modified = self._validators[url]
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def record_response(self, url: str, status: int, headers: dict[str, str]) -> None:
+        """Remember validators from a 200 response, or note that a 304 revalidated the stored ones."""
+        if status == 304:
+            self._checked.add(url)
+            return
+        etag, last_modified = headers.get("etag"), headers.get("last-modified")
+        if etag or last_modified:
+            self._validators[url] = (etag, last_modified)
+            self._pending[url] = (etag, last_modified)
+
+    def flush(self) -> None:
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "data_source_id": self.data_source.id,
+                "url": url,
+                "etag": etag,
+                "last_modified": last_modified,
+                "checked_at": now,
+            }
+            for url, (etag, last_modified) in self._pending.items()
+        ]
+        if rows:
+            statement = insert(HttpCacheValidator)
+            self.session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["data_source_id", "url"],
+                    set_={
+                        "etag": statement.excluded.etag,
+                        "last_modified": statement.excluded.last_modified,
+                        "checked_at": statement.excluded.checked_at,
+                    },
+                ),
+                rows,
+            )
+        checked = sorted(self._checked - self._pending.keys())
+        for start in range(0, len(checked), _LOOKUP_CHUNK_SIZE):
+            self.session.execute(
+                HttpCacheValidator.__table__.update()
+                .where(HttpCacheValidator.data_source_id == self.data_source.id)
+                .where(HttpCacheValidator.url.in_(checked[start : start + _LOOKUP_CHUNK_SIZE]))
+                .values(checked_at=now)
+            )
+        self._pending.clear()
+        self._checked.clear()
+
+
+def supports_conditional_requests(data_source: DataSource) -> bool:
+    policy = data_source.refresh_policy
+    return bool(policy and policy.supports_etags)
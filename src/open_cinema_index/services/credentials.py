@@ -0,0 +1,124 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from open_cinema_index.models import DataSource, DataSourceCredential
+from open_cinema_index.services.rate_limits import RateLimiter, RateLimiterRegistry
+
+logger = logging.getLogger(__name__)
+
+# Responses that reject the credential rather than the request.
+AUTH_ERROR_STATUSES = frozenset({401, 403})
+
+
+@dataclass
+class _PoolMember:
+    credential: DataSourceCredential | None
+    limiter: RateLimiter
+    benched_until: float = 0.0
+    last_used: int = 0
+
+
+class CredentialPool:
+    """
+    Spreads a run's requests across every usable credential of a data source.
+
+    Rate limits are enforced per credential: each one draws from its own
+    buckets (see ``RateLimiterRegistry.for_source``), so every credential
+    added to a source adds a full quota. ``acquire`` picks the credential
+    that can send soonest, preferring the least recently used one on ties,
+    and waits on its limiter. A source without credentials is a pool of one
+    ``None`` credential on the source's own limiter.
+
+    A credential that hits a ``429`` is paused through its limiter, so
+    requests flow to the other credentials until its deadline. One rejected
+    by the server (``401`` / ``403``) is benched: left out of rotation for
+    ``bench_seconds``.
+    """
+
+    def __init__(
+        self,
+        members: Iterable[tuple[DataSourceCredential | None, RateLimiter]],
+        *,
+        bench_seconds: float = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], object] = asyncio.sleep,
+    ):
+        self.bench_seconds = bench_seconds
+        self._members = [_PoolMember(credential, limiter) for credential, limiter in members]
+        if not self._members:
+            raise ValueError("A credential pool needs at least one member.")
+        self._clock = clock
+        self._sleep = sleep
+        self._uses = itertools.count(1)
+
+    @classmethod
+    def for_source(
+        cls,
+        data_source: DataSource,
+        credentials: Iterable[DataSourceCredential],
+        rate_limiters: RateLimiterRegistry,
+    ) -> "CredentialPool":
+        credentials = list(credentials)
+        if not credentials:
+            return cls([(None, rate_limiters.for_source(data_source))])
+        return cls((credential, rate_limiters.for_source(data_source, credential)) for credential in credentials)
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    @property
+    def credentials(self) -> list[DataSourceCredential | None]:
+        return [member.credential for member in self._members]
+
+    def limiter_for(self, credential: DataSourceCredential | None) -> RateLimiter:
+        return self._member(credential).limiter
+
+    def available(self) -> int:
+        """Number of credentials that are not benched."""
+        now = self._clock()
+        return sum(1 for member in self._members if member.benched_until <= now)
+
+    def delay(self) -> float:
+        """Seconds until some credential could send a request."""
+        now = self._clock()
+        return min(max(member.benched_until - now, member.limiter.delay(), 0.0) for member in self._members)
+
+    async def acquire(self) -> DataSourceCredential | None:
+        """Wait for a free slot on the credential that has one soonest, and return that credential."""
+        while True:
+            now = self._clock()
+            active = [member for member in self._members if member.benched_until <= now]
+            if active:
+                break
+            await self._sleep(min(member.benched_until for member in self._members) - now)
+        # Choosing and booking happen without yielding, so concurrent callers never pick the same slot.
+        member = min(active, key=lambda member: (member.limiter.delay(), member.last_used))
+        member.last_used = next(self._uses)
+        delay = member.limiter.reserve()
+        if delay > 0:
+            await self._sleep(delay)
+        return member.credential
+
+    def pause(self, credential: DataSourceCredential | None, seconds: float) -> None:
+        """Hold requests with ``credential`` for ``seconds``, as asked by the server."""
+        self._member(credential).limiter.pause(seconds)
+
+    def bench(self, credential: DataSourceCredential | None, reason: str, seconds: float | None = None) -> None:
+        """Leave ``credential`` out of rotation for ``seconds`` (default ``bench_seconds``)."""
+        seconds = self.bench_seconds if seconds is None else seconds
+        member = self._member(credential)
+        member.benched_until = max(member.benched_until, self._clock() + seconds)
+        logger.warning("Benching credential %s for %.0fs: %s", _describe(credential), seconds, reason)
+
+    def _member(self, credential: DataSourceCredential | None) -> _PoolMember:
+        return next(member for member in self._members if member.credential is credential)
+
+
+def _describe(credential: DataSourceCredential | None) -> str:
+    if credential is None:
+        return "(none)"
+    return f"{credential.id} ({credential.kind})"
@@ -1,11 +1,32 @@
-from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from sqlalchemy import select
 
 from open_cinema_index.models import (
     DataSource,
     DataSourceCredential,
+    DataSourceCursor,
     DataSourceRun,
 )
+from open_cinema_index.services.credentials import CredentialPool
+from open_cinema_index.services.rate_limits import (
+    RateLimiter,
+    RateLimiterRegistry,
+    RateLimitExceededError,
+    registry_for,
+)
+
+__all__ = [
+    "DataSourceDisabledError",
+    "DataSourceNotConfiguredError",
+    "DataSourceService",
+    "FetchPlan",
+    # Historically raised from this module; it now lives in ``rate_limits``.
+    "RateLimitExceededError",
+    "RunNotResumableError",
+    "cursor_order",
+]
 
 
 class DataSourceNotConfiguredError(Exception):
@@ -16,8 +37,8 @@ class DataSourceDisabledError(Exception):
     """Raised when a requested data source is disabled."""
 
 
-class RateLimitExceededError(Exception):
-    """Raised when a data source rate limit would be exceeded."""
+class RunNotResumableError(Exception):
+    """Raised when a run cannot be resumed: it is unknown, already succeeded or has no checkpoint."""
 
 
 @dataclass
@@ -25,15 +46,34 @@ class FetchPlan:
     """Context for executing a fetch against a data source."""
 
     data_source: DataSource
-    credential: DataSourceCredential | None
+    credential: DataSourceCredential | None  # The preferred credential; requests draw from ``credentials``
     run: DataSourceRun
+    limiter: RateLimiter  # The preferred credential's limiter
+    credentials: CredentialPool
+    # Cursor values reached by this run, per capability; stored only if the run succeeds.
+    cursors: dict[str, str] = field(default_factory=dict)
+
+    def advance_cursor(self, capability: str, value: str) -> None:
+        """Raise the run's high-water mark for ``capability``; lower values are ignored."""
+        current = self.cursors.get(capability)
+        if current is None or cursor_order(value) > cursor_order(current):
+            self.cursors[capability] = value
+
+
+def cursor_order(value: str) -> tuple:
+    """Sort key for cursor values: numeric IDs compare as numbers, timestamps and dates as ISO strings."""
+    try:
+        return (0, float(value), "")
+    except ValueError:
+        return (1, 0.0, value)
 
 
 class DataSourceService:
     """Business logic for preparing and tracking data source fetches."""
 
-    def __init__(self, session):
+    def __init__(self, session, rate_limiters: RateLimiterRegistry | None = None):
         self.session = session
+        self.rate_limiters = rate_limiters or registry_for(session.get_bind())
 
     def prepare_fetch(self, source_name: str) -> FetchPlan:
         """
@@ -41,15 +81,89 @@ class DataSourceService:
 
         Sequence:
         1. Load the source and ensure it's enabled.
-        2. Enforce configured rate limits.
-        3. Select an active credential (if any).
-        4. Record start of run for audit and throttling.
+        2. Pool every active credential (if any), each with its own in-process
+           rate limiter; requests wait on them.
+        3. Record start of run for audit.
         """
         data_source = self._load_data_source(source_name)
-        self._enforce_rate_limits(data_source)
-        credential = self._select_active_credential(data_source)
+        credentials = self._credential_pool(data_source)
         run = self._record_run(data_source, status="started")
-        return FetchPlan(data_source=data_source, credential=credential, run=run)
+        return self._plan(data_source, run, credentials)
+
+    def resume_fetch(self, run_id: int) -> FetchPlan:
+        """
+        Prepare to continue an unfinished run from its checkpoint.
+
+        The run row is reused and set back to ``started``, so its raw data,
+        counters and final status stay in one place.
+        """
+        run = self.session.get(DataSourceRun, run_id)
+        if run is None:
+            raise RunNotResumableError(f"Run {run_id} does not exist.")
+        if run.status == "success":
+            raise RunNotResumableError(f"Run {run_id} already completed successfully.")
+        if run.checkpoint is None:
+            raise RunNotResumableError(f"Run {run_id} has no checkpoint to resume from; start a new run.")
+        data_source = self._load_data_source(run.data_source.name)
+        credentials = self._credential_pool(data_source)
+        run.status = "started"
+        run.error = None
+        run.completed_at = None
+        data_source.last_run_started_at = datetime.now(timezone.utc)
+        self.session.flush()
+        return self._plan(data_source, run, credentials)
+
+    def complete_run(
+        self,
+        plan: FetchPlan,
+        items_fetched: int,
+        error: str | None = None,
+        retry_count: int = 0,
+        backoff_seconds: float = 0.0,
+    ) -> DataSourceRun:
+        """Record the outcome of a fetch run on the run row and its data source."""
+        now = datetime.now(timezone.utc)
+        run = plan.run
+        run.status = "failed" if error else "success"
+        run.error = error
+        run.items_fetched = items_fetched
+        run.retry_count = retry_count
+        run.backoff_seconds = backoff_seconds
+        run.completed_at = now
+
+        data_source = plan.data_source
+        data_source.last_run_started_at = run.started_at
+        data_source.last_run_completed_at = now
+        data_source.last_error = error
+        if not error:
+            run.checkpoint = None
+            self._store_cursors(plan)
+        self.session.flush()
+        return run
+
+    def cursor_value(self, data_source: DataSource, capability: str) -> str | None:
+        """The stored high-water mark for ``capability``, or ``None`` before the first successful run."""
+        return self.session.scalar(
+            select(DataSourceCursor.value)
+            .where(DataSourceCursor.data_source_id == data_source.id)
+            .where(DataSourceCursor.capability == capability)
+        )
+
+    def _store_cursors(self, plan: FetchPlan) -> None:
+        for capability, value in plan.cursors.items():
+            cursor = self.session.scalars(
+                select(DataSourceCursor)
+                .where(DataSourceCursor.data_source_id == plan.data_source.id)
+                .where(DataSourceCursor.capability == capability)
+            ).one_or_none()
+            if cursor is None:
+                cursor = DataSourceCursor(data_source_id=plan.data_source.id, capability=capability, value=value)
+                self.session.add(cursor)
+            elif cursor_order(value) < cursor_order(cursor.value):
+                # Another run got further in the meantime; never move a cursor backwards.
+                continue
+            cursor.value = value
+            cursor.run_id = plan.run.id
 
     def _load_data_source(self, source_name: str) -> DataSource:
         data_source = self.session.query(DataSource).filter_by(name=source_name).one_or_none()
@@ -59,28 +173,25 @@ class DataSourceService:
             raise DataSourceDisabledError(f"Data source '{source_name}' is disabled.")
         return data_source
 
-    def _enforce_rate_limits(self, data_source: DataSource) -> None:
-        now = datetime.now(timezone.utc)
-        for rate_limit in data_source.rate_limits:
-            window_start = now - timedelta(seconds=rate_limit.window_seconds)
-            recent_runs = (
-                self.session.query(DataSourceRun)
-                .filter(DataSourceRun.data_source_id == data_source.id)
-                .filter(DataSourceRun.started_at >= window_start)
-                .count()
-            )
-            if recent_runs >= rate_limit.max_calls:
-                window_label = f"{rate_limit.window_seconds}s window"
-                raise RateLimitExceededError(
-                    f"Rate limit exceeded for '{data_source.name}' ({rate_limit.max_calls} calls per {window_label})."
-                )
-
     @staticmethod
-    def _select_active_credential(data_source: DataSource) -> DataSourceCredential | None:
+    def _active_credentials(data_source: DataSource) -> list[DataSourceCredential]:
+        """Non-expired credentials, the one expiring soonest first."""
         active_credentials = [cred for cred in data_source.credentials if not cred.is_expired]
-        if not active_credentials:
-            return None
-        return sorted(active_credentials, key=lambda cred: cred.expired_at or datetime.max)[0]
+        return sorted(active_credentials, key=lambda cred: cred.expired_at or datetime.max)
+
+    def _credential_pool(self, data_source: DataSource) -> CredentialPool:
+        return CredentialPool.for_source(data_source, self._active_credentials(data_source), self.rate_limiters)
+
+    @staticmethod
+    def _plan(data_source: DataSource, run: DataSourceRun, credentials: CredentialPool) -> FetchPlan:
+        credential = credentials.credentials[0]
+        return FetchPlan(
+            data_source=data_source,
+            credential=credential,
+            run=run,
+            limiter=credentials.limiter_for(credential),
+            credentials=credentials,
+        )
 
     def _record_run(self, data_source: DataSource, status: str, error: str | None = None) -> DataSourceRun:
         run = DataSourceRun(
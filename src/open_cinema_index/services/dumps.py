@@ -0,0 +1,195 @@
+import bz2
+import gzip
+import io
+import logging
+import re
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from open_cinema_index.models import DataSource
+from open_cinema_index.services.data_sources import DataSourceService, FetchPlan
+from open_cinema_index.services.raw_store import RawStore
+
+logger = logging.getLogger(__name__)
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_BZIP2_MAGIC = b"BZh"
+# Matches the record ID near the start of a TMDB export line or a Wikidata entity line without parsing the JSON.
+_RECORD_ID = re.compile(rb'"id"\s*:\s*"?([^",}\s]+)')
+_ID_SEARCH_WINDOW = 512
+
+
+@dataclass
+class DumpRecord:
+    """One line-delimited JSON record; offsets are positions in the uncompressed stream."""
+
+    offset: int
+    end_offset: int
+    payload: bytes
+    record_id: str | None
+
+
+@dataclass
+class DumpSummary:
+    """Outcome counters for a dump import."""
+
+    records: int = 0
+    skipped: int = 0
+    start_offset: int = 0
+    end_offset: int = 0
+
+
+class DumpReader:
+    """
+    Streams records from a gzip, bzip2 or plain line-delimited JSON dump.
+
+    The file is decompressed incrementally through a ``chunk_size`` buffer and
+    split into lines, so memory use is bounded by the buffer and the longest
+    accepted line, not by the size of the dump. Lines longer than
+    ``max_line_bytes`` are skipped without being held in memory.
+
+    Both TMDB's daily ID exports (one JSON object per line) and Wikidata's JSON
+    dumps (one array element per line, wrapped in ``[`` and ``]``) are read as
+    one record per line. Offsets count uncompressed bytes, so an import can be
+    resumed at the ``end_offset`` of the last record it stored.
+    """
+
+    def __init__(self, path: Path, chunk_size: int = 1024 * 1024, max_line_bytes: int = 64 * 1024 * 1024):
+        self.path = Path(path)
+        self.chunk_size = chunk_size
+        self.max_line_bytes = max_line_bytes
+        self.skipped = 0
+
+    def records(self, start_offset: int = 0) -> Iterator[DumpRecord]:
+        with self._open() as stream:
+            if start_offset:
+                # Compressed streams cannot seek; this decompresses and discards up to the offset.
+                stream.seek(start_offset)
+            offset = start_offset
+            pending = b""
+            # Where the oversized line whose start has been dropped began, if any.
+            oversized_at = None
+            while chunk := stream.read(self.chunk_size):
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                for line in lines:
+                    line_offset = offset
+                    offset += len(line) + 1
+                    if oversized_at is not None:
+                        self._skip(oversized_at)
+                        oversized_at = None
+                        continue
+                    payload = line.strip().rstrip(b",")
+                    if payload in (b"", b"[", b"]"):
+                        continue
+                    if len(payload) > self.max_line_bytes:
+                        self._skip(line_offset)
+                        continue
+                    yield DumpRecord(line_offset, offset, payload, _record_id(payload))
+                if len(pending) > self.max_line_bytes:
+                    # Drop the start of an oversized line as it streams past instead of buffering it.
+                    if oversized_at is None:
+                        oversized_at = offset
+                    offset += len(pending)
+                    pending = b""
+            # A last line without a trailing newline.
+            payload = pending.strip().rstrip(b",")
+            if oversized_at is not None:
+                self._skip(oversized_at)
+            elif len(payload) > self.max_line_bytes:
+                self._skip(offset)
+            elif payload not in (b"", b"[", b"]"):
+                yield DumpRecord(offset, offset + len(pending), payload, _record_id(payload))
+
+    def _open(self) -> io.BufferedReader:
+        with self.path.open("rb") as probe:
+            magic = probe.read(3)
+        if magic.startswith(_GZIP_MAGIC):
+            raw = gzip.GzipFile(self.path, "rb")
+        elif magic.startswith(_BZIP2_MAGIC):
+            raw = bz2.BZ2File(self.path, "rb")
+        else:
+            raw = self.path.open("rb", buffering=0)
+        return io.BufferedReader(raw, buffer_size=self.chunk_size)
+
+    def _skip(self, offset: int) -> None:
+        self.skipped += 1
+        logger.warning(
+            "Skipped record at offset %d of %s: longer than %d bytes", offset, self.path, self.max_line_bytes
+        )
+
+
+def _record_id(payload: bytes) -> str | None:
+    match = _RECORD_ID.search(payload, 0, _ID_SEARCH_WINDOW)
+    return match.group(1).decode("utf-8", errors="replace") if match else None
+
+
+def dump_location(data_source: DataSource) -> Path | None:
+    """The dump file of a ``file`` source: its ``base_url`` as a ``file://`` URL or a plain path."""
+    if not data_source.base_url:
+        return None
+    if data_source.base_url.startswith("file://"):
+        return Path(unquote(urlsplit(data_source.base_url).path))
+    return Path(data_source.base_url)
+
+
+def import_dump(
+    service: DataSourceService,
+    plan: FetchPlan,
+    raw_store: RawStore,
+    path: Path,
+    capability: str = "films",
+    start_offset: int = 0,
+    checkpoint_every: int = 10_000,
+    on_checkpoint: Callable[[DumpSummary], None] | None = None,
+    summary: DumpSummary | None = None,
+) -> DumpSummary:
+    """
+    Store every record of a dump as raw data on ``plan``'s run, exactly like fetched API responses.
+
+    Every ``checkpoint_every`` records the raw store is flushed and
+    ``on_checkpoint`` is called with the progress so far; its ``end_offset``
+    is where to resume from (for example, save it and commit the session).
+    If the import fails, the run is marked failed with an error naming the
+    offset to resume from, and ``on_checkpoint`` is called once more, so
+    committing there keeps the failed status along with the records read.
+    A resumed import passes its carried-over counters as ``summary``.
+    """
+    reader = DumpReader(path)
+    summary = summary or DumpSummary(start_offset=start_offset)
+    summary.end_offset = start_offset
+    skipped_before = summary.skipped
+    url = path.resolve().as_uri()
+    checkpoint_offset = start_offset
+
+    def checkpoint() -> None:
+        nonlocal checkpoint_offset
+        raw_store.flush()
+        checkpoint_offset = summary.end_offset
+        summary.skipped = skipped_before + reader.skipped
+        if on_checkpoint is not None:
+            on_checkpoint(summary)
+
+    try:
+        for record in reader.records(start_offset):
+            raw_store.put(capability, record.payload, resource_key=record.record_id, url=url)
+            summary.records += 1
+            summary.end_offset = record.end_offset
+            if summary.records % checkpoint_every == 0:
+                checkpoint()
+        raw_store.flush()
+    except BaseException as exc:
+        # Records read before the failure are kept, so a resumed import starts right after them.
+        resume_offset = summary.end_offset if on_checkpoint is not None else checkpoint_offset
+        summary.skipped = skipped_before + reader.skipped
+        error = f"{exc!r}; resume from offset {resume_offset}"
+        service.complete_run(plan, items_fetched=summary.records, error=error)
+        # The run is marked failed first, so the final checkpoint's commit keeps the status too.
+        if on_checkpoint is not None:
+            checkpoint()
+        raise
+    summary.skipped = skipped_before + reader.skipped
+    service.complete_run(plan, items_fetched=summary.records)
+    return summary
@@ -0,0 +1,425 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from urllib.parse import quote, urlencode
+
+from open_cinema_index.models import DataSource, DataSourceCapability, DataSourceCredential
+from open_cinema_index.services.conditional_requests import ConditionalRequestCache, supports_conditional_requests
+from open_cinema_index.services.credentials import AUTH_ERROR_STATUSES
+from open_cinema_index.services.data_sources import DataSourceService, FetchPlan
+from open_cinema_index.services.http_client import HttpClientRegistry, TransportResponse, default_clients
+from open_cinema_index.services.retries import (
+    RETRYABLE_STATUSES,
+    RetryableError,
+    RetryPolicy,
+    RetryScheduler,
+    parse_retry_after,
+)
+from open_cinema_index.services.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class CapabilityNotConfiguredError(Exception):
+    """Raised when a data source has no usable endpoint for a capability."""
+
+
+@dataclass(frozen=True)
+class FetchRequest:
+    """A single upstream request, relative to the data source's base URL."""
+
+    capability: str
+    path: str
+    params: tuple[tuple[str, str], ...] = ()
+    resource_key: str | None = None
+
+
+@dataclass
+class FetchResponse:
+    """An upstream response paired with the request that produced it; ``url`` omits credentials."""
+
+    request: FetchRequest
+    url: str
+    status: int
+    headers: dict[str, str]
+    body: bytes
+    elapsed: float
+
+
+@dataclass
+class FetchSummary:
+    """Outcome counters for a single fetch run."""
+
+    requested: int = 0
+    fetched: int = 0
+    not_modified: int = 0
+    not_found: int = 0
+    failed: int = 0
+    retried: int = 0
+    backoff_seconds: float = 0.0
+    coalesced: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def build_url(data_source: DataSource, request: FetchRequest, extra_params: Iterable[tuple[str, str]] = ()) -> str:
+    base_url = (data_source.base_url or "").rstrip("/")
+    path = request.path
+    if path and not path.startswith(("/", "?")):
+        path = f"/{path}"
+    params = [*request.params, *extra_params]
+    if not params:
+        return f"{base_url}{path}"
+    separator = "&" if "?" in path else "?"
+    return f"{base_url}{path}{separator}{urlencode(params)}"
+
+
+def credential_auth(credential: DataSourceCredential | None) -> tuple[dict[str, str], list[tuple[str, str]]]:
+    """Return the headers and query parameters that authenticate a request with ``credential``."""
+    if credential is None:
+        return {}, []
+    if credential.kind == "api_key":
+        return {}, [("api_key", credential.token)]
+    if credential.kind == "oauth":
+        return {"Authorization": f"Bearer {credential.token}"}, []
+    if credential.kind == "x-auth-token":
+        return {"X-Auth-Token": credential.token}, []
+    return {}, []
+
+
+def capability_request(
+    data_source: DataSource,
+    capability: str,
+    params: Iterable[tuple[str, str]] = (),
+    resource_key: str | None = None,
+    **path_values: str,
+) -> FetchRequest:
+    """Build a request from a capability's ``endpoint_path`` template, e.g. ``/movie/{id}``."""
+    endpoint_path = _endpoint_path(data_source, capability)
+    quoted = {name: quote(str(value), safe="") for name, value in path_values.items()}
+    return FetchRequest(
+        capability=capability,
+        path=endpoint_path.format(**quoted),
+        params=tuple(params),
+        resource_key=resource_key,
+    )
+
+
+def requests_for_ids(
+    data_source: DataSource,
+    capability: str,
+    ids: Iterable[str],
+    params: Iterable[tuple[str, str]] = (),
+) -> list[FetchRequest]:
+    """Expand a capability's ``endpoint_path`` template into one request per resource id."""
+    params = tuple(params)
+    return [
+        capability_request(data_source, capability, params, resource_key=str(resource_id), id=resource_id)
+        for resource_id in ids
+    ]
+
+
+def chain_expanders(
+    *expanders: Callable[[FetchResponse], Iterable[FetchRequest]],
+) -> Callable[[FetchResponse], list[FetchRequest]]:
+    """Combine ``expand`` hooks; each one returns no follow-ups for responses it does not own."""
+
+    def expand(response: FetchResponse) -> list[FetchRequest]:
+        return [request for expander in expanders for request in expander(response)]
+
+    return expand
+
+
+def _endpoint_path(data_source: DataSource, capability: str) -> str:
+    configured: DataSourceCapability | None = next(
+        (cap for cap in data_source.capabilities if cap.capability == capability), None
+    )
+    if configured is None or configured.endpoint_path is None:
+        raise CapabilityNotConfiguredError(
+            f"Data source '{data_source.name}' has no endpoint configured for capability '{capability}'."
+        )
+    return configured.endpoint_path
+
+
+class FetchEngine:
+    """
+    Runs many requests against one data source concurrently.
+
+    Requests are pulled from a shared queue by ``concurrency`` worker tasks and
+    sent through the source's long-lived pooled HTTP client unless another
+    ``transport`` is given. Every request first waits on the rate limiter of
+    one of the source's credentials, so throughput is bounded only by the configured rate limits and
+    not by request/response round trips. Successful responses are handed to
+    ``sink``; ``expand`` may return follow-up requests (pagination, update
+    feeds) which are queued on the same run. ``404 Not Found`` responses are
+    not handed to ``sink``; their requests are listed in
+    ``not_found_requests`` so callers can forget records removed upstream.
+
+    For sources whose refresh policy ``supports_etags``, requests carry the
+    stored ``If-None-Match`` / ``If-Modified-Since`` validators. A
+    ``304 Not Modified`` ends the record's journey right there: it is neither
+    handed to ``sink`` nor expanded, so nothing downstream re-processes it.
+    Its request is listed in ``not_modified_requests``, so callers can still
+    note that the record was checked.
+
+    Network failures, ``429`` and transient ``5xx`` responses are retried
+    according to ``retry_policy`` (by default the source's rate-limit rows).
+    A failed request is parked in a ``RetryScheduler`` until its
+    ``Retry-After`` or backoff delay has passed, and its worker moves on to
+    other requests meanwhile. A ``429``, or any response carrying
+    ``Retry-After``, also pauses the credential it was sent with until the
+    server's deadline; the retry goes out sooner if another credential of
+    the plan's ``CredentialPool`` is free. A credential rejected with ``401``
+    or ``403`` is benched while the pool has others.
+
+    Requests for the same URL share one upstream call through ``single_flight``:
+    a request issued while an identical one is in flight waits for its
+    response, and a ``200`` or ``404`` is reused for a short TTL. Only the
+    call that goes upstream waits on a rate limiter. Each request is still
+    handed to ``sink`` and ``expand``. Pass one ``SingleFlight`` to several
+    engines to share calls between them.
+
+    Every ``checkpoint_every`` completed requests or ``checkpoint_interval``
+    seconds, and once more if the run fails, ``checkpoint`` is called with the
+    requests that have not completed yet and those that failed, so the run can
+    be resumed later (see ``open_cinema_index.services.checkpoints``). A
+    resumed run passes its carried-over counters as ``summary``.
+    """
+
+    def __init__(
+        self,
+        service: DataSourceService,
+        plan: FetchPlan,
+        *,
+        transport=None,
+        clients: HttpClientRegistry | None = None,
+        concurrency: int = 16,
+        sink: Callable[[FetchResponse], None] | None = None,
+        expand: Callable[[FetchResponse], Iterable[FetchRequest]] | None = None,
+        retry_policy: RetryPolicy | None = None,
+        single_flight: SingleFlight | None = None,
+        summary: FetchSummary | None = None,
+        checkpoint: Callable[[list[FetchRequest], list[FetchRequest], FetchSummary], None] | None = None,
+        checkpoint_every: int = 500,
+        checkpoint_interval: float = 60.0,
+    ):
+        self.service = service
+        self.plan = plan
+        self.concurrency = concurrency
+        self.transport = transport or (clients or default_clients).client_for(plan.data_source, pool_size=concurrency)
+        self.sink = sink
+        self.expand = expand
+        self.retry_policy = retry_policy or RetryPolicy.for_data_source(plan.data_source)
+        self.single_flight = single_flight or SingleFlight(cacheable=_reusable)
+        self.summary = summary or FetchSummary()
+        self.checkpoint = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_interval = checkpoint_interval
+        self.conditional = None
+        if supports_conditional_requests(plan.data_source):
+            self.conditional = ConditionalRequestCache(service.session, plan.data_source)
+
+        self._headers = {"Accept": "application/json"}
+        # Requests queued or in flight, and requests that failed: what a resumed run still has to do.
+        self._pending: Counter[FetchRequest] = Counter()
+        self._failed: list[FetchRequest] = []
+        self._not_found: list[FetchRequest] = []
+        self._not_modified: list[FetchRequest] = []
+        self._attempts: dict[FetchRequest, int] = {}
+        self._completed_since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+
+    async def run(self, requests: Iterable[FetchRequest]) -> FetchSummary:
+        requests = list(requests)
+        if self.conditional is not None:
+            self.conditional.prime(build_url(self.plan.data_source, request) for request in requests)
+        queue: asyncio.Queue[FetchRequest] = asyncio.Queue()
+        for request in requests:
+            self._enqueue(queue, request)
+
+        retries = RetryScheduler(lambda request: self._release(queue, request))
+        workers = [asyncio.create_task(self._worker(queue, retries)) for _ in range(self.concurrency)]
+        workers.append(asyncio.create_task(retries.run()))
+        error: str | None = None
+        try:
+            await queue.join()
+        except BaseException as exc:
+            error = repr(exc)
+            raise
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if error is None and self.summary.failed:
+                error = f"{self.summary.failed} of {self.summary.requested} requests failed; first error: "
+                error += self.summary.errors[0]
+            if self.conditional is not None:
+                self.conditional.flush()
+            if error is not None:
+                self._take_checkpoint()
+            self.service.complete_run(
+                self.plan,
+                items_fetched=self.summary.fetched,
+                error=error,
+                retry_count=self.summary.retried,
+                backoff_seconds=self.summary.backoff_seconds,
+            )
+        return self.summary
+
+    @property
+    def failed_requests(self) -> list[FetchRequest]:
+        """Requests that failed for good, after their retries."""
+        return list(self._failed)
+
+    @property
+    def not_found_requests(self) -> list[FetchRequest]:
+        """Requests answered with ``404 Not Found``."""
+        return list(self._not_found)
+
+    @property
+    def not_modified_requests(self) -> list[FetchRequest]:
+        """Requests answered with ``304 Not Modified``."""
+        return list(self._not_modified)
+
+    async def _worker(self, queue: asyncio.Queue, retries: RetryScheduler[FetchRequest]) -> None:
+        while True:
+            request = await queue.get()
+            parked = False
+            try:
+                try:
+                    follow_ups = await self._fetch(request)
+                except RetryableError as exc:
+                    parked = self._retry_later(retries, request, exc)
+                    follow_ups = ()
+                if not parked:
+                    self._attempts.pop(request, None)
+                    for follow_up in follow_ups:
+                        self._enqueue(queue, follow_up)
+                    self._complete(request)
+            finally:
+                # A parked request stays unfinished until the scheduler puts it back on the queue.
+                if not parked:
+                    queue.task_done()
+
+    def _release(self, queue: asyncio.Queue, request: FetchRequest) -> None:
+        queue.put_nowait(request)
+        queue.task_done()
+
+    def _retry_later(self, retries: RetryScheduler[FetchRequest], request: FetchRequest, error: RetryableError) -> bool:
+        attempt = self._attempts.get(request, 0) + 1
+        delay = error.retry_after if error.retry_after is not None else self.retry_policy.backoff(attempt)
+        # A longer wait than ``max_delay`` is cut short rather than given up on; the retry still uses up an attempt.
+        delay = min(delay, self.retry_policy.max_delay)
+        if error.pause:
+            # The server's deadline holds for every request with this credential, even if this one gives up.
+            self.plan.credentials.pause(error.credential, delay)
+            # Another credential of the pool may be free to send the retry sooner.
+            delay = min(delay, self.plan.credentials.delay())
+        if attempt > self.retry_policy.max_retries:
+            self._attempts.pop(request, None)
+            self._record_failure(request, f"{error} after {attempt - 1} retries")
+            return False
+        self._attempts[request] = attempt
+        self.summary.retried += 1
+        self.summary.backoff_seconds += delay
+        retries.schedule(request, delay)
+        logger.info("Retrying %s %s in %.1fs (attempt %d): %s", request.capability, request.path, delay, attempt, error)
+        return True
+
+    def _enqueue(self, queue: asyncio.Queue, request: FetchRequest) -> None:
+        self._pending[request] += 1
+        queue.put_nowait(request)
+
+    def _complete(self, request: FetchRequest) -> None:
+        self._pending[request] -= 1
+        if not self._pending[request]:
+            del self._pending[request]
+        if self.checkpoint is None:
+            return
+        self._completed_since_checkpoint += 1
+        if (
+            self._completed_since_checkpoint >= self.checkpoint_every
+            or time.monotonic() - self._last_checkpoint >= self.checkpoint_interval
+        ):
+            if self.conditional is not None:
+                self.conditional.flush()
+            self._take_checkpoint()
+
+    def _take_checkpoint(self) -> None:
+        if self.checkpoint is None:
+            return
+        self.checkpoint(list(self._pending.elements()), list(self._failed), self.summary)
+        self._completed_since_checkpoint = 0
+        self._last_checkpoint = time.monotonic()
+
+    async def _fetch(self, request: FetchRequest) -> Iterable[FetchRequest]:
+        if request not in self._attempts:
+            self.summary.requested += 1
+        url = build_url(self.plan.data_source, request)
+        headers = self._headers
+        if self.conditional is not None:
+            headers = {**headers, **self.conditional.request_headers(url)}
+        started = time.perf_counter()
+        try:
+            (raw, credential), shared = await self.single_flight.run(url, lambda: self._send(request, headers))
+        except Exception as exc:  # network failures are retried, then recorded on the run
+            raise RetryableError(repr(exc)) from exc
+        if shared:
+            self.summary.coalesced += 1
+        response = FetchResponse(
+            request=request,
+            url=url,
+            status=raw.status,
+            headers=raw.headers,
+            body=raw.body,
+            elapsed=time.perf_counter() - started,
+        )
+        if self.conditional is not None and response.status in (200, 304):
+            self.conditional.record_response(url, response.status, response.headers)
+        if response.status == 304:
+            self.summary.not_modified += 1
+            self._not_modified.append(request)
+            return ()
+        if response.status == 404:
+            self.summary.not_found += 1
+            self._not_found.append(request)
+            return ()
+        if response.status in RETRYABLE_STATUSES:
+            retry_after = parse_retry_after(response.headers.get("retry-after"))
+            pause = response.status == 429 or retry_after is not None
+            raise RetryableError(f"HTTP {response.status}", retry_after=retry_after, pause=pause, credential=credential)
+        if response.status in AUTH_ERROR_STATUSES and len(self.plan.credentials) > 1:
+            self.plan.credentials.bench(credential, f"HTTP {response.status}")
+            if self.plan.credentials.available():
+                # Another credential may be accepted, so retry with it straight away.
+                raise RetryableError(f"HTTP {response.status}", retry_after=0.0)
+        if response.status >= 400:
+            self._record_failure(request, f"HTTP {response.status}")
+            return ()
+
+        self.summary.fetched += 1
+        if self.sink is not None:
+            self.sink(response)
+        if self.expand is not None:
+            return self.expand(response)
+        return ()
+
+    async def _send(
+        self, request: FetchRequest, headers: dict[str, str]
+    ) -> tuple[TransportResponse, DataSourceCredential | None]:
+        credential = await self.plan.credentials.acquire()
+        auth_headers, auth_params = credential_auth(credential)
+        url = build_url(self.plan.data_source, request, auth_params)
+        return await self.transport.get(url, {**headers, **auth_headers}), credential
+
+    def _record_failure(self, request: FetchRequest, message: str) -> None:
+        self._failed.append(request)
+        self.summary.failed += 1
+        self.summary.errors.append(f"{request.capability} {request.path}: {message}")
+        logger.warning("Fetch failed for %s %s: %s", request.capability, request.path, message)
+
+
+def _reusable(sent: tuple[TransportResponse, DataSourceCredential | None]) -> bool:
+    return sent[0].status in (200, 404)
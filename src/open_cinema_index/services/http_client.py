@@ -0,0 +1,221 @@
+import asyncio
+import http.client
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from open_cinema_index.models import DataSource
+
+# Errors that mean an idle keep-alive connection was closed by the server before we reused it.
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+@dataclass
+class TransportResponse:
+    """A decoded response; header names are lower-cased."""
+
+    status: int
+    headers: dict[str, str]
+    body: bytes
+
+
+@dataclass
+class HttpClientStats:
+    """Connection pool and latency counters for one client."""
+
+    requests: int = 0
+    pool_hits: int = 0
+    pool_misses: int = 0
+    total_latency: float = 0.0
+    max_latency: float = 0.0
+    recent_latencies: deque = field(default_factory=lambda: deque(maxlen=1024))
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.requests if self.requests else 0.0
+
+    def latency_percentile(self, percentile: float) -> float:
+        """Latency percentile (0-100) over the most recent requests."""
+        if not self.recent_latencies:
+            return 0.0
+        ordered = sorted(self.recent_latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100))
+        return ordered[index]
+
+
+class PooledHttpClient:
+    """
+    Long-lived HTTP/1.1 client for one origin with a pool of keep-alive connections.
+
+    Requests run on a thread pool of ``pool_size`` threads, each borrowing an
+    idle connection when one is available (a pool hit) or opening a new one (a
+    miss). Connections go back to the pool unless the server asked to close
+    them, so a steady fetch pays for TCP and TLS handshakes only once per
+    connection. Responses are transparently decoded from gzip or deflate.
+    """
+
+    def __init__(self, base_url: str, user_agent: str | None = None, pool_size: int = 16, timeout: float = 30.0):
+        origin = urlsplit(base_url)
+        if origin.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme for '{base_url}'.")
+        self.scheme = origin.scheme
+        self.netloc = origin.netloc
+        self.user_agent = user_agent
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.stats = HttpClientStats()
+        self._idle: list[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="oci-http")
+
+    async def get(self, url: str, headers: dict[str, str]) -> TransportResponse:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.get_sync, url, headers)
+
+    def get_sync(self, url: str, headers: dict[str, str]) -> TransportResponse:
+        target = urlsplit(url)
+        if target.netloc != self.netloc:
+            raise ValueError(f"{url} is not served by this client ({self.netloc}).")
+        path = target.path or "/"
+        if target.query:
+            path = f"{path}?{target.query}"
+        request_headers = {"Accept-Encoding": "gzip, deflate", **headers}
+        if self.user_agent:
+            request_headers.setdefault("User-Agent", self.user_agent)
+
+        started = time.perf_counter()
+        connection, reused = self._checkout()
+        try:
+            try:
+                response = self._send(connection, path, request_headers)
+            except _STALE_CONNECTION_ERRORS:
+                if not reused:
+                    raise
+                connection.close()
+                connection, reused = self._connect(), False
+                response = self._send(connection, path, request_headers)
+            body = response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._checkin(connection)
+        response_headers = {name.lower(): value for name, value in response.getheaders()}
+        body = _decode(body, response_headers)
+        self._record(time.perf_counter() - started, reused)
+        return TransportResponse(response.status, response_headers, body)
+
+    def grow(self, pool_size: int) -> None:
+        """Allow ``pool_size`` concurrent requests if that is more than now; the pool never shrinks."""
+        with self._lock:
+            if pool_size <= self.pool_size:
+                return
+            self.pool_size = pool_size
+            executor = self._executor
+            self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="oci-http")
+        # Requests already running finish on the old threads and return their connections to the shared pool.
+        executor.shutdown(wait=False)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def _send(self, connection: http.client.HTTPConnection, path: str, headers: dict[str, str]):
+        connection.request("GET", path, headers=headers)
+        return connection.getresponse()
+
+    def _checkout(self) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._connect(), False
+
+    def _checkin(self, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def _record(self, latency: float, reused: bool) -> None:
+        with self._lock:
+            stats = self.stats
+            stats.requests += 1
+            if reused:
+                stats.pool_hits += 1
+            else:
+                stats.pool_misses += 1
+            stats.total_latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+            stats.recent_latencies.append(latency)
+
+
+def _decode(body: bytes, headers: dict[str, str]) -> bytes:
+    encoding = headers.get("content-encoding", "").strip().lower()
+    if encoding == "gzip":
+        body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+    elif encoding == "deflate":
+        try:
+            body = zlib.decompress(body)
+        except zlib.error:
+            # Some servers send raw deflate streams without the zlib wrapper.
+            body = zlib.decompress(body, -zlib.MAX_WBITS)
+    else:
+        return body
+    del headers["content-encoding"]
+    return body
+
+
+class HttpClientRegistry:
+    """
+    Process-wide pooled clients, one per ``(base_url, user_agent)``.
+
+    A caller asking for a larger ``pool_size`` than the cached client has
+    grows that client's pool; a smaller one shares the larger pool.
+    """
+
+    def __init__(self, pool_size: int = 16, timeout: float = 30.0):
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._clients: dict[tuple[str, str | None], PooledHttpClient] = {}
+        self._lock = threading.Lock()
+
+    def client_for(self, data_source: DataSource, pool_size: int | None = None) -> PooledHttpClient:
+        key = (data_source.base_url, data_source.user_agent)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = PooledHttpClient(
+                    data_source.base_url,
+                    user_agent=data_source.user_agent,
+                    pool_size=pool_size or self.pool_size,
+                    timeout=self.timeout,
+                )
+                self._clients[key] = client
+            elif pool_size:
+                client.grow(pool_size)
+            return client
+
+    def close(self) -> None:
+        with self._lock:
+            clients, self._clients = self._clients, {}
+        for client in clients.values():
+            client.close()
+
+
+default_clients = HttpClientRegistry()
@@ -0,0 +1,186 @@
+import json
+import re
+from collections.abc import Callable
+from typing import Any
+
+from open_cinema_index.models import DataSourceCapability
+
+# One dotted path segment: a key, optionally followed by list indexes (``[0]``) or fan-outs (``[]``).
+_SEGMENT = re.compile(r"([^.\[\]]*)((?:\[\d*\])*)")
+_BRACKETS = re.compile(r"\[(\d*)\]")
+
+# Marks a fan-out step in a parsed path.
+_EACH = object()
+
+Getter = Callable[[Any], Any]
+
+# Mapping key naming the list of records inside a payload, rather than an OCI field.
+RECORDS_KEY = "records"
+
+
+class InvalidPayloadMappingError(Exception):
+    """Raised when a capability's ``payload_mapping`` is not a JSON object of field paths."""
+
+
+def parse_path(path: str) -> list[str | int | object]:
+    """
+    Split a field path into steps: dict keys, list indexes and fan-outs.
+
+    ``genres[].name`` reads ``name`` from every item of ``genres``;
+    ``results[0].title`` reads the first item only.
+    """
+    steps: list[str | int | object] = []
+    for segment in path.split("."):
+        match = _SEGMENT.fullmatch(segment)
+        if match is None or not any(match.groups()):
+            raise InvalidPayloadMappingError(f"Invalid path {path!r}: bad segment {segment!r}.")
+        if match.group(1):
+            steps.append(match.group(1))
+        for index in _BRACKETS.findall(match.group(2)):
+            steps.append(int(index) if index else _EACH)
+    return steps
+
+
+def compile_path(path: str) -> Getter:
+    """
+    Build a getter for ``path``.
+
+    A path without fan-out returns the value or ``None`` when any step is
+    missing. A path with ``[]`` returns a flat list of the values found under
+    every item, skipping missing ones.
+    """
+    return _compile_steps(parse_path(path))
+
+
+def _compile_steps(steps: list) -> Getter:
+    if _EACH not in steps:
+        return _lookup(tuple(steps))
+    split = steps.index(_EACH)
+    head = _lookup(tuple(steps[:split]))
+    rest = steps[split + 1 :]
+    fans_out = _EACH in rest
+    tail = _compile_steps(rest) if rest else None
+
+    def fan_out(document: Any) -> list:
+        items = head(document)
+        if not isinstance(items, list):
+            return []
+        if tail is None:
+            return [item for item in items if item is not None]
+        values = []
+        for item in items:
+            value = tail(item)
+            if fans_out:
+                values.extend(value)
+            elif value is not None:
+                values.append(value)
+        return values
+
+    return fan_out
+
+
+def _lookup(steps: tuple) -> Getter:
+    if not steps:
+        return lambda document: document
+    if len(steps) == 1 and isinstance(steps[0], str):
+        key = steps[0]
+        # The common flat mapping: one dict lookup per field.
+        return lambda document: document.get(key) if isinstance(document, dict) else None
+
+    def lookup(document: Any) -> Any:
+        for step in steps:
+            try:
+                document = document[step]
+            except (KeyError, IndexError, TypeError):
+                return None
+        return document
+
+    return lookup
+
+
+class PayloadExtractor:
+    """
+    A compiled ``payload_mapping``: calling it with a decoded response returns the mapped OCI fields.
+
+    Paths are parsed once, when the extractor is built; extracting a record
+    is a fixed sequence of dict and list lookups per field. A ``records``
+    path splits payloads holding several records (e.g. SPARQL result
+    bindings) into one document per record; field paths are then relative
+    to each record.
+    """
+
+    def __init__(self, mapping: dict[str, str]):
+        self.mapping = dict(mapping)
+        records_path = self.mapping.get(RECORDS_KEY)
+        self._records = compile_path(records_path) if records_path is not None else None
+        self._getters = tuple(
+            (field, compile_path(path)) for field, path in self.mapping.items() if field != RECORDS_KEY
+        )
+
+    @classmethod
+    def from_json(cls, text: str) -> "PayloadExtractor":
+        try:
+            mapping = json.loads(text)
+        except json.JSONDecodeError as exc:
+            raise InvalidPayloadMappingError(f"payload_mapping is not valid JSON: {exc}") from exc
+        if not isinstance(mapping, dict) or not all(isinstance(path, str) for path in mapping.values()):
+            raise InvalidPayloadMappingError("payload_mapping must be a JSON object of field paths.")
+        return cls(mapping)
+
+    @property
+    def fields(self) -> list[str]:
+        return [field for field, _ in self._getters]
+
+    @property
+    def splits_records(self) -> bool:
+        return self._records is not None
+
+    def records(self, payload: Any) -> list:
+        """The record documents in a decoded payload: the payload itself unless the mapping has ``records``."""
+        if self._records is None:
+            return [payload]
+        records = self._records(payload)
+        if isinstance(records, list):
+            return records
+        return [] if records is None else [records]
+
+    def __call__(self, document: Any) -> dict[str, Any]:
+        return {field: get(document) for field, get in self._getters}
+
+
+class ExtractorCache:
+    """
+    Compiled extractors per capability row.
+
+    Each entry remembers the mapping text it was compiled from. A capability
+    whose ``payload_mapping`` changed since, in this session or in the
+    database, is recompiled on its next lookup; unchanged ones cost one
+    dict lookup and one string comparison.
+    """
+
+    def __init__(self):
+        self._compiled: dict[int, tuple[str, PayloadExtractor]] = {}
+
+    def extractor_for(self, capability: DataSourceCapability) -> PayloadExtractor | None:
+        """The capability's compiled extractor, or ``None`` if it has no mapping."""
+        text = capability.payload_mapping
+        if not text:
+            self._compiled.pop(capability.id, None)
+            return None
+        cached = self._compiled.get(capability.id)
+        if cached is not None and cached[0] == text:
+            return cached[1]
+        extractor = PayloadExtractor.from_json(text)
+        self._compiled[capability.id] = (text, extractor)
+        return extractor
+
+    def invalidate(self, capability_id: int | None = None) -> None:
+        """Drop one capability's extractor, or all of them."""
+        if capability_id is None:
+            self._compiled.clear()
+        else:
+            self._compiled.pop(capability_id, None)
+
+
+# Process-wide cache for callers that do not manage their own.
+default_extractors = ExtractorCache()
@@ -0,0 +1,459 @@
+import json
+import logging
+import math
+import zlib
+from collections import Counter, deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from dataclasses import field as dataclass_field
+from datetime import date, datetime, timezone
+from typing import Any
+
+from sqlalchemy import bindparam, func, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from open_cinema_index.models import (
+    DataSource,
+    Film,
+    Identifier,
+    MetadataAssertion,
+    RawData,
+    Release,
+    Title,
+)
+from open_cinema_index.services.fetch import CapabilityNotConfiguredError
+from open_cinema_index.services.mappings import ExtractorCache, PayloadExtractor, default_extractors
+from open_cinema_index.services.raw_store import RawStore, decode_payload
+from open_cinema_index.services.validation import BatchValidator, Reject, default_assertion_schemas
+from open_cinema_index.services.vocabulary import Vocabulary, default_vocabulary
+from open_cinema_index.services.wikidata import ENTITY_PREFIX
+
+try:
+    import orjson
+except ImportError:  # optional: pip install open-cinema-index[fast]
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK_SIZE = 500
+
+# Mapped field holding the record's identifier at its source; defaults to the raw row's resource key.
+ID_FIELD = "id"
+# Mapped fields stored on the film anchor, only where it has no value yet.
+FILM_FIELDS = ("kind", "runtime_minutes", "original_language")
+# Mapped fields that become identifiers, by scheme.
+IDENTIFIER_FIELDS = {"imdb_id": "imdb", "tmdb_id": "tmdb", "wikidata_id": "wikidata"}
+# Mapped fields that become metadata assertions, by assertion type; lists give one assertion per item.
+ASSERTION_FIELDS = {"genres": "genre", "keywords": "keyword", "synopsis": "synopsis"}
+
+# Claim tables a source's claims are replaced in when one of its records is normalized again.
+_CLAIM_TABLES = (Title.__table__, Release.__table__, MetadataAssertion.__table__)
+
+
+@dataclass
+class MappedPayloads:
+    """Records mapped from a shard of payloads, as plain tuples that are cheap to send between processes."""
+
+    records: list[tuple[str, tuple]]  # (record key, mapped values in field order, without ``id``)
+    payloads: int = 0
+    skipped: int = 0
+
+
+@dataclass
+class _RawBatch:
+    raw_ids: list[int]
+    # (raw id, resource key, digest, codec, dictionary digest, content); codec and content are None if the blob is gone.
+    items: list[tuple]
+    dictionaries: dict[str, bytes]
+
+
+@dataclass
+class NormalizeSummary:
+    payloads: int = 0
+    records: int = 0
+    films_created: int = 0
+    claims: int = 0
+    skipped: int = 0
+    batches: int = 0
+    # Claims dropped and film fields cleared by validation, and how often each "table.field: reason" occurred.
+    rejected: int = 0
+    rejects: Counter[str] = dataclass_field(default_factory=Counter)
+
+
+class Normalizer:
+    """
+    Turns a source's raw payloads into canonical film rows, one batch at a time.
+
+    Raw rows that are not normalized yet are read ``batch_size`` at a time in
+    id order, with their blobs loaded in a few ``IN`` queries. Each batch
+    flows through three steps:
+
+    1. Payloads are decoded and split into records with the capability's
+       compiled ``payload_mapping`` (see ``open_cinema_index.services.mappings``).
+       When a batch holds several payloads for the same record, the latest wins.
+    2. Records are matched to films through the source's own identifier
+       scheme (``tmdb`` for TMDB); unknown ones get a new film, inserted in
+       bulk.
+    3. Claims are written with bulk ``INSERT ... ON CONFLICT DO NOTHING``
+       against the tables' unique constraints. A record's earlier titles,
+       releases and assertions from the same source are deleted first: the
+       newest payload replaces them, and claims with ``NULL`` columns never
+       pile up (``NULL`` never conflicts in a unique constraint).
+       Languages and genre and keyword labels are put in canonical form
+       through the memoized ``vocabulary``.
+
+    The raw rows are then marked ``normalized_at`` and ``on_batch`` is called,
+    which is where the caller commits. Memory use is bounded by the batch.
+
+    Decoding and mapping (step 1) is pure CPU work. With ``workers`` above
+    one, each batch is split into that many shards of consecutive raw rows,
+    and the shards are mapped in a process pool by ``map_payloads``. Blobs
+    travel still compressed, and records come back as plain tuples. This
+    process stays the only writer: it applies the previous batch while the
+    workers map the next one.
+    """
+
+    def __init__(
+        self,
+        session,
+        data_source: DataSource,
+        *,
+        capability: str = "films",
+        batch_size: int = 1000,
+        workers: int = 1,
+        extractors: ExtractorCache | None = None,
+        vocabulary: Vocabulary | None = None,
+        validator: BatchValidator | None = None,
+    ):
+        configured = next((cap for cap in data_source.capabilities if cap.capability == capability), None)
+        extractor = (extractors or default_extractors).extractor_for(configured) if configured else None
+        if extractor is None:
+            raise CapabilityNotConfiguredError(
+                f"Data source '{data_source.name}' has no payload_mapping for capability '{capability}'."
+            )
+        self.session = session
+        self.data_source = data_source
+        self.capability = capability
+        self.batch_size = batch_size
+        self.workers = workers
+        self.extractor = extractor
+        self.vocabulary = vocabulary or default_vocabulary
+        self.validator = validator or default_assertion_schemas.validator()
+        # Short vocabularies go through the memoized canonical forms; free text such as synopses is only trimmed.
+        self._canonical_values = {"genre": self.vocabulary.genre, "keyword": self.vocabulary.label}
+        self.summary = NormalizeSummary()
+        self._store = RawStore(session, data_source)
+
+    def run(self, on_batch: Callable[[NormalizeSummary], None] | None = None) -> NormalizeSummary:
+        if self.workers <= 1:
+            self._apply(
+                (
+                    (batch, [map_payloads(self.extractor, batch.items, batch.dictionaries)])
+                    for batch in self._raw_batches()
+                ),
+                on_batch,
+            )
+            return self.summary
+        with ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_start_worker, initargs=(self.extractor.mapping,)
+        ) as pool:
+            self._apply(self._map_in_pool(pool), on_batch)
+        return self.summary
+
+    def _apply(
+        self,
+        mapped: Iterable[tuple[_RawBatch, list[MappedPayloads]]],
+        on_batch: Callable[[NormalizeSummary], None] | None,
+    ) -> None:
+        for batch, shards in mapped:
+            records = self._records(shards)
+            if records:
+                self._write(records)
+            self._mark_normalized(batch.raw_ids)
+            self.summary.batches += 1
+            if on_batch is not None:
+                on_batch(self.summary)
+
+    def _map_in_pool(self, pool: ProcessPoolExecutor) -> Iterator[tuple[_RawBatch, list[MappedPayloads]]]:
+        # Workers map the next batch while this process writes the previous one.
+        in_flight: deque[tuple[_RawBatch, list[Future]]] = deque()
+        for batch in self._raw_batches():
+            shard_size = math.ceil(len(batch.items) / self.workers)
+            shards = [batch.items[start : start + shard_size] for start in range(0, len(batch.items), shard_size)]
+            in_flight.append((batch, [pool.submit(_map_in_worker, shard, batch.dictionaries) for shard in shards]))
+            if len(in_flight) > 1:
+                done, futures = in_flight.popleft()
+                yield done, [future.result() for future in futures]
+        while in_flight:
+            done, futures = in_flight.popleft()
+            yield done, [future.result() for future in futures]
+
+    def _raw_batches(self) -> Iterator[_RawBatch]:
+        last_id = 0
+        while True:
+            rows = self.session.execute(
+                select(RawData.id, RawData.resource_key, RawData.blob_digest)
+                .where(RawData.data_source_id == self.data_source.id)
+                .where(RawData.normalized_at.is_(None))
+                .where(RawData.capability == self.capability)
+                .where(RawData.id > last_id)
+                .order_by(RawData.id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            # Blobs stay compressed until they reach whichever process maps them.
+            blobs = self._store.read_blobs(row.blob_digest for row in rows)
+            dictionaries = {digest: self._store.dictionary(digest) for _, digest, _ in blobs.values() if digest}
+            items = [
+                (row.id, row.resource_key, row.blob_digest, *blobs.get(row.blob_digest, (None, None, None)))
+                for row in rows
+            ]
+            yield _RawBatch([row.id for row in rows], items, dictionaries)
+
+    def _records(self, shards: list[MappedPayloads]) -> dict[str, dict[str, Any]]:
+        fields = [field for field in self.extractor.fields if field != ID_FIELD]
+        records: dict[str, dict[str, Any]] = {}
+        # Shards are in raw id order, so a later payload for the same record wins.
+        for shard in shards:
+            self.summary.payloads += shard.payloads
+            self.summary.skipped += shard.skipped
+            for key, values in shard.records:
+                records[key] = dict(zip(fields, values, strict=True))
+        self.summary.records += len(records)
+        return records
+
+    def _write(self, records: dict[str, dict[str, Any]]) -> None:
+        films = self._films(records)
+        film_ids, created = self._film_ids(films)
+        existing = [film_ids[key] for key in records if key not in created]
+        self._fill_films({film_ids[key]: films[key] for key in records if key not in created})
+        for table in _CLAIM_TABLES:
+            for start in range(0, len(existing), _LOOKUP_CHUNK_SIZE):
+                self.session.execute(
+                    table.delete()
+                    .where(table.c.film_id.in_(existing[start : start + _LOOKUP_CHUNK_SIZE]))
+                    .where(table.c.source == self.data_source.name)
+                )
+
+        titles, releases, assertions, identifiers = {}, {}, {}, {}
+        source = self.data_source.name
+        for key, fields in records.items():
+            film_id = film_ids[key]
+            language = films[key]["original_language"]
+            original_title = _text(fields.get("original_title"))
+            if original_title:
+                titles[(film_id, original_title, language, None)] = {"is_original": True}
+            title = _text(fields.get("title"))
+            if title and title != original_title:
+                titles.setdefault((film_id, title, None, None), {"is_original": False})
+            release_date = _date(fields.get("release_date"))
+            if release_date is not None:
+                releases[(film_id, None, None, release_date)] = {}
+            for field, assertion_type in ASSERTION_FIELDS.items():
+                canonical = self._canonical_values.get(assertion_type)
+                for value in _values(fields.get(field)):
+                    if canonical is not None:
+                        value = canonical(value)
+                    assertions[(film_id, assertion_type, value, None)] = {}
+            for field, scheme in IDENTIFIER_FIELDS.items():
+                for value in _values(fields.get(field)):
+                    identifiers[(scheme, _identifier_value(value))] = {"film_id": film_id}
+
+        self._insert(Title.__table__, ("film_id", "title", "language", "region"), titles, source)
+        self._insert(Release.__table__, ("film_id", "release_type", "region", "date"), releases, source)
+        self._insert(MetadataAssertion.__table__, ("film_id", "type", "value", "language"), assertions, source)
+        self._insert(Identifier.__table__, ("scheme", "value"), identifiers, source)
+
+    def _films(self, records: dict[str, dict[str, Any]]) -> dict[str, dict[str, Any]]:
+        """The film anchor's fields per record key; invalid values are cleared, the anchor is kept."""
+        films = {
+            key: {field: self._film_value(field, fields.get(field)) for field in FILM_FIELDS}
+            for key, fields in records.items()
+        }
+        rows = list(films.values())
+        rejects = self.validator.validate("films", rows)
+        for reject in rejects:
+            rows[reject.index][reject.field] = None
+        self._count_rejects("films", rejects, len(rejects))
+        return films
+
+    def _film_ids(self, films: dict[str, dict[str, Any]]) -> tuple[dict[str, int], set[str]]:
+        """Film ids for every record key, creating films for unknown ones; also returns the created keys."""
+        keys = list(films)
+        film_ids: dict[str, int] = {}
+        for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+            film_ids.update(
+                self.session.execute(
+                    select(Identifier.value, Identifier.film_id)
+                    .where(Identifier.scheme == self.data_source.name)
+                    .where(Identifier.source == self.data_source.name)
+                    .where(Identifier.value.in_(keys[start : start + _LOOKUP_CHUNK_SIZE]))
+                ).all()
+            )
+        new_keys = [key for key in keys if key not in film_ids]
+        if new_keys:
+            rows = [films[key] for key in new_keys]
+            created_ids = self.session.scalars(
+                insert(Film.__table__).returning(Film.__table__.c.id, sort_by_parameter_order=True), rows
+            ).all()
+            film_ids.update(zip(new_keys, created_ids, strict=True))
+            self.session.execute(
+                insert(Identifier.__table__),
+                [
+                    {
+                        "film_id": film_ids[key],
+                        "scheme": self.data_source.name,
+                        "value": key,
+                        "source": self.data_source.name,
+                    }
+                    for key in new_keys
+                ],
+            )
+            self.summary.films_created += len(new_keys)
+        return film_ids, set(new_keys)
+
+    def _fill_films(self, records: dict[int, dict[str, Any]]) -> None:
+        rows = []
+        for film_id, fields in records.items():
+            values = {f"new_{field}": fields[field] for field in FILM_FIELDS}
+            if any(value is not None for value in values.values()):
+                rows.append({"film_id": film_id, **values})
+        if not rows:
+            return
+        films = Film.__table__
+        self.session.execute(
+            films.update()
+            .where(films.c.id == bindparam("film_id"))
+            .values({field: func.coalesce(films.c[field], bindparam(f"new_{field}")) for field in FILM_FIELDS}),
+            rows,
+        )
+
+    def _film_value(self, field: str, value: Any) -> Any:
+        if field == "runtime_minutes":
+            try:
+                return int(float(value)) if value not in (None, "") else None
+            except (TypeError, ValueError):
+                return None
+        text = _text(value)
+        if text is not None and field == "original_language":
+            return self.vocabulary.language(text)
+        return text
+
+    def _insert(self, table, key_columns: tuple[str, ...], claims: dict[tuple, dict], source: str) -> None:
+        if not claims:
+            return
+        rows = [
+            {**dict(zip(key_columns, key, strict=True)), **extra, "source": source} for key, extra in claims.items()
+        ]
+        rejects = self.validator.validate(table.name, rows)
+        if rejects:
+            rejected = {reject.index for reject in rejects}
+            self._count_rejects(table.name, rejects, len(rejected))
+            rows = [row for index, row in enumerate(rows) if index not in rejected]
+            if not rows:
+                return
+        self.session.execute(sqlite_insert(table).on_conflict_do_nothing(), rows)
+        self.summary.claims += len(rows)
+
+    def _count_rejects(self, table: str, rejects: list[Reject], rejected: int) -> None:
+        self.summary.rejected += rejected
+        self.summary.rejects.update(f"{table}.{reject.field}: {reject.reason}" for reject in rejects)
+
+    def _mark_normalized(self, raw_ids: list[int]) -> None:
+        now = datetime.now(timezone.utc)
+        for start in range(0, len(raw_ids), _LOOKUP_CHUNK_SIZE):
+            self.session.execute(
+                RawData.__table__.update()
+                .where(RawData.id.in_(raw_ids[start : start + _LOOKUP_CHUNK_SIZE]))
+                .values(normalized_at=now)
+            )
+
+
+def map_payloads(extractor: PayloadExtractor, items: list[tuple], dictionaries: dict[str, bytes]) -> MappedPayloads:
+    """Decode and map a shard of raw items; pure CPU work, so it runs in a worker process or in-line."""
+    fields = [field for field in extractor.fields if field != ID_FIELD]
+    mapped = MappedPayloads(records=[], payloads=len(items))
+    # Mapped values per digest, not decoded documents: each payload tree is dropped as soon as it is mapped.
+    extracted: dict[str, list[dict[str, Any]] | None] = {}
+    for raw_id, resource_key, digest, codec, dictionary_digest, content in items:
+        if digest not in extracted:
+            extracted[digest] = _extract(extractor, _decode(codec, content, dictionaries.get(dictionary_digest)))
+        records = extracted[digest]
+        if records is None:
+            logger.warning("Skipping raw data %s: payload is missing or not JSON", raw_id)
+            mapped.skipped += 1
+            continue
+        for values in records:
+            key = values.get(ID_FIELD)
+            if key is None and not extractor.splits_records:
+                key = resource_key
+            if key is None or key == "":
+                mapped.skipped += 1
+                continue
+            mapped.records.append((_identifier_value(key), tuple(values[field] for field in fields)))
+    return mapped
+
+
+def _extract(extractor: PayloadExtractor, document: Any) -> list[dict[str, Any]] | None:
+    if document is None:
+        return None
+    return [extractor(item) for item in extractor.records(document)]
+
+
+# The mapping compiled once per worker process, by ``_start_worker``.
+_worker_extractor: PayloadExtractor | None = None
+
+
+def _start_worker(mapping: dict[str, str]) -> None:
+    global _worker_extractor
+    _worker_extractor = PayloadExtractor(mapping)
+
+
+def _map_in_worker(items: list[tuple], dictionaries: dict[str, bytes]) -> MappedPayloads:
+    return map_payloads(_worker_extractor, items, dictionaries)
+
+
+# orjson parses several times faster than the stdlib and allocates less; both raise ValueError on bad JSON.
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _decode(codec: str | None, content: bytes | None, dictionary: bytes | None) -> Any:
+    if content is None:
+        return None
+    try:
+        return _loads(decode_payload(codec, content, dictionary))
+    except (ValueError, zlib.error):
+        return None
+
+
+def _identifier_value(value: Any) -> str:
+    # Wikidata returns entity URIs; identifiers store the bare QID.
+    return str(value).removeprefix(ENTITY_PREFIX)
+
+
+def _text(value: Any) -> str | None:
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _values(value: Any) -> list[str]:
+    """Non-empty text values of a scalar or fanned-out field."""
+    values = value if isinstance(value, list) else [value]
+    return [text for text in (_text(item) for item in values) if text is not None]
+
+
+def _date(value: Any) -> date | None:
+    text = _text(value)
+    if text is None:
+        return None
+    try:
+        # Accepts dates and timestamps such as SPARQL's 1999-03-31T00:00:00Z.
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        return None
@@ -0,0 +1,480 @@
+import math
+from collections import Counter
+from collections.abc import Iterable, Iterator, Mapping
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.dialects.sqlite import insert
+
+from open_cinema_index.models import AlternateName, Person, PersonKeyCount, PersonNameKey
+from open_cinema_index.services.title_matching import normalize_title, title_shingles
+
+# Names are blocked so that any two with at least this trigram similarity are compared.
+BLOCKING_SIMILARITY = 0.5
+# Trigrams shared by more names than this say little about identity ("son", "an ") and are not blocked on.
+MAX_BLOCK_SIZE = 500
+# Every pair in a phonetic block is a candidate, so these are kept smaller.
+MAX_PHONETIC_BLOCK_SIZE = 100
+# People whose birth years are further apart than this are never compared.
+BIRTH_YEAR_TOLERANCE = 1
+# Names read from the database, and candidate pairs scored, per round trip.
+SCAN_BATCH_SIZE = 5000
+# Name matches scoring lower are not worth a reviewer's time.
+MIN_NAME_SCORE = 0.6
+# Keeps IN (...) lists well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK_SIZE = 500
+# Kinds of keys in ``person_name_keys`` and ``person_key_counts``.
+TRIGRAM = "trigram"
+PHONETIC = "phonetic"
+# Similar names share at least this many of their blocking trigrams.
+_PREFIX_OVERLAP = 2
+# Blocked names are filtered through bitmaps of their hashed trigrams, this many bits wide (a power of two).
+_SKETCH_BITS = 256
+_SKETCH_MASK = _SKETCH_BITS - 1
+
+_SOUNDEX_CODES = {
+    letter: digit
+    for letters, digit in (("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"), ("l", "4"), ("mn", "5"), ("r", "6"))
+    for letter in letters
+}
+
+
+def soundex(word: str) -> str:
+    """American Soundex of a normalized word: ``smith`` and ``smyth`` are both ``S530``; empty without Latin letters."""
+    letters = [char for char in word if "a" <= char <= "z"]
+    if not letters:
+        return ""
+    code = letters[0].upper()
+    previous = _SOUNDEX_CODES.get(letters[0], "")
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, "")
+        if digit and digit != previous:
+            code += digit
+        # Vowels separate repeated codes; h and w do not.
+        if letter not in "hw":
+            previous = digit
+    return (code + "000")[:4]
+
+
+def phonetic_key(name: str) -> str:
+    """
+    Soundex of the first and last words of a name, in sorted order.
+
+    Middle names are ignored and the order is not, so ``John Smith``,
+    ``Jon Smyth`` and ``Smith, John`` share a key. Words without Latin
+    letters are kept as they are.
+    """
+    words = normalize_title(name).split()
+    if not words:
+        return ""
+    codes = {soundex(word) or word for word in (words[0], words[-1])}
+    return "+".join(sorted(codes))
+
+
+@dataclass(frozen=True)
+class PersonMatch:
+    """Two people whose names look or sound alike, born around the same year; ``person_id`` is the lower id."""
+
+    person_id: int
+    other_person_id: int
+    score: float
+
+
+def _sketch(shingles: set[str]) -> tuple[int, int]:
+    # A trigram set as its size and a bitmap of hashed trigrams, small enough to keep for every name.
+    bits = 0
+    for trigram in shingles:
+        bits |= 1 << (hash(trigram) & _SKETCH_MASK)
+    return len(shingles), bits
+
+
+def _similarity_bound(first: tuple[int, int], second: tuple[int, int]) -> float:
+    # The highest trigram similarity two sketches allow. Shared trigrams that collide on one bit are counted
+    # once in the common bits, so each name's own collisions are added back; the bound never misses a match.
+    (first_size, first_bits), (second_size, second_bits) = first, second
+    collided = min(first_size - first_bits.bit_count(), second_size - second_bits.bit_count())
+    shared = min((first_bits & second_bits).bit_count() + collided, first_size, second_size)
+    return shared / (first_size + second_size - shared)
+
+
+def _year(born: date | None) -> int | None:
+    return born.year if born is not None else None
+
+
+def blocking_keys(
+    name: str, frequencies: Mapping[str, int], shingles: set[str] | None = None
+) -> tuple[list[str], str | None]:
+    """
+    The keys ``name`` is blocked under: its rarest trigrams, and its phonetic key.
+
+    Enough of the rarest trigrams are kept for any two names with a
+    trigram similarity of at least ``BLOCKING_SIMILARITY`` to share
+    ``_PREFIX_OVERLAP`` of them. Trigrams in more than ``MAX_BLOCK_SIZE``
+    names are dropped, and the phonetic key is ``None`` when it is empty or
+    in more than ``MAX_PHONETIC_BLOCK_SIZE`` names.
+    """
+    shingles = sorted(
+        title_shingles(name) if shingles is None else shingles,
+        key=lambda trigram: (frequencies.get(trigram, 0), trigram),
+    )
+    prefix = len(shingles) - math.ceil(BLOCKING_SIMILARITY * len(shingles)) + _PREFIX_OVERLAP
+    trigrams = [trigram for trigram in shingles[:prefix] if frequencies.get(trigram, 0) <= MAX_BLOCK_SIZE]
+    phonetic = phonetic_key(name)
+    if not phonetic or frequencies.get(phonetic, 0) > MAX_PHONETIC_BLOCK_SIZE:
+        phonetic = None
+    return trigrams, phonetic
+
+
+class PersonBlockingIndex:
+    """
+    In-memory blocking index over the names of people, for one resolve run.
+
+    Two people are candidates when a name of one could have a trigram
+    similarity of at least ``BLOCKING_SIMILARITY`` with a name of the
+    other, or has the same ``phonetic_key``, and their birth years are at
+    most ``BIRTH_YEAR_TOLERANCE`` apart (or either is unknown).
+
+    Names are blocked under their rarest trigrams only, as many as needed
+    for any two names that similar to share two of them (prefix
+    filtering), and under their phonetic key. ``frequencies`` gives how
+    many names each trigram and phonetic key occurs in; keys in blocks
+    larger than ``MAX_BLOCK_SIZE`` and ``MAX_PHONETIC_BLOCK_SIZE`` are not
+    blocked on. This bounds the work per name and keeps a run close to
+    linear.
+    """
+
+    def __init__(self, frequencies: Mapping[str, int] | None = None):
+        self.frequencies = frequencies if frequencies is not None else {}
+        self._people: list[int] = []
+        self._years: list[int | None] = []
+        self._sketches: list[tuple[int, int]] = []
+        self._trigrams: dict[str, list[int]] = {}
+        self._phonetic: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._people)
+
+    def join(self, names: Iterable[tuple[int, str, date | None]]) -> Iterator[tuple[int, int]]:
+        """
+        Join ``(person_id, name, birth_date)`` rows against the index, adding them as they go.
+
+        Rows must be ordered by ``person_id``. Yields each pair of people
+        (lower id first) once, when the later person's names are joined.
+        """
+        current, seen = None, set()
+        people, years = self._people, self._years
+        for person_id, name, born in names:
+            if person_id != current:
+                current, seen = person_id, set()
+            year = _year(born)
+            shingles = title_shingles(name)
+            sketch = _sketch(shingles)
+            trigrams, phonetic = blocking_keys(name, self.frequencies, shingles)
+            for entry in self._matches(trigrams, sketch, phonetic):
+                other = people[entry]
+                if other == person_id or other in seen:
+                    continue
+                other_year = years[entry]
+                if year is not None and other_year is not None and abs(year - other_year) > BIRTH_YEAR_TOLERANCE:
+                    continue
+                seen.add(other)
+                yield min(other, person_id), max(other, person_id)
+            self._add(person_id, year, sketch, trigrams, phonetic)
+
+    def add(self, names: Iterable[tuple[int, str, date | None]]) -> None:
+        """Add ``(person_id, name, birth_date)`` rows to the index without joining them."""
+        for person_id, name, born in names:
+            shingles = title_shingles(name)
+            trigrams, phonetic = blocking_keys(name, self.frequencies, shingles)
+            self._add(person_id, _year(born), _sketch(shingles), trigrams, phonetic)
+
+    def _matches(self, trigrams: list[str], sketch: tuple[int, int], phonetic: str | None) -> Iterator[int]:
+        shared = Counter()
+        for trigram in trigrams:
+            shared.update(self._trigrams.get(trigram, ()))
+        sketches = self._sketches
+        for entry, count in shared.items():
+            if count >= _PREFIX_OVERLAP and _similarity_bound(sketch, sketches[entry]) >= BLOCKING_SIMILARITY:
+                yield entry
+        if phonetic is not None:
+            yield from self._phonetic.get(phonetic, ())
+
+    def _add(
+        self, person_id: int, year: int | None, sketch: tuple[int, int], trigrams: list[str], phonetic: str | None
+    ) -> None:
+        entry = len(self._people)
+        self._people.append(person_id)
+        self._years.append(year)
+        self._sketches.append(sketch)
+        for trigram in trigrams:
+            self._trigrams.setdefault(trigram, []).append(entry)
+        if phonetic is not None:
+            self._phonetic.setdefault(phonetic, []).append(entry)
+
+
+def _person_names(person_ids: list[int] | None = None):
+    people = select(Person.id, Person.name, Person.birth_date)
+    alternate = select(AlternateName.person_id, AlternateName.name, Person.birth_date).join(
+        Person, AlternateName.person_id == Person.id
+    )
+    if person_ids is not None:
+        people = people.where(Person.id.in_(person_ids))
+        alternate = alternate.where(AlternateName.person_id.in_(person_ids))
+    names = union_all(people, alternate).subquery()
+    return select(names.c.id, names.c.name, names.c.birth_date).order_by(names.c.id)
+
+
+def _names_of(session, person_ids: list[int]) -> list:
+    # The names of ``person_ids`` (sorted), ordered by person as ``PersonBlockingIndex.join`` needs them.
+    rows = []
+    for start in range(0, len(person_ids), _LOOKUP_CHUNK_SIZE):
+        rows.extend(session.execute(_person_names(person_ids[start : start + _LOOKUP_CHUNK_SIZE])).all())
+    return rows
+
+
+def _scan(session, query) -> Iterator[list]:
+    # Core execution on the session's connection skips the ORM's per-row bookkeeping.
+    result = session.connection().execute(query.execution_options(yield_per=SCAN_BATCH_SIZE))
+    yield from result.partitions()
+
+
+def _name_keys(name: str) -> list[tuple[str, str]]:
+    keys = [(TRIGRAM, trigram) for trigram in title_shingles(name)]
+    phonetic = phonetic_key(name)
+    if phonetic:
+        keys.append((PHONETIC, phonetic))
+    return keys
+
+
+class PersonNameIndex:
+    """
+    Every trigram and phonetic key of every name of every person, kept in ``person_name_keys``.
+
+    ``person_key_counts`` holds how many names have each key: the
+    frequencies ``PersonBlockingIndex`` picks blocking keys by. ``rebuild``
+    indexes every name in one scan. ``update`` re-indexes just the given
+    people and adjusts the counts by the keys their names lost and gained,
+    so a nightly run costs what changed rather than the catalog.
+
+    Names are indexed under all their keys, not only the rare ones they are
+    blocked under, so the rarest keys of a changed name find every person
+    sharing them through the ``(kind, key)`` index however the counts have
+    moved since.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def is_empty(self) -> bool:
+        return self.session.scalar(select(PersonKeyCount.id).limit(1)) is None
+
+    def rebuild(self) -> int:
+        """Index every name from scratch; returns how many were indexed."""
+        self.session.execute(PersonNameKey.__table__.delete())
+        self.session.execute(PersonKeyCount.__table__.delete())
+        counts = Counter()
+        indexed = 0
+        for partition in _scan(self.session, _person_names()):
+            self._insert_keys(partition, counts)
+            indexed += len(partition)
+        self._adjust_counts(counts)
+        return indexed
+
+    def update(self, person_ids: Iterable[int]) -> int:
+        """
+        Re-index the names of ``person_ids``, dropping those of people deleted since; returns how many were indexed.
+
+        An empty index is rebuilt instead.
+        """
+        if self.is_empty():
+            return self.rebuild()
+        changed = sorted(set(person_ids))
+        counts = Counter()
+        indexed = 0
+        for start in range(0, len(changed), _LOOKUP_CHUNK_SIZE):
+            chunk = changed[start : start + _LOOKUP_CHUNK_SIZE]
+            counts.subtract(
+                (kind, key)
+                for kind, key in self.session.execute(
+                    select(PersonNameKey.kind, PersonNameKey.key).where(PersonNameKey.person_id.in_(chunk))
+                )
+            )
+            self.session.execute(PersonNameKey.__table__.delete().where(PersonNameKey.person_id.in_(chunk)))
+            rows = self.session.execute(_person_names(chunk)).all()
+            self._insert_keys(rows, counts)
+            indexed += len(rows)
+        self._adjust_counts(counts)
+        return indexed
+
+    def frequencies(self, keys: Iterable[tuple[str, str]] | None = None) -> Counter[str]:
+        """How many names have each of ``keys`` (default all), by key alone as ``PersonBlockingIndex`` takes them."""
+        frequencies = Counter()
+        if keys is None:
+            for _, key, names in self.session.execute(
+                select(PersonKeyCount.kind, PersonKeyCount.key, PersonKeyCount.names)
+            ):
+                frequencies[key] += names
+            return frequencies
+        for kind, values in _by_kind(keys).items():
+            for start in range(0, len(values), _LOOKUP_CHUNK_SIZE):
+                for key, names in self.session.execute(
+                    select(PersonKeyCount.key, PersonKeyCount.names)
+                    .where(PersonKeyCount.kind == kind)
+                    .where(PersonKeyCount.key.in_(values[start : start + _LOOKUP_CHUNK_SIZE]))
+                ):
+                    frequencies[key] += names
+        return frequencies
+
+    def people_with(self, trigrams: Iterable[str], phonetic: str | None = None) -> set[int]:
+        """
+        The people with a name sharing ``_PREFIX_OVERLAP`` of ``trigrams``, or ``phonetic``.
+
+        Counting shared keys in the database keeps people who only share one
+        rare trigram with a name from being loaded at all.
+        """
+        people = set()
+        trigrams = sorted(set(trigrams))
+        if len(trigrams) >= _PREFIX_OVERLAP:
+            people.update(
+                self.session.scalars(
+                    select(PersonNameKey.person_id)
+                    .where(PersonNameKey.kind == TRIGRAM)
+                    .where(PersonNameKey.key.in_(trigrams))
+                    .group_by(PersonNameKey.person_id)
+                    .having(func.count() >= _PREFIX_OVERLAP)
+                )
+            )
+        if phonetic is not None:
+            people.update(
+                self.session.scalars(
+                    select(PersonNameKey.person_id)
+                    .where(PersonNameKey.kind == PHONETIC)
+                    .where(PersonNameKey.key == phonetic)
+                )
+            )
+        return people
+
+    def _insert_keys(self, names: Iterable[tuple[int, str, date | None]], counts: Counter) -> None:
+        rows = []
+        for person_id, name, _ in names:
+            keys = _name_keys(name)
+            counts.update(keys)
+            rows.extend({"person_id": person_id, "kind": kind, "key": key} for kind, key in keys)
+        if rows:
+            self.session.execute(PersonNameKey.__table__.insert(), rows)
+
+    def _adjust_counts(self, counts: Counter) -> None:
+        rows = [{"kind": kind, "key": key, "names": change} for (kind, key), change in counts.items() if change]
+        if not rows:
+            return
+        statement = insert(PersonKeyCount)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[PersonKeyCount.kind, PersonKeyCount.key],
+                set_={"names": PersonKeyCount.names + statement.excluded.names},
+            ),
+            rows,
+        )
+        self.session.execute(PersonKeyCount.__table__.delete().where(PersonKeyCount.names <= 0))
+
+
+def _by_kind(keys: Iterable[tuple[str, str]]) -> dict[str, list[str]]:
+    grouped: dict[str, set[str]] = {}
+    for kind, key in keys:
+        grouped.setdefault(kind, set()).add(key)
+    return {kind: sorted(values) for kind, values in grouped.items()}
+
+
+def person_candidates(session, person_ids: Iterable[int] | None = None) -> Iterator[tuple[int, int]]:
+    """
+    Pairs of people (lower id first) whose names block together, streamed as they are found.
+
+    Blocking keys are picked by the frequencies in ``PersonNameIndex``,
+    which must be up to date. Without ``person_ids`` every name is joined
+    against a ``PersonBlockingIndex`` in one sequential scan. With them,
+    only pairs involving those people are looked for: their rarest keys
+    find the people who could match in ``person_name_keys``, and just those
+    people's names are loaded and indexed in memory, so the work follows
+    the number of changed people rather than the size of the catalog.
+    """
+    names = PersonNameIndex(session)
+    if person_ids is None:
+        index = PersonBlockingIndex(names.frequencies())
+        for partition in _scan(session, _person_names()):
+            yield from index.join(partition)
+        return
+
+    changed = sorted(set(person_ids))
+    joined = _names_of(session, changed)
+    shingles = [title_shingles(name) for _, name, _ in joined]
+    looked_up = {(TRIGRAM, trigram) for trigrams in shingles for trigram in trigrams}
+    looked_up.update((PHONETIC, phonetic_key(name)) for _, name, _ in joined)
+    frequencies = names.frequencies(looked_up)
+    matching = set()
+    for (_, name, _), trigrams in zip(joined, shingles, strict=True):
+        matching |= names.people_with(*blocking_keys(name, frequencies, trigrams))
+
+    others = _names_of(session, sorted(matching - set(changed)))
+    frequencies.update(names.frequencies({key for _, name, _ in others for key in _name_keys(name)} - looked_up))
+    index = PersonBlockingIndex(frequencies)
+    index.add(others)
+    yield from index.join(joined)
+
+
+def score_person_candidates(
+    session, pairs: Iterable[tuple[int, int]], threshold: float = MIN_NAME_SCORE
+) -> Iterator[PersonMatch]:
+    """
+    Score candidate pairs on their names and birth dates; yields those scoring at least ``threshold``.
+
+    The score is the best trigram similarity between any names of the two
+    people, nudged up by 0.1 when both were born on the same known day and
+    down by 0.2 when both birth years are known and differ. Names and
+    birth dates are loaded in bulk, ``SCAN_BATCH_SIZE`` pairs at a time.
+    """
+    batch: list[tuple[int, int]] = []
+    for pair in pairs:
+        batch.append(pair)
+        if len(batch) >= SCAN_BATCH_SIZE:
+            yield from _score_batch(session, batch, threshold)
+            batch = []
+    if batch:
+        yield from _score_batch(session, batch, threshold)
+
+
+def _score_batch(session, pairs: list[tuple[int, int]], threshold: float) -> Iterator[PersonMatch]:
+    person_ids = sorted({person_id for pair in pairs for person_id in pair})
+    shingles: dict[int, list[set[str]]] = {}
+    births: dict[int, date] = {}
+    for start in range(0, len(person_ids), _LOOKUP_CHUNK_SIZE):
+        chunk = person_ids[start : start + _LOOKUP_CHUNK_SIZE]
+        for person_id, name, born in session.execute(
+            select(Person.id, Person.name, Person.birth_date).where(Person.id.in_(chunk))
+        ):
+            shingles.setdefault(person_id, []).append(title_shingles(name))
+            if born is not None:
+                births[person_id] = born
+        for person_id, name in session.execute(
+            select(AlternateName.person_id, AlternateName.name).where(AlternateName.person_id.in_(chunk))
+        ):
+            shingles.setdefault(person_id, []).append(title_shingles(name))
+    for first, second in pairs:
+        score = max(
+            (_jaccard(a, b) for a in shingles.get(first, ()) for b in shingles.get(second, ())),
+            default=0.0,
+        )
+        if first in births and second in births:
+            if births[first] == births[second]:
+                score += 0.1
+            elif births[first].year != births[second].year:
+                score -= 0.2
+        score = min(max(score, 0.0), 1.0)
+        if score >= threshold:
+            yield PersonMatch(first, second, round(score, 3))
+
+
+def _jaccard(first: set[str], second: set[str]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
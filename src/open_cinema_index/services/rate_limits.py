@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import math
+import mmap
+import os
+import re
+import struct
+import time
+from collections.abc import Callable, Iterable, Iterator, MutableSequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from weakref import WeakKeyDictionary
+
+from open_cinema_index.models import DataSource, DataSourceCredential, DataSourceRateLimit
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Absorbs float rounding in ``tat - tolerance`` so a conforming call is never reported as a tiny wait.
+_EPSILON = 1e-9
+# Each window's state is its TAT, the position of the next write in its send log, then the log itself.
+_LOG_START = 2
+
+
+class RateLimitExceededError(Exception):
+    """Raised when a data source rate limit would be exceeded."""
+
+
+@dataclass(frozen=True)
+class RateLimitSpec:
+    """The parts of a ``DataSourceRateLimit`` row that shape its bucket."""
+
+    window_seconds: int
+    max_calls: int
+    burst: int | None = None
+
+    @classmethod
+    def from_row(cls, rate_limit: DataSourceRateLimit) -> "RateLimitSpec":
+        return cls(rate_limit.window_seconds, rate_limit.max_calls, rate_limit.burst)
+
+    @property
+    def emission_interval(self) -> float:
+        """Seconds between calls at the sustained rate."""
+        return self.window_seconds / self.max_calls
+
+    @property
+    def tolerance(self) -> float:
+        """How far ahead of the sustained schedule a burst may run."""
+        capacity = self.burst or self.max_calls
+        return self.emission_interval * (capacity - 1)
+
+
+class RateLimiter:
+    """
+    In-process limiter combining every rate-limit window of one data source.
+
+    Each window is a token bucket expressed as the generic cell rate algorithm
+    (GCRA). Its bucket state is one float, the theoretical arrival time (TAT)
+    of the next call at the sustained rate. A call at ``now`` conforms when
+    ``now >= tat - tolerance``, so up to ``burst`` (or ``max_calls``) calls can
+    go out back to back before calls are spaced one emission interval apart.
+
+    A bucket alone lets a full burst be followed by calls at the sustained
+    rate, close to twice ``max_calls`` in one window. Each window therefore
+    also keeps a ring of its last ``max_calls`` send times, and a call only
+    conforms once the oldest of them is ``window_seconds`` old. Send times
+    never go backwards, so no span of ``window_seconds`` ever holds more than
+    ``max_calls`` calls.
+
+    Callers reserve a send time instead of polling: ``reserve`` finds the
+    earliest instant that conforms to all windows, books it in each bucket and
+    returns the delay until then. Reservations are made without yielding to the
+    event loop, so concurrent callers are queued in call order.
+    """
+
+    def __init__(
+        self,
+        specs: Iterable[RateLimitSpec],
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], object] = asyncio.sleep,
+    ):
+        self.specs = tuple(specs)
+        self._clock = clock
+        self._sleep = sleep
+        self._offsets = []
+        state: list[float] = []
+        for spec in self.specs:
+            self._offsets.append(len(state))
+            state.extend([0.0] * _LOG_START + [-math.inf] * spec.max_calls)
+        self._slots = state
+        self._resume_at = 0.0
+
+    @contextmanager
+    def _state(self) -> Iterator[MutableSequence[float]]:
+        """Yield the state of every window, as one flat sequence of floats, for reading and updating in place."""
+        yield self._slots
+
+    def delay(self) -> float:
+        """Seconds until the next call would conform, without booking it."""
+        with self._state() as state:
+            now = self._clock()
+            return self._send_at(state, now) - now
+
+    def reserve(self, max_wait: float | None = None) -> float:
+        """
+        Book the next conforming send time and return the delay until it.
+
+        Raises ``RateLimitExceededError`` without booking anything if the delay
+        would exceed ``max_wait``.
+        """
+        with self._state() as state:
+            now = self._clock()
+            send_at = self._send_at(state, now)
+            delay = send_at - now if send_at - now > _EPSILON else 0.0
+            if max_wait is not None and delay > max_wait + _EPSILON:
+                raise RateLimitExceededError(f"Next call would have to wait {delay:.2f}s (limit {max_wait:.2f}s).")
+            for offset, spec in zip(self._offsets, self.specs, strict=True):
+                state[offset] = max(state[offset], send_at) + spec.emission_interval
+                position = int(state[offset + 1])
+                state[offset + _LOG_START + position] = send_at
+                state[offset + 1] = (position + 1) % spec.max_calls
+            return delay
+
+    def try_acquire(self) -> bool:
+        """Book a call only if it may be sent immediately."""
+        try:
+            self.reserve(max_wait=0.0)
+        except RateLimitExceededError:
+            return False
+        return True
+
+    async def acquire(self, max_wait: float | None = None) -> None:
+        """Wait for a free slot in every window."""
+        delay = self.reserve(max_wait)
+        if delay > 0:
+            await self._sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Hold every call for ``seconds``, e.g. while the server asks clients to back off.
+
+        The pause is booked into the buckets themselves, so processes sharing
+        them pause too. Calls resume at the sustained rate, without a burst.
+        """
+        with self._state() as state:
+            resume_at = self._clock() + seconds
+            self._resume_at = max(self._resume_at, resume_at)
+            for offset, spec in zip(self._offsets, self.specs, strict=True):
+                state[offset] = max(state[offset], resume_at + spec.tolerance)
+
+    def _send_at(self, state: MutableSequence[float], now: float) -> float:
+        send_at = max(now, self._resume_at)
+        for offset, spec in zip(self._offsets, self.specs, strict=True):
+            position = int(state[offset + 1])
+            log = offset + _LOG_START
+            # The slot about to be overwritten holds the oldest of the last ``max_calls`` sends.
+            oldest, latest = state[log + position], state[log + (position - 1) % spec.max_calls]
+            send_at = max(send_at, state[offset] - spec.tolerance, oldest + spec.window_seconds, latest)
+        return send_at
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Limiter whose buckets live in a small memory-mapped state file.
+
+    Every process that opens the same file draws from the same buckets, so
+    several fetch workers on one machine share a single quota. Each
+    reservation holds an exclusive ``flock`` only while it reads and updates
+    a few doubles in place, which keeps contention negligible next to request
+    latency. Wall-clock time is used because bucket times are compared across
+    processes; the zeroed send logs of a new file are then long in the past.
+    """
+
+    # Padded so the doubles after the header stay 8-byte aligned.
+    _HEADER = struct.Struct("<8sI4x")
+    _MAGIC = b"OCIGCRA2"
+
+    def __init__(
+        self,
+        specs: Iterable[RateLimitSpec],
+        path: Path,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], object] = asyncio.sleep,
+    ):
+        if fcntl is None:
+            raise RuntimeError("Shared rate limits require fcntl file locking, which this platform lacks.")
+        super().__init__(specs, clock=clock, sleep=sleep)
+        self.path = path
+        size = self._HEADER.size + 8 * len(self._slots)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+                os.pwrite(self._fd, self._HEADER.pack(self._MAGIC, len(self._slots)), 0)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._map = mmap.mmap(self._fd, size)
+        magic, count = self._HEADER.unpack_from(self._map, 0)
+        if magic != self._MAGIC or count != len(self._slots):
+            self.close()
+            raise ValueError(f"{path} is not a rate-limit state file for {len(self.specs)} windows.")
+
+    @contextmanager
+    def _state(self) -> Iterator[MutableSequence[float]]:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        state = memoryview(self._map)[self._HEADER.size :].cast("d")
+        try:
+            yield state
+        finally:
+            state.release()
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class RateLimiterRegistry:
+    """
+    Process-wide limiters, one per data source of a database, or one per
+    credential for sources whose limits apply to each API key.
+
+    Every fetch in the process draws from the same buckets for a source;
+    editing the source's rate-limit rows transparently starts a fresh limiter.
+    With a ``state_dir``, buckets are kept in shared state files there so that
+    separate processes fetching from the same source share its quota.
+    Use ``registry_for`` to get the in-memory registry of a given engine.
+    """
+
+    def __init__(self, clock: Callable[[], float] | None = None, state_dir: Path | None = None):
+        self._clock = clock
+        self.state_dir = state_dir
+        self._limiters: dict[tuple[int, int | None], RateLimiter] = {}
+
+    def for_source(self, data_source: DataSource, credential: DataSourceCredential | None = None) -> RateLimiter:
+        """The limiter for ``data_source``, with buckets of its own for ``credential`` if given."""
+        specs = tuple(sorted((RateLimitSpec.from_row(row) for row in data_source.rate_limits), key=_window))
+        key = (data_source.id, credential.id if credential is not None else None)
+        limiter = self._limiters.get(key)
+        if limiter is None or limiter.specs != specs:
+            if isinstance(limiter, SharedRateLimiter):
+                limiter.close()
+            limiter = self._create(data_source, specs, key[1])
+            self._limiters[key] = limiter
+        return limiter
+
+    def close(self) -> None:
+        for limiter in self._limiters.values():
+            if isinstance(limiter, SharedRateLimiter):
+                limiter.close()
+        self._limiters.clear()
+
+    def _create(
+        self, data_source: DataSource, specs: tuple[RateLimitSpec, ...], credential_id: int | None
+    ) -> RateLimiter:
+        clock_kwargs = {"clock": self._clock} if self._clock is not None else {}
+        if self.state_dir is None or not specs:
+            return RateLimiter(specs, **clock_kwargs)
+        path = self.state_dir / _state_file_name(data_source.name, specs, credential_id)
+        return SharedRateLimiter(specs, path, **clock_kwargs)
+
+
+def _window(spec: RateLimitSpec) -> int:
+    return spec.window_seconds
+
+
+def _state_file_name(source_name: str, specs: tuple[RateLimitSpec, ...], credential_id: int | None = None) -> str:
+    # The file name carries the limit configuration and state layout, so changes never reuse stale bucket times.
+    windows = ";".join(f"{spec.window_seconds}/{spec.max_calls}/{spec.burst}" for spec in specs)
+    signature = f"{SharedRateLimiter._MAGIC.decode()}:{windows}"
+    digest = hashlib.sha1(signature.encode(), usedforsecurity=False).hexdigest()[:12]
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", source_name)
+    if credential_id is not None:
+        safe_name = f"{safe_name}-key{credential_id}"
+    return f"{safe_name}-{digest}.gcra"
+
+
+_registries: WeakKeyDictionary = WeakKeyDictionary()
+
+
+def registry_for(bind) -> RateLimiterRegistry:
+    """Return the limiter registry shared by every session bound to ``bind``."""
+    registry = _registries.get(bind)
+    if registry is None:
+        registry = _registries[bind] = RateLimiterRegistry()
+    return registry
@@ -0,0 +1,290 @@
+import hashlib
+import io
+import zlib
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from open_cinema_index.models import DataSource, DataSourceRun, RawBlob, RawData
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK_SIZE = 500
+# zlib only uses the last 32 KiB of a preset dictionary.
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+
+class RawPayloadNotFoundError(Exception):
+    """Raised when a raw payload digest is not present in the store."""
+
+
+@dataclass
+class RawStoreStats:
+    payloads: int = 0
+    new_blobs: int = 0
+    deduplicated: int = 0
+    bytes_in: int = 0
+    bytes_stored: int = 0
+
+
+@dataclass
+class _PendingPayload:
+    capability: str
+    resource_key: str | None
+    url: str | None
+    digest: str
+    payload: bytes
+    fetched_at: datetime
+
+
+def payload_digest(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def build_dictionary(samples: Iterable[bytes], size: int = MAX_DICTIONARY_SIZE) -> bytes:
+    """
+    Build a zlib preset dictionary from representative payloads.
+
+    zlib matches against the dictionary like against previously seen input, and
+    nearer bytes are cheaper to reference, so the dictionary is the tail of the
+    concatenated samples. Payloads of one capability share most of their keys
+    and boilerplate, which is what small JSON documents otherwise cannot
+    compress against.
+    """
+    return b"".join(samples)[-size:]
+
+
+def decode_payload(codec: str, content: bytes, dictionary: bytes | None = None) -> bytes:
+    """Decompress a whole blob; ``dictionary`` is required for the ``zlib-dict`` codec."""
+    if codec == "identity":
+        return content
+    decompressor = zlib.decompressobj(zdict=dictionary) if codec == "zlib-dict" else zlib.decompressobj()
+    return decompressor.decompress(content) + decompressor.flush()
+
+
+class RawStore:
+    """
+    Content-addressed, compressed storage for un-normalized source responses.
+
+    Every payload is identified by the SHA-256 of its bytes. A payload is
+    compressed and stored in ``raw_blobs`` only the first time it is seen; each
+    fetch adds just a small ``raw_data`` reference row pointing at the blob, so
+    re-fetching unchanged records costs almost no space. Writes are buffered
+    and flushed in batches: one existence lookup per chunk of digests, one bulk
+    insert for new blobs and one for reference rows.
+
+    Payloads can be compressed against a preset dictionary (see
+    ``build_dictionary``); the dictionary itself is stored as a blob so any
+    process can decode them.
+    """
+
+    def __init__(
+        self,
+        session,
+        data_source: DataSource | None = None,
+        run: DataSourceRun | None = None,
+        *,
+        batch_size: int = 500,
+        compression_level: int = 6,
+        dictionary: bytes | None = None,
+    ):
+        self.session = session
+        self.data_source = data_source
+        self.run = run
+        self.batch_size = batch_size
+        self.compression_level = compression_level
+        self.stats = RawStoreStats()
+        self._pending: list[_PendingPayload] = []
+        self._dictionaries: dict[str, bytes] = {}
+        self._dictionary_digest: str | None = None
+        if dictionary:
+            self._dictionary_digest = self._store_dictionary(dictionary[-MAX_DICTIONARY_SIZE:])
+
+    def add(self, response) -> None:
+        """Fetch engine sink: store a ``FetchResponse`` body."""
+        request = response.request
+        self.put(request.capability, response.body, resource_key=request.resource_key, url=response.url)
+
+    def put(
+        self,
+        capability: str,
+        payload: bytes,
+        resource_key: str | None = None,
+        url: str | None = None,
+        fetched_at: datetime | None = None,
+    ) -> str:
+        digest = payload_digest(payload)
+        self._pending.append(
+            _PendingPayload(capability, resource_key, url, digest, payload, fetched_at or datetime.now(timezone.utc))
+        )
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return digest
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        if self.data_source is None:
+            raise ValueError("RawStore needs a data source to record fetched payloads.")
+        pending, self._pending = self._pending, []
+
+        new_payloads = {item.digest: item.payload for item in pending}
+        for existing in self._existing_digests(list(new_payloads)):
+            del new_payloads[existing]
+        if new_payloads:
+            blobs = [self._encode(digest, payload) for digest, payload in new_payloads.items()]
+            statement = sqlite_insert(RawBlob.__table__).on_conflict_do_nothing(index_elements=["digest"])
+            self.session.execute(statement, blobs)
+            self.stats.new_blobs += len(blobs)
+            self.stats.bytes_stored += sum(blob["stored_size"] for blob in blobs)
+
+        run_id = self.run.id if self.run is not None else None
+        self.session.execute(
+            insert(RawData.__table__),
+            [
+                {
+                    "data_source_id": self.data_source.id,
+                    "run_id": run_id,
+                    "capability": item.capability,
+                    "resource_key": item.resource_key,
+                    "url": item.url,
+                    "blob_digest": item.digest,
+                    "fetched_at": item.fetched_at,
+                }
+                for item in pending
+            ],
+        )
+        self.stats.payloads += len(pending)
+        self.stats.deduplicated += len(pending) - len(new_payloads)
+        self.stats.bytes_in += sum(len(item.payload) for item in pending)
+
+    def iter_payload(self, digest: str, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """Yield the payload in decompressed chunks of at most ``chunk_size`` bytes."""
+        codec, dictionary_digest, content = self._load_blob(digest)
+        if codec == "identity":
+            for start in range(0, len(content), chunk_size):
+                yield content[start : start + chunk_size]
+            return
+        if codec == "zlib-dict":
+            decompressor = zlib.decompressobj(zdict=self.dictionary(dictionary_digest))
+        else:
+            decompressor = zlib.decompressobj()
+        data = content
+        while data:
+            chunk = decompressor.decompress(data, chunk_size)
+            if chunk:
+                yield chunk
+            data = decompressor.unconsumed_tail
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+    def open_payload(self, digest: str, chunk_size: int = 64 * 1024) -> io.BufferedReader:
+        """A file-like reader that decompresses the payload incrementally as it is read."""
+        return io.BufferedReader(_ChunkReader(self.iter_payload(digest, chunk_size)), buffer_size=chunk_size)
+
+    def read_payload(self, digest: str) -> bytes:
+        return b"".join(self.iter_payload(digest))
+
+    def read_payloads(self, digests: Iterable[str]) -> dict[str, bytes]:
+        """Decompressed payloads for ``digests``, loaded with one query per chunk; unknown digests are left out."""
+        payloads = {}
+        for digest, (codec, dictionary_digest, content) in self.read_blobs(digests).items():
+            dictionary = self.dictionary(dictionary_digest) if dictionary_digest else None
+            payloads[digest] = decode_payload(codec, content, dictionary)
+        return payloads
+
+    def read_blobs(self, digests: Iterable[str]) -> dict[str, tuple[str, str | None, bytes]]:
+        """Still-compressed ``(codec, dictionary_digest, content)`` for ``digests``, for decoding elsewhere."""
+        digests = list(dict.fromkeys(digests))
+        blobs = {}
+        for start in range(0, len(digests), _LOOKUP_CHUNK_SIZE):
+            rows = self.session.execute(
+                select(RawBlob.digest, RawBlob.codec, RawBlob.dictionary_digest, RawBlob.content).where(
+                    RawBlob.digest.in_(digests[start : start + _LOOKUP_CHUNK_SIZE])
+                )
+            )
+            for digest, codec, dictionary_digest, content in rows:
+                blobs[digest] = (codec, dictionary_digest, content)
+        return blobs
+
+    def dictionary(self, digest: str) -> bytes:
+        """The preset dictionary stored under ``digest``."""
+        if digest not in self._dictionaries:
+            self._dictionaries[digest] = self.read_payload(digest)
+        return self._dictionaries[digest]
+
+    def _existing_digests(self, digests: list[str]) -> set[str]:
+        existing = set()
+        for start in range(0, len(digests), _LOOKUP_CHUNK_SIZE):
+            chunk = digests[start : start + _LOOKUP_CHUNK_SIZE]
+            existing.update(self.session.scalars(select(RawBlob.digest).where(RawBlob.digest.in_(chunk))))
+        return existing
+
+    def _encode(self, digest: str, payload: bytes) -> dict:
+        if self._dictionary_digest is not None:
+            compressor = zlib.compressobj(self.compression_level, zdict=self._dictionaries[self._dictionary_digest])
+            codec, dictionary_digest = "zlib-dict", self._dictionary_digest
+        else:
+            compressor = zlib.compressobj(self.compression_level)
+            codec, dictionary_digest = "zlib", None
+        content = compressor.compress(payload) + compressor.flush()
+        if len(content) >= len(payload):
+            codec, dictionary_digest, content = "identity", None, payload
+        return {
+            "digest": digest,
+            "codec": codec,
+            "dictionary_digest": dictionary_digest,
+            "size": len(payload),
+            "stored_size": len(content),
+            "content": content,
+            "created_at": datetime.now(timezone.utc),
+        }
+
+    def _store_dictionary(self, dictionary: bytes) -> str:
+        digest = payload_digest(dictionary)
+        self._dictionaries[digest] = dictionary
+        self.session.execute(
+            sqlite_insert(RawBlob.__table__).on_conflict_do_nothing(index_elements=["digest"]),
+            [
+                {
+                    "digest": digest,
+                    "codec": "identity",
+                    "size": len(dictionary),
+                    "stored_size": len(dictionary),
+                    "content": dictionary,
+                    "created_at": datetime.now(timezone.utc),
+                }
+            ],
+        )
+        return digest
+
+    def _load_blob(self, digest: str) -> tuple[str, str | None, bytes]:
+        row = self.session.execute(
+            select(RawBlob.codec, RawBlob.dictionary_digest, RawBlob.content).where(RawBlob.digest == digest)
+        ).one_or_none()
+        if row is None:
+            raise RawPayloadNotFoundError(f"No raw payload stored for digest {digest}.")
+        return row.codec, row.dictionary_digest, row.content
+
+
+class _ChunkReader(io.RawIOBase):
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
@@ -0,0 +1,230 @@
+import itertools
+import math
+from collections.abc import Iterable
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from open_cinema_index.models import DataSource, DataSourceCursor, Identifier, RefreshScheduleEntry
+from open_cinema_index.services.fetch import FetchRequest, FetchResponse, requests_for_ids
+from open_cinema_index.services.wikidata import WikidataFilmPlanner, uses_sparql
+
+# Keeps IN (...) lists well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK_SIZE = 500
+
+# Cursor capability holding the highest identifier id already added to the schedule.
+IDENTIFIERS_CURSOR = "refresh-identifiers"
+
+
+class RefreshNotConfiguredError(Exception):
+    """Raised when a data source's refresh policy sets neither a refresh interval nor a maximum record age."""
+
+
+def refresh_interval(data_source: DataSource) -> timedelta | None:
+    """How long a fetched record stays fresh: the policy's refresh interval, capped by its maximum record age."""
+    policy = data_source.refresh_policy
+    if policy is None:
+        return None
+    limits = []
+    if policy.default_refresh_interval_minutes:
+        limits.append(timedelta(minutes=policy.default_refresh_interval_minutes))
+    if policy.max_record_age_days:
+        limits.append(timedelta(days=policy.max_record_age_days))
+    return min(limits) if limits else None
+
+
+def request_budget(data_source: DataSource, duration: timedelta) -> int | None:
+    """
+    Requests the source's rate limits allow over ``duration``, or ``None`` if it has none.
+
+    Every rate-limit row allows ``max_calls`` per ``window_seconds``; the
+    tightest one decides. Each active credential draws from its own buckets,
+    so the budget grows with the number of credentials.
+    """
+    if not data_source.rate_limits:
+        return None
+    seconds = duration.total_seconds()
+    per_credential = min(
+        math.floor(limit.max_calls * seconds / limit.window_seconds) for limit in data_source.rate_limits
+    )
+    credentials = sum(1 for credential in data_source.credentials if not credential.is_expired)
+    return per_credential * max(credentials, 1)
+
+
+class RefreshScheduler:
+    """
+    Decides which records of a data source to fetch again, most overdue first.
+
+    Every known record has a ``refresh_schedule`` row with the time it is next
+    due: one ``refresh_interval`` after it was last fetched. ``claim`` reads
+    due rows in order off the ``(source, capability, next_due_at)`` index and
+    stops at the batch size, so picking a batch costs the same however large
+    the catalog is. Claimed rows are leased by moving them one interval ahead,
+    so overlapping runs do not hand out the same records; ``track`` records
+    the fetches that succeeded and ``release`` makes the failed ones due
+    again.
+
+    Records join the schedule when they are fetched (``add`` / ``flush`` work
+    as a fetch engine sink) and when the catalog gains identifiers for the
+    source (``sync_identifiers``). Neither rescans existing rows. Records
+    removed upstream leave it through ``drop``, fed from the engine's
+    ``not_found_requests``.
+    """
+
+    def __init__(self, session, data_source: DataSource, capability: str = "films"):
+        interval = refresh_interval(data_source)
+        if interval is None:
+            raise RefreshNotConfiguredError(f"Data source '{data_source.name}' has no refresh interval.")
+        self.session = session
+        self.data_source = data_source
+        self.capability = capability
+        self.interval = interval
+        self._fetched: dict[str, datetime] = {}
+
+    def add(self, response: FetchResponse) -> None:
+        """Fetch engine sink: note when each record of the capability was fetched."""
+        request = response.request
+        if request.capability != self.capability or request.resource_key is None:
+            return
+        self._fetched[request.resource_key] = datetime.now(timezone.utc)
+
+    def flush(self) -> None:
+        self._upsert(self._fetched.items())
+        self._fetched.clear()
+
+    def drop(self, resource_keys: Iterable[str]) -> None:
+        """Take records removed upstream off the schedule; there is nothing left to refresh."""
+        keys = sorted(set(resource_keys))
+        for key in keys:
+            self._fetched.pop(key, None)
+        for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+            self.session.execute(
+                RefreshScheduleEntry.__table__.delete()
+                .where(RefreshScheduleEntry.data_source_id == self.data_source.id)
+                .where(RefreshScheduleEntry.capability == self.capability)
+                .where(RefreshScheduleEntry.resource_key.in_(keys[start : start + _LOOKUP_CHUNK_SIZE]))
+            )
+
+    def track(self, resource_keys: Iterable[str], fetched_at: datetime | None = None) -> None:
+        """Record that ``resource_keys`` were fetched at ``fetched_at`` (default now)."""
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        self._upsert((key, fetched_at) for key in resource_keys)
+
+    def sync_identifiers(self) -> int:
+        """Schedule records the catalog has identifiers for but the schedule has not seen; they are due now."""
+        cursor = self.session.scalars(
+            select(DataSourceCursor)
+            .where(DataSourceCursor.data_source_id == self.data_source.id)
+            .where(DataSourceCursor.capability == IDENTIFIERS_CURSOR)
+        ).one_or_none()
+        watermark = int(cursor.value) if cursor is not None else 0
+        # Only identifiers added since the last sync are read; the primary key serves the range.
+        rows = self.session.execute(
+            select(Identifier.id, Identifier.film_id, Identifier.value)
+            .where(Identifier.id > watermark)
+            .where(Identifier.scheme == self.data_source.name)
+            .order_by(Identifier.id)
+        ).all()
+        if not rows:
+            return 0
+        now = datetime.now(timezone.utc)
+        statement = insert(RefreshScheduleEntry)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["data_source_id", "capability", "resource_key"],
+                set_={"film_id": statement.excluded.film_id},
+            ),
+            [
+                {
+                    "data_source_id": self.data_source.id,
+                    "capability": self.capability,
+                    "resource_key": value,
+                    "film_id": film_id,
+                    "next_due_at": now,
+                }
+                for _, film_id, value in rows
+            ],
+        )
+        if cursor is None:
+            cursor = DataSourceCursor(data_source_id=self.data_source.id, capability=IDENTIFIERS_CURSOR)
+            self.session.add(cursor)
+        cursor.value = str(rows[-1].id)
+        self.session.flush()
+        return len(rows)
+
+    def claim(self, limit: int, now: datetime | None = None) -> list[str]:
+        """Lease up to ``limit`` due records, most overdue first, and return their resource keys."""
+        now = now or datetime.now(timezone.utc)
+        rows = self.session.execute(
+            select(RefreshScheduleEntry.id, RefreshScheduleEntry.resource_key)
+            .where(RefreshScheduleEntry.data_source_id == self.data_source.id)
+            .where(RefreshScheduleEntry.capability == self.capability)
+            .where(RefreshScheduleEntry.next_due_at <= now)
+            .order_by(RefreshScheduleEntry.next_due_at)
+            .limit(limit)
+        ).all()
+        ids = [row.id for row in rows]
+        for start in range(0, len(ids), _LOOKUP_CHUNK_SIZE):
+            self.session.execute(
+                RefreshScheduleEntry.__table__.update()
+                .where(RefreshScheduleEntry.id.in_(ids[start : start + _LOOKUP_CHUNK_SIZE]))
+                .values(next_due_at=now + self.interval)
+            )
+        return [row.resource_key for row in rows]
+
+    def release(self, resource_keys: Iterable[str], now: datetime | None = None) -> None:
+        """Make leased records that were not fetched due again at ``now``."""
+        now = now or datetime.now(timezone.utc)
+        keys = sorted(set(resource_keys))
+        for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+            self.session.execute(
+                RefreshScheduleEntry.__table__.update()
+                .where(RefreshScheduleEntry.data_source_id == self.data_source.id)
+                .where(RefreshScheduleEntry.capability == self.capability)
+                .where(RefreshScheduleEntry.resource_key.in_(keys[start : start + _LOOKUP_CHUNK_SIZE]))
+                .values(next_due_at=now)
+            )
+
+    def _upsert(self, fetched: Iterable[tuple[str, datetime]]) -> None:
+        rows = [
+            {
+                "data_source_id": self.data_source.id,
+                "capability": self.capability,
+                "resource_key": key,
+                "next_due_at": fetched_at + self.interval,
+                "last_fetched_at": fetched_at,
+            }
+            for key, fetched_at in fetched
+        ]
+        if not rows:
+            return
+        statement = insert(RefreshScheduleEntry)
+        self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=["data_source_id", "capability", "resource_key"],
+                set_={
+                    "next_due_at": statement.excluded.next_due_at,
+                    "last_fetched_at": statement.excluded.last_fetched_at,
+                },
+            ),
+            rows,
+        )
+
+
+def records_per_request(data_source: DataSource) -> int:
+    """How many records one refresh request covers: a SPARQL batch, or a single record."""
+    return WikidataFilmPlanner(data_source).batch_size if uses_sparql(data_source) else 1
+
+
+def refresh_requests(data_source: DataSource, capability: str, keys: list[str]) -> dict[FetchRequest, list[str]]:
+    """Requests that fetch ``keys`` again, each mapped to the keys it covers."""
+    if not uses_sparql(data_source, capability):
+        return {request: [request.resource_key] for request in requests_for_ids(data_source, capability, keys)}
+    remaining = iter(dict.fromkeys(keys))
+    batches = {}
+    for request in WikidataFilmPlanner(data_source, capability=capability).requests_for_ids(keys):
+        # Detail batches are packed in order and keyed ``batch:{first}/{size}``.
+        size = int(request.resource_key.rsplit("/", 1)[1])
+        batches[request] = list(itertools.islice(remaining, size))
+    return batches
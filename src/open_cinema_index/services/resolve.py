@@ -0,0 +1,136 @@
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+from sqlalchemy import select, tuple_
+
+from open_cinema_index.models import Identifier
+
+# Rows fetched from the database per round trip while the identifiers table is scanned.
+SCAN_BATCH_SIZE = 50_000
+# Keeps IN (...) lists well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK_SIZE = 500
+
+# Schemes whose values are a fixed prefix and a number; the index stores the number, which takes far less memory.
+NUMERIC_PREFIXES = {"tmdb": "", "imdb": "tt", "wikidata": "Q"}
+
+
+@dataclass(frozen=True)
+class MergeCandidate:
+    """Two films that share an identifier, with the identifier as evidence; ``film_id`` is the lower id."""
+
+    film_id: int
+    other_film_id: int
+    scheme: str
+    value: str
+
+
+def _key_function(scheme: str) -> Callable[[str], int | str]:
+    prefix = NUMERIC_PREFIXES.get(scheme)
+    if prefix is None:
+        return str
+    size = len(prefix)
+
+    def key(value: str) -> int | str:
+        number = value[size:]
+        if number.isdigit() and value.startswith(prefix):
+            return int(number)
+        return value
+
+    return key
+
+
+class IdentifierIndex:
+    """
+    In-memory hash tables from ``(scheme, value)`` to the first film that claimed it.
+
+    There is one dict per scheme. Values of well-known numeric schemes
+    (``tt0133093``, ``Q83495``, ``603``) are keyed by their number rather
+    than the string, so a few million identifiers fit in a few hundred MB.
+    """
+
+    def __init__(self):
+        self._tables: dict[str, tuple[dict[int | str, int], Callable[[str], int | str]]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(table) for table, _ in self._tables.values())
+
+    def _table(self, scheme: str) -> tuple[dict[int | str, int], Callable[[str], int | str]]:
+        entry = self._tables.get(scheme)
+        if entry is None:
+            entry = self._tables[scheme] = ({}, _key_function(scheme))
+        return entry
+
+    def join(self, claims: Iterable[tuple[str, str, int]]) -> Iterator[MergeCandidate]:
+        """
+        Hash-join ``(scheme, value, film_id)`` claims against the index, adding them as they go.
+
+        Yields a candidate for every claim of an identifier another film holds already.
+        """
+        tables = self._tables
+        for scheme, value, film_id in claims:
+            entry = tables.get(scheme) or self._table(scheme)
+            holder = entry[0].setdefault(entry[1](value), film_id)
+            if holder != film_id:
+                yield MergeCandidate(min(holder, film_id), max(holder, film_id), scheme, value)
+
+    def film_for(self, scheme: str, value: str) -> int | None:
+        entry = self._tables.get(scheme)
+        return entry[0].get(entry[1](value)) if entry is not None else None
+
+
+def film_merge_candidates(
+    session,
+    index: IdentifierIndex | None = None,
+    batch_size: int = SCAN_BATCH_SIZE,
+    film_ids: Iterable[int] | None = None,
+) -> Iterator[MergeCandidate]:
+    """
+    Films claimed to be the same work through a shared identifier.
+
+    One sequential scan of ``identifiers`` is joined against ``index`` in
+    memory, ``batch_size`` rows at a time; no per-film queries are made. A
+    film sharing both an IMDb and a TMDB identifier with another yields
+    two candidates, one per identifier.
+
+    With ``film_ids``, only candidates involving those films are looked
+    for, reading just the claims of identifiers they hold through the
+    ``(scheme, value)`` index, so the work scales with the films changed
+    rather than the catalog. Values are matched exactly
+    there; ``tmdb:0603`` only meets ``tmdb:603`` in a full scan.
+    """
+    index = index if index is not None else IdentifierIndex()
+    if film_ids is not None:
+        changed = set(film_ids)
+        for claims in _claims_sharing_identifiers(session, sorted(changed)):
+            for candidate in index.join(claims):
+                if candidate.film_id in changed or candidate.other_film_id in changed:
+                    yield candidate
+        return
+    # Core execution on the session's connection skips the ORM's per-row bookkeeping.
+    result = session.connection().execute(
+        select(Identifier.scheme, Identifier.value, Identifier.film_id)
+        .order_by(Identifier.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        yield from index.join(partition)
+
+
+def _claims_sharing_identifiers(session, film_ids: list[int]) -> Iterator[list]:
+    joined = set()
+    # Two bound parameters per identifier.
+    pairs_per_query = _LOOKUP_CHUNK_SIZE // 2
+    for start in range(0, len(film_ids), _LOOKUP_CHUNK_SIZE):
+        held = session.execute(
+            select(Identifier.scheme, Identifier.value)
+            .where(Identifier.film_id.in_(film_ids[start : start + _LOOKUP_CHUNK_SIZE]))
+            .distinct()
+        ).all()
+        held = [tuple(identifier) for identifier in held if tuple(identifier) not in joined]
+        joined.update(held)
+        for offset in range(0, len(held), pairs_per_query):
+            yield session.execute(
+                select(Identifier.scheme, Identifier.value, Identifier.film_id)
+                .where(tuple_(Identifier.scheme, Identifier.value).in_(held[offset : offset + pairs_per_query]))
+                .order_by(Identifier.id)
+            ).all()
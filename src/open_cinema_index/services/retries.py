@@ -0,0 +1,128 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Generic, TypeVar
+
+from open_cinema_index.models import DataSource, DataSourceCredential
+
+# Rate limiting and transient server errors; anything else fails the request straight away.
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+T = TypeVar("T")
+
+
+class RetryableError(Exception):
+    """A failed request that may succeed later; ``pause`` means every request with ``credential`` should wait."""
+
+    def __init__(
+        self,
+        message: str,
+        retry_after: float | None = None,
+        pause: bool = False,
+        credential: DataSourceCredential | None = None,
+    ):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.pause = pause
+        self.credential = credential
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """How many times and how long to retry a failed request; no retry waits longer than ``max_delay`` seconds."""
+
+    max_retries: int = 3
+    retry_delay: float = 1.0
+    backoff_multiplier: float = 2.0
+    max_delay: float = 900.0
+
+    @classmethod
+    def for_data_source(cls, data_source: DataSource, max_delay: float = 900.0) -> "RetryPolicy":
+        """
+        The policy configured on the source's ``DataSourceRateLimit`` rows.
+
+        With several windows, the longest delay, the largest multiplier and the
+        smallest retry budget apply.
+        """
+        default = cls(max_delay=max_delay)
+        rows = data_source.rate_limits
+        if not rows:
+            return default
+        delays = [row.retry_delay_seconds for row in rows if row.retry_delay_seconds is not None]
+        multipliers = [row.backoff_multiplier for row in rows if row.backoff_multiplier is not None]
+        budgets = [row.max_retries for row in rows if row.max_retries is not None]
+        return cls(
+            max_retries=min(budgets, default=default.max_retries),
+            retry_delay=float(max(delays, default=default.retry_delay)),
+            backoff_multiplier=float(max(multipliers, default=default.backoff_multiplier)),
+            max_delay=max_delay,
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number ``attempt`` (1-based) when the server does not say how long to wait."""
+        return self.retry_delay * self.backoff_multiplier ** (attempt - 1)
+
+
+def parse_retry_after(value: str | None, now: datetime | None = None) -> float | None:
+    """Seconds to wait from a ``Retry-After`` header, given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - (now or datetime.now(timezone.utc))).total_seconds())
+
+
+class RetryScheduler(Generic[T]):
+    """
+    Delay queue that parks items until they are due without blocking anything else.
+
+    ``schedule`` parks an item for a delay, and ``run``, a background task,
+    hands each item to ``release`` once it is due. Parked items live in a heap
+    ordered by due time, so parking and releasing cost O(log n), and the task
+    sleeps until the earliest item is due, waking early only when an earlier
+    one is parked.
+    """
+
+    def __init__(self, release: Callable[[T], None], clock: Callable[[], float] = time.monotonic):
+        self.release = release
+        self._clock = clock
+        self._heap: list[tuple[float, int, T]] = []
+        # Breaks ties between equal due times so items themselves are never compared.
+        self._sequence = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, item: T, delay: float) -> None:
+        due = self._clock() + max(delay, 0.0)
+        if not self._heap or due < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (due, next(self._sequence), item))
+
+    async def run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - self._clock()
+            if delay > 0:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                continue
+            _due, _sequence, item = heapq.heappop(self._heap)
+            self.release(item)
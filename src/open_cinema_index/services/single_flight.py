@@ -0,0 +1,85 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    joined: int = 0
+    cached: int = 0
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls for the same key into one, and briefly keeps results.
+
+    The first caller for a key runs the call; callers arriving while it is in
+    flight await the same future instead of starting their own. A result that
+    ``cacheable`` accepts is then served from memory for ``ttl`` seconds, so
+    repeats shortly afterwards do not start a call either. Errors are shared
+    with callers already waiting but never cached. At most ``max_entries``
+    results are kept, oldest first out.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        max_entries: int = 1000,
+        cacheable: Callable[[T], bool] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.cacheable = cacheable
+        self.stats = SingleFlightStats()
+        self._clock = clock
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+        self._results: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Return ``call()``'s result for ``key`` and whether it came from another caller's call."""
+        cached = self._results.get(key)
+        if cached is not None:
+            expires_at, result = cached
+            if expires_at > self._clock():
+                self.stats.cached += 1
+                return result, True
+            del self._results[key]
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats.joined += 1
+            # Shielded, so a cancelled follower does not cancel the call for everyone else.
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        # Marks an error as retrieved even when no follower is waiting for it.
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        self._in_flight[key] = future
+        self.stats.calls += 1
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            del self._in_flight[key]
+        future.set_result(result)
+        if self.ttl > 0 and (self.cacheable is None or self.cacheable(result)):
+            self._remember(key, result)
+        return result, False
+
+    def _remember(self, key: Hashable, result: T) -> None:
+        self._results[key] = (self._clock() + self.ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
@@ -0,0 +1,199 @@
+"""
+Local stand-in for upstream film APIs.
+
+The server answers TMDB-shaped paths with small deterministic JSON documents
+after an artificial latency, so fetch throughput and concurrency can be
+exercised offline. Run it directly to point a data source's ``base_url`` at it:
+
+    python -m open_cinema_index.services.stub_server --port 8765 --latency 0.05
+"""
+
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+_ENTITY_PATH = re.compile(r"^/(?P<kind>movie|person)/(?P<id>[^/]+)$")
+
+
+def film_document(film_id: str) -> dict:
+    return {
+        "id": film_id,
+        "title": f"Film {film_id}",
+        "original_title": f"Film {film_id}",
+        "original_language": "en",
+        "runtime": 90 + len(film_id),
+        "release_date": "2001-01-01",
+        "genres": [{"id": 18, "name": "Drama"}],
+    }
+
+
+def person_document(person_id: str) -> dict:
+    return {"id": person_id, "name": f"Person {person_id}", "birthday": None}
+
+
+class StubSourceServer:
+    """
+    Threaded HTTP server that imitates an upstream source.
+
+    ``latency`` is added to every response and ``error_status``, when set, makes
+    every request fail with that status. Responses are gzipped for clients that
+    accept it unless ``compress`` is turned off, and carry an ``ETag`` that
+    turns matching ``If-None-Match`` requests into ``304 Not Modified`` unless
+    ``etags`` is turned off. ``documents`` overrides the body served for a
+    path, e.g. to simulate an upstream edit, and ids in ``missing_ids`` are
+    answered with ``404`` as if removed upstream. ``requests_served``,
+    ``peak_in_flight`` and ``connections_opened`` let tests and benchmarks
+    confirm how many requests the fetcher kept open at once and how well it
+    reused connections.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        changed_ids: list[str] | None = None,
+    ):
+        self.latency = latency
+        self.changed_ids = changed_ids or []
+        self.error_status: int | None = None
+        self.compress = True
+        self.etags = True
+        self.documents: dict[str, dict] = {}
+        self.missing_ids: set[str] = set()
+        self.connections_opened = 0
+        self.requests_served = 0
+        self.peak_in_flight = 0
+        self.paths: list[str] = []
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubSourceServer":
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, name="oci-stub-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubSourceServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def respond(self, path: str, query: dict[str, list[str]]) -> tuple[int, dict | None]:
+        if self.error_status is not None:
+            return self.error_status, {"status_message": "Stand-in server error."}
+        if path in self.documents:
+            return 200, self.documents[path]
+        if path == "/movie/changes":
+            page = int(query.get("page", ["1"])[0])
+            return 200, {"results": [{"id": film_id} for film_id in self.changed_ids], "page": page, "total_pages": 1}
+        match = _ENTITY_PATH.match(path)
+        if match is None or match["id"] in self.missing_ids:
+            return 404, {"status_message": "The resource you requested could not be found."}
+        if match["kind"] == "movie":
+            return 200, film_document(match["id"])
+        return 200, person_document(match["id"])
+
+    def _connected(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def _enter(self, path: str) -> None:
+        with self._lock:
+            self._in_flight += 1
+            self.requests_served += 1
+            self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+            self.paths.append(path)
+
+    def _leave(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                server._connected()
+
+            def do_GET(self):  # noqa: N802 - BaseHTTPRequestHandler naming
+                url = urlsplit(self.path)
+                server._enter(url.path)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    status, document = server.respond(url.path, parse_qs(url.query))
+                    body = json.dumps(document).encode() if document is not None else b""
+                    etag = f'"{hashlib.sha1(body, usedforsecurity=False).hexdigest()[:16]}"'
+                    if server.etags and status == 200 and self.headers.get("If-None-Match") == etag:
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    if server.etags and status == 200:
+                        self.send_header("ETag", etag)
+                    if server.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+                        body = gzip.compress(body)
+                        self.send_header("Content-Encoding", "gzip")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    server._leave()
+
+            def log_message(self, format, *args):  # noqa: A002 - BaseHTTPRequestHandler signature
+                pass
+
+        return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for upstream film APIs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of artificial latency per request")
+    args = parser.parse_args()
+
+    server = StubSourceServer(host=args.host, port=args.port, latency=args.latency)
+    print(f"Serving stand-in source at {server.base_url}")
+    with contextlib.suppress(KeyboardInterrupt):
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
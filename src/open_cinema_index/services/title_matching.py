@@ -0,0 +1,263 @@
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from sqlalchemy import and_, bindparam, func, or_, select
+from sqlalchemy.dialects.sqlite import insert
+
+from open_cinema_index.models import Film, Release, Title, TitleBucket
+
+# Signature size: BANDS bands of ROWS_PER_BAND MinHash values. Titles sharing one band are candidates, which
+# happens with probability 1 - (1 - s^4)^8 for Jaccard similarity s: ~0.98 at 0.8, ~0.6 at 0.6, ~0.2 at 0.4.
+BANDS = 8
+ROWS_PER_BAND = 4
+# Films whose earliest releases are further apart than this are never compared.
+YEAR_TOLERANCE = 1
+# Titles indexed, and candidate pairs scored, per round trip.
+INDEX_BATCH_SIZE = 5000
+# Keeps IN (...) lists well below SQLite's bound-parameter limit.
+_LOOKUP_CHUNK_SIZE = 500
+
+# The MinHash permutations are fixed, so signatures stay comparable with the buckets already stored.
+_SEED = 20261017
+_PRIME = (1 << 61) - 1
+_random = random.Random(_SEED)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(BANDS * ROWS_PER_BAND)]
+_BUCKET_MASK = (1 << 63) - 1
+_NOT_ALPHANUMERIC = re.compile(r"[^\w]+|_")
+
+# Similar runtimes (in minutes) raise a candidate's score; a wider gap lowers it.
+RUNTIME_TOLERANCE = 5
+# Title matches scoring lower are not worth a reviewer's time.
+MIN_TITLE_SCORE = 0.6
+
+
+def normalize_title(title: str) -> str:
+    """Casefolded title without accents or punctuation: ``Amélie!`` and ``amelie`` agree."""
+    decomposed = unicodedata.normalize("NFKD", title)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return _NOT_ALPHANUMERIC.sub(" ", stripped.casefold()).strip()
+
+
+def title_shingles(title: str) -> set[str]:
+    """Character trigrams of the normalized title, padded so that word starts and ends count."""
+    text = normalize_title(title)
+    if not text:
+        return set()
+    padded = f" {text} "
+    return {padded[index : index + 3] for index in range(len(padded) - 2)}
+
+
+def _shingle_hash(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+
+
+def minhash(shingles: Iterable[str]) -> list[int]:
+    """The MinHash signature of a set of shingles: one minimum per fixed random permutation."""
+    hashes = [_shingle_hash(shingle) for shingle in shingles]
+    return [min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS]
+
+
+def band_buckets(signature: list[int]) -> list[int]:
+    """One bucket per band: a stable 63-bit hash of the band's slice of the signature."""
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS_PER_BAND}Q", *values), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little") & _BUCKET_MASK)
+    return buckets
+
+
+def title_similarity(first: str, second: str) -> float:
+    """Jaccard similarity of two titles' shingles."""
+    a, b = title_shingles(first), title_shingles(second)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass(frozen=True)
+class TitleMatch:
+    """Two films whose titles look alike, released around the same year; ``film_id`` is the lower id."""
+
+    film_id: int
+    other_film_id: int
+    score: float
+
+
+class TitleLshIndex:
+    """
+    A persistent locality-sensitive hashing index of film titles, in ``title_buckets``.
+
+    Each title gets a MinHash signature over its character trigrams, cut
+    into bands. Every band is stored as one bucket row, together with the
+    film's earliest release year. Two films are candidates when any of
+    their titles share a bucket in some band, and their years are at most
+    ``YEAR_TOLERANCE`` apart. One self-join over the bucket index finds
+    them; titles are never compared pairwise.
+
+    ``update`` indexes the titles added since the last update. Titles that
+    the normalizer replaces are deleted with their buckets, and their
+    replacements are indexed by the next update. Releases can arrive after
+    a film's titles were indexed, so ``refresh_years`` re-reads the year of
+    the films whose releases changed.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def indexed_through(self) -> int:
+        """The id of the newest indexed title, 0 when the index is empty."""
+        return self.session.scalar(select(func.max(TitleBucket.title_id))) or 0
+
+    def update(self) -> int:
+        """Index titles newer than the newest indexed one; returns how many were indexed."""
+        watermark = self.indexed_through()
+        indexed = 0
+        while True:
+            rows = self.session.execute(
+                select(Title.id, Title.film_id, Title.title)
+                .where(Title.id > watermark)
+                .order_by(Title.id)
+                .limit(INDEX_BATCH_SIZE)
+            ).all()
+            if not rows:
+                return indexed
+            years = self._years(sorted({row.film_id for row in rows}))
+            buckets = []
+            for title_id, film_id, title in rows:
+                shingles = title_shingles(title)
+                if not shingles:
+                    continue
+                year = years.get(film_id)
+                buckets.extend(
+                    {"title_id": title_id, "film_id": film_id, "year": year, "band": band, "bucket": bucket}
+                    for band, bucket in enumerate(band_buckets(minhash(shingles)))
+                )
+            if buckets:
+                self.session.execute(insert(TitleBucket).on_conflict_do_nothing(), buckets)
+            indexed += len(rows)
+            watermark = rows[-1].id
+
+    def refresh_years(self, film_ids: Iterable[int] | None = None) -> int:
+        """Store the earliest release year of ``film_ids`` (default all) in their buckets; returns rows changed."""
+        if film_ids is None:
+            film_ids = self.session.scalars(select(TitleBucket.film_id).distinct())
+        film_ids = sorted(set(film_ids))
+        buckets = TitleBucket.__table__
+        statement = (
+            buckets.update()
+            .where(buckets.c.film_id == bindparam("b_film_id"))
+            .where(buckets.c.year.is_distinct_from(bindparam("b_year")))
+            .values(year=bindparam("b_year"))
+        )
+        changed = 0
+        for start in range(0, len(film_ids), _LOOKUP_CHUNK_SIZE):
+            chunk = film_ids[start : start + _LOOKUP_CHUNK_SIZE]
+            years = self._years(chunk)
+            result = self.session.execute(
+                statement, [{"b_film_id": film_id, "b_year": years.get(film_id)} for film_id in chunk]
+            )
+            changed += result.rowcount
+        return changed
+
+    def _years(self, film_ids: list[int]) -> dict[int, int]:
+        years = {}
+        for start in range(0, len(film_ids), _LOOKUP_CHUNK_SIZE):
+            earliest = self.session.execute(
+                select(Release.film_id, func.min(Release.date))
+                .where(Release.film_id.in_(film_ids[start : start + _LOOKUP_CHUNK_SIZE]))
+                .where(Release.date.is_not(None))
+                .group_by(Release.film_id)
+            ).all()
+            years.update((film_id, released.year) for film_id, released in earliest)
+        return years
+
+    def candidates(self, film_ids: Iterable[int] | None = None) -> Iterator[tuple[int, int]]:
+        """
+        Pairs of films (lower id first) with a shared bucket.
+
+        With ``film_ids``, only pairs involving one of those films are
+        returned, starting from their own buckets, which is how a nightly run
+        revisits just the films that changed.
+        """
+        mine = TitleBucket.__table__.alias("mine")
+        theirs = TitleBucket.__table__.alias("theirs")
+        same_era = or_(
+            theirs.c.year.between(mine.c.year - YEAR_TOLERANCE, mine.c.year + YEAR_TOLERANCE),
+            and_(mine.c.year.is_(None), theirs.c.year.is_(None)),
+        )
+        pairs = (
+            select(func.min(mine.c.film_id, theirs.c.film_id), func.max(mine.c.film_id, theirs.c.film_id))
+            .join(
+                theirs,
+                and_(mine.c.band == theirs.c.band, mine.c.bucket == theirs.c.bucket, same_era),
+            )
+            .where(mine.c.film_id != theirs.c.film_id)
+            .distinct()
+        )
+        connection = self.session.connection()
+        if film_ids is None:
+            yield from connection.execute(pairs.execution_options(yield_per=INDEX_BATCH_SIZE))
+            return
+        changed = sorted(set(film_ids))
+        changed_set, joined = set(changed), set()
+        for start in range(0, len(changed), _LOOKUP_CHUNK_SIZE):
+            chunk = pairs.where(mine.c.film_id.in_(changed[start : start + _LOOKUP_CHUNK_SIZE]))
+            for pair in connection.execute(chunk):
+                # A pair of two changed films can turn up in two chunks.
+                if pair[0] in changed_set and pair[1] in changed_set:
+                    if pair in joined:
+                        continue
+                    joined.add(pair)
+                yield pair
+
+
+def score_candidates(
+    session, pairs: Iterable[tuple[int, int]], threshold: float = MIN_TITLE_SCORE
+) -> Iterator[TitleMatch]:
+    """
+    Score candidate pairs on their titles and runtimes; yields those scoring at least ``threshold``.
+
+    The score is the best title similarity between the two films, nudged
+    up by 0.1 when their runtimes are within ``RUNTIME_TOLERANCE`` minutes
+    and down by 0.2 when both are known and further apart. Titles and
+    runtimes are loaded in bulk, ``INDEX_BATCH_SIZE`` pairs at a time.
+    """
+    batch: list[tuple[int, int]] = []
+    for pair in pairs:
+        batch.append(pair)
+        if len(batch) >= INDEX_BATCH_SIZE:
+            yield from _score_batch(session, batch, threshold)
+            batch = []
+    if batch:
+        yield from _score_batch(session, batch, threshold)
+
+
+def _score_batch(session, pairs: list[tuple[int, int]], threshold: float) -> Iterator[TitleMatch]:
+    film_ids = sorted({film_id for pair in pairs for film_id in pair})
+    titles: dict[int, set[str]] = {}
+    runtimes: dict[int, int] = {}
+    for start in range(0, len(film_ids), _LOOKUP_CHUNK_SIZE):
+        chunk = film_ids[start : start + _LOOKUP_CHUNK_SIZE]
+        for film_id, title in session.execute(select(Title.film_id, Title.title).where(Title.film_id.in_(chunk))):
+            titles.setdefault(film_id, set()).add(title)
+        runtimes.update(
+            session.execute(
+                select(Film.id, Film.runtime_minutes).where(Film.id.in_(chunk)).where(Film.runtime_minutes.is_not(None))
+            ).all()
+        )
+    for first, second in pairs:
+        score = max(
+            (title_similarity(a, b) for a in titles.get(first, ()) for b in titles.get(second, ())),
+            default=0.0,
+        )
+        if first in runtimes and second in runtimes:
+            score += 0.1 if abs(runtimes[first] - runtimes[second]) <= RUNTIME_TOLERANCE else -0.2
+        score = min(max(score, 0.0), 1.0)
+        if score >= threshold:
+            yield TitleMatch(first, second, round(score, 3))
@@ -0,0 +1,215 @@
+import re
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, NamedTuple
+
+# The shortest meaningful runtime, and one above the longest released film (~857 hours).
+MIN_RUNTIME_MINUTES = 1
+MAX_RUNTIME_MINUTES = 52_000
+# Earlier than the first surviving motion pictures; older release dates are typos.
+EARLIEST_RELEASE_DATE = date(1870, 1, 1)
+MAX_TITLE_LENGTH = 1000
+
+# Reasons carried by rejects; plain strings so they count and print cheaply.
+MISSING = "missing"
+TOO_LONG = "too_long"
+BAD_SHAPE = "bad_shape"
+OUT_OF_RANGE = "out_of_range"
+LANGUAGE_NOT_ALLOWED = "language_not_allowed"
+UNKNOWN_TYPE = "unknown_type"
+
+# Canonical codes as ``open_cinema_index.services.vocabulary`` writes them.
+LANGUAGE_CODE = r"[a-z]{2,3}"
+REGION_CODE = r"[A-Z]{2}"
+SINGLE_LINE = r"[^\r\n]+"
+
+Check = Callable[[Any], bool]
+
+
+class Reject(NamedTuple):
+    """One invalid field: the row's position in the validated batch, the column and why."""
+
+    index: int
+    field: str
+    reason: str
+
+
+@dataclass(frozen=True)
+class AssertionSchema:
+    """What a valid ``MetadataAssertion`` of one ``type`` looks like."""
+
+    type: str
+    max_length: int
+    # Regular expression the whole value must match; ``None`` accepts any text.
+    pattern: str | None = None
+    # Languages the assertion may be in; ``None`` accepts any language code.
+    languages: frozenset[str] | None = None
+    language_required: bool = False
+
+
+DEFAULT_ASSERTION_SCHEMAS = (
+    AssertionSchema("genre", max_length=100, pattern=SINGLE_LINE),
+    AssertionSchema("keyword", max_length=200, pattern=SINGLE_LINE),
+    AssertionSchema("synopsis", max_length=20_000),
+    # Age certifications such as R, PG-13, 16 or TV-MA.
+    AssertionSchema("rating", max_length=20, pattern=r"[\w+\-./ ]+"),
+)
+
+
+class AssertionSchemaRegistry:
+    """
+    The assertion types OCI accepts, by ``MetadataAssertion.type``.
+
+    New kinds of metadata need no migration, only a schema here; assertions
+    of unregistered types are rejected. ``validator`` compiles the registry
+    into a ``BatchValidator``, once per set of registered schemas.
+    """
+
+    def __init__(self, schemas: Iterable[AssertionSchema] = DEFAULT_ASSERTION_SCHEMAS):
+        self._schemas = {schema.type: schema for schema in schemas}
+        self._validator: BatchValidator | None = None
+
+    def register(self, schema: AssertionSchema) -> None:
+        """Add a schema, or replace the one registered for its type."""
+        self._schemas[schema.type] = schema
+        self._validator = None
+
+    def get(self, assertion_type: str) -> AssertionSchema | None:
+        return self._schemas.get(assertion_type)
+
+    @property
+    def schemas(self) -> list[AssertionSchema]:
+        return list(self._schemas.values())
+
+    def validator(self) -> "BatchValidator":
+        if self._validator is None:
+            self._validator = BatchValidator(self.schemas)
+        return self._validator
+
+
+def _matches(pattern: str) -> Check:
+    fullmatch = re.compile(pattern).fullmatch
+    return lambda value: isinstance(value, str) and fullmatch(value) is not None
+
+
+def _at_most(length: int) -> Check:
+    return lambda value: isinstance(value, str) and len(value) <= length
+
+
+def _between(low: Any, high: Any = None) -> Check:
+    kind = type(low)
+    if high is None:
+        return lambda value: isinstance(value, kind) and value >= low
+    return lambda value: isinstance(value, kind) and low <= value <= high
+
+
+_language = _matches(LANGUAGE_CODE)
+_region = _matches(REGION_CODE)
+_confidence = _between(0, 100)
+
+# Per table: (column, required, [(check, reason), ...]); checks only see values that are not ``None``.
+_TABLE_CHECKS: dict[str, list[tuple[str, bool, list[tuple[Check, str]]]]] = {
+    "films": [
+        ("runtime_minutes", False, [(_between(MIN_RUNTIME_MINUTES, MAX_RUNTIME_MINUTES), OUT_OF_RANGE)]),
+        ("original_language", False, [(_language, BAD_SHAPE)]),
+    ],
+    "titles": [
+        ("title", True, [(_at_most(MAX_TITLE_LENGTH), TOO_LONG), (_matches(SINGLE_LINE), BAD_SHAPE)]),
+        ("language", False, [(_language, BAD_SHAPE)]),
+        ("region", False, [(_region, BAD_SHAPE)]),
+        ("confidence", False, [(_confidence, OUT_OF_RANGE)]),
+    ],
+    "releases": [
+        ("release_type", False, [(_matches(r"[a-z_]+"), BAD_SHAPE)]),
+        ("region", False, [(_region, BAD_SHAPE)]),
+        ("date", False, [(_between(EARLIEST_RELEASE_DATE), OUT_OF_RANGE)]),
+        ("runtime_minutes", False, [(_between(MIN_RUNTIME_MINUTES, MAX_RUNTIME_MINUTES), OUT_OF_RANGE)]),
+    ],
+    "metadata_assertions": [
+        ("confidence", False, [(_confidence, OUT_OF_RANGE)]),
+    ],
+}
+
+
+def _column_rejects(
+    rows: Sequence[dict[str, Any]],
+    indexes: Sequence[int],
+    column: str,
+    required: bool,
+    checks: list[tuple[Check, str]],
+) -> list[Reject]:
+    values = [rows[index].get(column) for index in indexes]
+    # Most columns repeat a few values (codes, labels), so every distinct value is checked once.
+    failures = {}
+    for value in set(values):
+        if value is None:
+            if required:
+                failures[value] = MISSING
+            continue
+        for check, reason in checks:
+            if not check(value):
+                failures[value] = reason
+                break
+    if not failures:
+        return []
+    return [
+        Reject(index, column, failures[value])
+        for index, value in zip(indexes, values, strict=True)
+        if value in failures
+    ]
+
+
+class BatchValidator:
+    """
+    Checks whole batches of rows, as written to ``films``, ``titles``, ``releases`` and ``metadata_assertions``.
+
+    Every rule is compiled up front into a plain predicate. ``validate``
+    reads each column of the batch once and runs its predicates over the
+    column's distinct values, then returns the failures as a list of
+    ``Reject`` tuples; it never raises for bad data. Assertions are grouped by ``type`` first, so each group is
+    checked against its own schema from the registry.
+    """
+
+    def __init__(self, schemas: Iterable[AssertionSchema] = DEFAULT_ASSERTION_SCHEMAS):
+        self._assertion_checks = {schema.type: self._compile(schema) for schema in schemas}
+
+    @staticmethod
+    def _compile(schema: AssertionSchema) -> list[tuple[str, bool, list[tuple[Check, str]]]]:
+        value_checks = [(_at_most(schema.max_length), TOO_LONG)]
+        if schema.pattern is not None:
+            value_checks.append((_matches(schema.pattern), BAD_SHAPE))
+        if schema.languages is not None:
+            allowed = schema.languages
+            language_checks = [(lambda language: language in allowed, LANGUAGE_NOT_ALLOWED)]
+        else:
+            language_checks = [(_language, BAD_SHAPE)]
+        return [("value", True, value_checks), ("language", schema.language_required, language_checks)]
+
+    def validate(self, table: str, rows: Sequence[dict[str, Any]]) -> list[Reject]:
+        """The invalid fields of ``rows``, in column order; tables without rules have none."""
+        everything = range(len(rows))
+        rejects = []
+        for column, required, checks in _TABLE_CHECKS.get(table, ()):
+            rejects.extend(_column_rejects(rows, everything, column, required, checks))
+        if table == "metadata_assertions":
+            rejects.extend(self._assertion_rejects(rows))
+        return rejects
+
+    def _assertion_rejects(self, rows: Sequence[dict[str, Any]]) -> list[Reject]:
+        by_type: dict[Any, list[int]] = {}
+        for index, row in enumerate(rows):
+            by_type.setdefault(row.get("type"), []).append(index)
+        rejects = []
+        for assertion_type, indexes in by_type.items():
+            columns = self._assertion_checks.get(assertion_type)
+            if columns is None:
+                rejects.extend(Reject(index, "type", UNKNOWN_TYPE) for index in indexes)
+                continue
+            for column, required, checks in columns:
+                rejects.extend(_column_rejects(rows, indexes, column, required, checks))
+        return rejects
+
+
+# Process-wide registry for callers that do not manage their own.
+default_assertion_schemas = AssertionSchemaRegistry()
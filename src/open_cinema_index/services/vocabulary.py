@@ -0,0 +1,258 @@
+import re
+import sys
+import unicodedata
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Distinct raw spellings kept per vocabulary; the real vocabularies are far smaller, so this only bounds junk.
+DEFAULT_CACHE_SIZE = 4096
+
+_WHITESPACE = re.compile(r"\s+")
+# A language tag's primary subtag (``pt`` in ``pt-BR``), or a bare code.
+_LANGUAGE_TAG = re.compile(r"([a-z]{2,3})(?:[-_].*)?")
+_REGION_CODE = re.compile(r"[A-Z]{2,3}")
+
+# ISO 639-2 codes, bibliographic and terminologic, of languages that also have an ISO 639-1 code.
+# Codes missing here are kept as given; validation decides whether they are acceptable.
+ISO_639_2_TO_1 = {
+    "ara": "ar",
+    "ben": "bn",
+    "bul": "bg",
+    "cat": "ca",
+    "ces": "cs",
+    "chi": "zh",
+    "cze": "cs",
+    "dan": "da",
+    "deu": "de",
+    "dut": "nl",
+    "ell": "el",
+    "eng": "en",
+    "est": "et",
+    "fas": "fa",
+    "fin": "fi",
+    "fra": "fr",
+    "fre": "fr",
+    "ger": "de",
+    "gre": "el",
+    "heb": "he",
+    "hin": "hi",
+    "hrv": "hr",
+    "hun": "hu",
+    "ice": "is",
+    "ind": "id",
+    "isl": "is",
+    "ita": "it",
+    "jpn": "ja",
+    "kor": "ko",
+    "lat": "la",
+    "lav": "lv",
+    "lit": "lt",
+    "msa": "ms",
+    "may": "ms",
+    "nld": "nl",
+    "nor": "no",
+    "per": "fa",
+    "pol": "pl",
+    "por": "pt",
+    "ron": "ro",
+    "rum": "ro",
+    "rus": "ru",
+    "slk": "sk",
+    "slo": "sk",
+    "slv": "sl",
+    "spa": "es",
+    "srp": "sr",
+    "swe": "sv",
+    "tam": "ta",
+    "tel": "te",
+    "tha": "th",
+    "tur": "tr",
+    "ukr": "uk",
+    "urd": "ur",
+    "vie": "vi",
+    "zho": "zh",
+}
+# Deprecated ISO 639-1 codes still found in older data.
+_LANGUAGE_ALIASES = {"iw": "he", "in": "id", "ji": "yi", "jw": "jv", "mo": "ro"}
+# "No language" (TMDB), "no linguistic content" and "undetermined" carry no language.
+_NO_LANGUAGE = frozenset({"xx", "zxx", "und"})
+
+# ISO 3166-1 alpha-3 codes of common production and release countries.
+ISO_3166_ALPHA3_TO_ALPHA2 = {
+    "ARG": "AR",
+    "AUS": "AU",
+    "AUT": "AT",
+    "BEL": "BE",
+    "BRA": "BR",
+    "CAN": "CA",
+    "CHE": "CH",
+    "CHL": "CL",
+    "CHN": "CN",
+    "COL": "CO",
+    "CZE": "CZ",
+    "DEU": "DE",
+    "DNK": "DK",
+    "EGY": "EG",
+    "ESP": "ES",
+    "FIN": "FI",
+    "FRA": "FR",
+    "GBR": "GB",
+    "GRC": "GR",
+    "HKG": "HK",
+    "HUN": "HU",
+    "IDN": "ID",
+    "IND": "IN",
+    "IRL": "IE",
+    "IRN": "IR",
+    "ISL": "IS",
+    "ISR": "IL",
+    "ITA": "IT",
+    "JPN": "JP",
+    "KOR": "KR",
+    "MEX": "MX",
+    "NGA": "NG",
+    "NLD": "NL",
+    "NOR": "NO",
+    "NZL": "NZ",
+    "PHL": "PH",
+    "POL": "PL",
+    "PRT": "PT",
+    "ROU": "RO",
+    "RUS": "RU",
+    "SWE": "SE",
+    "THA": "TH",
+    "TUR": "TR",
+    "TWN": "TW",
+    "UKR": "UA",
+    "USA": "US",
+    "ZAF": "ZA",
+}
+# Non-ISO codes in common use (the UK's and the EU's spelling of Greece).
+_REGION_ALIASES = {"UK": "GB", "EL": "GR"}
+
+# Genre labels as different sources spell them, by NFKC-casefolded spelling, mapped to the TMDB label.
+GENRE_LABELS = {
+    "action film": "Action",
+    "adventure film": "Adventure",
+    "animated film": "Animation",
+    "animated feature film": "Animation",
+    "comedy film": "Comedy",
+    "crime film": "Crime",
+    "documentary film": "Documentary",
+    "drama film": "Drama",
+    "family film": "Family",
+    "fantasy film": "Fantasy",
+    "historical film": "History",
+    "horror film": "Horror",
+    "musical film": "Music",
+    "mystery film": "Mystery",
+    "romance film": "Romance",
+    "romantic film": "Romance",
+    "sci-fi": "Science Fiction",
+    "science fiction film": "Science Fiction",
+    "thriller film": "Thriller",
+    "war film": "War",
+    "western film": "Western",
+}
+
+
+def _fold(value: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", value)).strip().casefold()
+
+
+def canonical_label(value: str) -> str | None:
+    """NFKC-normalized text with runs of whitespace collapsed; case is kept for display."""
+    text = _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", value)).strip()
+    return sys.intern(text) if text else None
+
+
+def canonical_language(value: str) -> str | None:
+    """
+    An ISO 639 language code: the ISO 639-1 code where one exists, else the code as given, lower-cased.
+
+    Language tags are reduced to their primary subtag (``pt-BR`` becomes ``pt``).
+    Values that are not codes are returned folded, for validation to reject.
+    """
+    folded = _fold(value)
+    match = _LANGUAGE_TAG.fullmatch(folded)
+    if match is not None:
+        folded = match.group(1)
+        folded = ISO_639_2_TO_1.get(folded) or _LANGUAGE_ALIASES.get(folded, folded)
+    if not folded or folded in _NO_LANGUAGE:
+        return None
+    return sys.intern(folded)
+
+
+def canonical_region(value: str) -> str | None:
+    """An ISO 3166-1 alpha-2 region code, upper-cased; alpha-3 codes of common countries are converted."""
+    text = unicodedata.normalize("NFKC", value).strip().upper()
+    if _REGION_CODE.fullmatch(text):
+        text = ISO_3166_ALPHA3_TO_ALPHA2.get(text) or _REGION_ALIASES.get(text, text)
+    return sys.intern(text) if text else None
+
+
+def canonical_genre(value: str) -> str | None:
+    """A genre label in TMDB's spelling where a known alias matches, else the label as ``canonical_label``."""
+    label = canonical_label(value)
+    if label is None:
+        return None
+    return sys.intern(GENRE_LABELS.get(_fold(label), label))
+
+
+def canonical_role(value: str) -> str | None:
+    """A credit role or department: NFKC-normalized and casefolded, so ``Director`` and ``director`` agree."""
+    text = _fold(value)
+    return sys.intern(text) if text else None
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class Vocabulary:
+    """
+    Memoized canonical forms of the small vocabularies repeated across millions of claims.
+
+    Each kind of value the normalizer writes (languages, genres, other
+    labels) has its own bounded LRU cache in front of the ``canonical_*``
+    function. The canonical strings are interned, so every claim holding
+    ``en`` or ``Science Fiction`` shares one string object. ``stats``
+    reports hits and misses per kind.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.language = lru_cache(maxsize=maxsize)(canonical_language)
+        self.genre = lru_cache(maxsize=maxsize)(canonical_genre)
+        self.label = lru_cache(maxsize=maxsize)(canonical_label)
+
+    def _caches(self) -> dict[str, Callable]:
+        return {
+            "language": self.language,
+            "genre": self.genre,
+            "label": self.label,
+        }
+
+    def stats(self) -> dict[str, CacheStats]:
+        """Hits, misses and cached spellings per kind, since creation or the last ``clear``."""
+        stats = {}
+        for kind, cache in self._caches().items():
+            info = cache.cache_info()
+            stats[kind] = CacheStats(hits=info.hits, misses=info.misses, size=info.currsize)
+        return stats
+
+    def clear(self) -> None:
+        for cache in self._caches().values():
+            cache.cache_clear()
+
+
+# Process-wide vocabulary for callers that do not manage their own.
+default_vocabulary = Vocabulary()
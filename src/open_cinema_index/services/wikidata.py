@@ -0,0 +1,279 @@
+import json
+from collections.abc import Iterable
+from dataclasses import dataclass, replace
+from datetime import date
+from string import Template
+from urllib.parse import quote
+
+from open_cinema_index.models import DataSource
+from open_cinema_index.services.checkpoints import request_from_json, request_to_json
+from open_cinema_index.services.fetch import FetchRequest, FetchResponse, build_url, capability_request
+
+ENTITY_PREFIX = "http://www.wikidata.org/entity/"
+
+# film, feature film, animated film, television film
+FILM_CLASSES = ("Q11424", "Q24869", "Q202866", "Q506240")
+
+# Count and listing queries only steer the planner; their responses are not film records and are never stored.
+COUNT_CAPABILITY = "film_counts"
+LIST_CAPABILITY = "film_listings"
+PLANNING_CAPABILITIES = frozenset({COUNT_CAPABILITY, LIST_CAPABILITY})
+
+_FILM_PATTERN = Template(
+    """
+    VALUES ?class { $classes }
+    ?film wdt:P31 ?class ; wdt:P577 ?date .
+    FILTER(?date >= "${start}T00:00:00Z"^^xsd:dateTime && ?date < "${end}T00:00:00Z"^^xsd:dateTime)
+    """
+)
+
+COUNT_QUERY = Template(
+    """
+    SELECT ?year ?month (COUNT(DISTINCT ?film) AS ?films) WHERE { $pattern }
+    GROUP BY (YEAR(?date) AS ?year) (MONTH(?date) AS ?month)
+    """
+)
+
+LIST_QUERY = Template(
+    """
+    SELECT DISTINCT ?film WHERE { $pattern }
+    ORDER BY ?film LIMIT $limit OFFSET $offset
+    """
+)
+
+DETAILS_QUERY = Template(
+    """
+    SELECT ?film (SAMPLE(?label) AS ?title) (SAMPLE(?originalTitle) AS ?original_title)
+      (MIN(?date) AS ?release_date) (SAMPLE(?duration) AS ?runtime) (SAMPLE(?imdb) AS ?imdb_id)
+      (SAMPLE(?tmdb) AS ?tmdb_id) (SAMPLE(?language) AS ?original_language)
+    WHERE {
+      VALUES ?film { $films }
+      OPTIONAL { ?film rdfs:label ?label FILTER(LANG(?label) = "en") }
+      OPTIONAL { ?film wdt:P1476 ?originalTitle }
+      OPTIONAL { ?film wdt:P577 ?date }
+      OPTIONAL { ?film wdt:P2047 ?duration }
+      OPTIONAL { ?film wdt:P345 ?imdb }
+      OPTIONAL { ?film wdt:P4947 ?tmdb }
+      OPTIONAL { ?film wdt:P364/wdt:P218 ?language }
+    }
+    GROUP BY ?film
+    """
+)
+
+
+@dataclass(frozen=True)
+class _CountStep:
+    first_year: int
+    last_year: int
+
+
+@dataclass(frozen=True)
+class _ListStep:
+    start: date
+    end: date
+    offset: int
+
+
+def uses_sparql(data_source: DataSource, capability: str = "films") -> bool:
+    """True when the capability's ``endpoint_path`` is a SPARQL query template such as ``?query={query}``."""
+    configured = next((cap for cap in data_source.capabilities if cap.capability == capability), None)
+    return bool(configured and configured.endpoint_path and "{query}" in configured.endpoint_path)
+
+
+def compact_query(query: str) -> str:
+    """Collapse whitespace so queries cost as few URL bytes as possible."""
+    return " ".join(query.split())
+
+
+class WikidataFilmPlanner:
+    """
+    Plans Wikidata Query Service requests that return as many films per request as possible.
+
+    WDQS allows about one request per second, so films are never fetched one
+    query at a time. Fetching a year works in three steps, each driven from
+    the fetch engine's ``expand`` hook:
+
+    1. One count query per span of up to ``years_per_count_query`` years
+       returns the number of films released in each month.
+    2. The months of each year are grouped into date ranges of at most
+       ``max_range_films`` films, which keeps every listing query well inside
+       the WDQS timeout. Each range is listed ``page_size`` film IDs at a time,
+       and a full page queues the next one.
+    3. Listed film IDs are looked up in batches of up to ``batch_size`` IDs
+       with a ``VALUES`` block, bounded by ``max_url_length`` because queries
+       are sent as GET requests.
+
+    Films released in several years or months are only looked up once per
+    planner. Count and listing requests are sent to the ``capability``
+    endpoint but carry ``COUNT_CAPABILITY`` and ``LIST_CAPABILITY``, so sinks
+    can tell them from detail batches (see ``is_planning_response``).
+    """
+
+    def __init__(
+        self,
+        data_source: DataSource,
+        *,
+        capability: str = "films",
+        batch_size: int = 200,
+        page_size: int = 5000,
+        max_range_films: int = 5000,
+        years_per_count_query: int = 10,
+        max_url_length: int = 7500,
+    ):
+        self.data_source = data_source
+        self.capability = capability
+        self.batch_size = batch_size
+        self.page_size = page_size
+        self.max_range_films = max_range_films
+        self.years_per_count_query = years_per_count_query
+        self.max_url_length = max_url_length
+        self._steps: dict[FetchRequest, _CountStep | _ListStep] = {}
+        self._years: set[int] = set()
+        self._seen: set[str] = set()
+
+    def requests_for_years(self, years: Iterable[int]) -> list[FetchRequest]:
+        years = sorted(set(years))
+        self._years.update(years)
+        requests = []
+        for span in _contiguous_spans(years, self.years_per_count_query):
+            step = _CountStep(span[0], span[-1])
+            pattern = _film_pattern(date(step.first_year, 1, 1), date(step.last_year + 1, 1, 1))
+            query = COUNT_QUERY.substitute(pattern=pattern)
+            requests.append(self._request(query, f"years:{step.first_year}-{step.last_year}", step, COUNT_CAPABILITY))
+        return requests
+
+    def requests_for_ids(self, qids: Iterable[str]) -> list[FetchRequest]:
+        """Detail requests for film QIDs, packed into as few ``VALUES`` batches as fit."""
+        empty_url = build_url(self.data_source, self._request(self._details_query([]), ""))
+        requests = []
+        batch: list[str] = []
+        url_length = len(empty_url)
+        for qid in qids:
+            if qid in self._seen:
+                continue
+            self._seen.add(qid)
+            # The query is percent-encoded into the URL, so each ID costs its encoded length.
+            cost = len(quote(f" wd:{qid}", safe=""))
+            if batch and (len(batch) >= self.batch_size or url_length + cost > self.max_url_length):
+                requests.append(self._details_request(batch))
+                batch, url_length = [], len(empty_url)
+            batch.append(qid)
+            url_length += cost
+        if batch:
+            requests.append(self._details_request(batch))
+        return requests
+
+    def expand(self, response: FetchResponse) -> list[FetchRequest]:
+        """Fetch engine ``expand`` hook: turn counts into listings and listings into detail batches."""
+        step = self._steps.pop(response.request, None)
+        if step is None:
+            return []
+        bindings = json.loads(response.body)["results"]["bindings"]
+        if isinstance(step, _CountStep):
+            counts = {
+                (int(row["year"]["value"]), int(row["month"]["value"])): int(row["films"]["value"]) for row in bindings
+            }
+            return [self._list_request(_ListStep(start, end, 0)) for start, end in self._ranges(step, counts)]
+
+        qids = [row["film"]["value"].removeprefix(ENTITY_PREFIX) for row in bindings]
+        requests = self.requests_for_ids(qids)
+        if len(bindings) >= self.page_size:
+            requests.append(self._list_request(_ListStep(step.start, step.end, step.offset + self.page_size)))
+        return requests
+
+    def checkpoint_state(self) -> dict:
+        """The planner's progress, for ``RunCheckpoint.state``."""
+        return {
+            "steps": [[request_to_json(request), _step_to_json(step)] for request, step in self._steps.items()],
+            "years": sorted(self._years),
+            "seen": sorted(self._seen),
+        }
+
+    def restore(self, state: dict) -> None:
+        self._steps = {request_from_json(request): _step_from_json(step) for request, step in state["steps"]}
+        self._years = set(state["years"])
+        self._seen = set(state["seen"])
+
+    def _ranges(self, step: _CountStep, counts: dict[tuple[int, int], int]) -> list[tuple[date, date]]:
+        ranges = []
+        for year in range(step.first_year, step.last_year + 1):
+            if year not in self._years:
+                continue
+            start, films = None, 0
+            for month in range(1, 13):
+                count = counts.get((year, month), 0)
+                if start is not None and films + count > self.max_range_films:
+                    ranges.append((start, date(year, month, 1)))
+                    start, films = None, 0
+                if count and start is None:
+                    start = date(year, month, 1)
+                films += count
+            if start is not None:
+                ranges.append((start, date(year + 1, 1, 1)))
+        return ranges
+
+    def _list_request(self, step: _ListStep) -> FetchRequest:
+        query = LIST_QUERY.substitute(
+            pattern=_film_pattern(step.start, step.end), limit=self.page_size, offset=step.offset
+        )
+        resource_key = f"range:{step.start.isoformat()}/{step.end.isoformat()}/{step.offset}"
+        return self._request(query, resource_key, step, LIST_CAPABILITY)
+
+    def _details_request(self, qids: list[str]) -> FetchRequest:
+        return self._request(self._details_query(qids), f"batch:{qids[0]}/{len(qids)}")
+
+    def _details_query(self, qids: list[str]) -> str:
+        return DETAILS_QUERY.substitute(films=" ".join(f"wd:{qid}" for qid in qids))
+
+    def _request(
+        self,
+        query: str,
+        resource_key: str,
+        step: _CountStep | _ListStep | None = None,
+        capability: str | None = None,
+    ) -> FetchRequest:
+        request = capability_request(
+            self.data_source,
+            self.capability,
+            params=[("format", "json")],
+            resource_key=resource_key,
+            query=compact_query(query),
+        )
+        if capability is not None:
+            request = replace(request, capability=capability)
+        if step is not None:
+            self._steps[request] = step
+        return request
+
+
+def is_planning_response(response: FetchResponse) -> bool:
+    """True for the planner's count and listing responses, which hold no film records."""
+    return response.request.capability in PLANNING_CAPABILITIES
+
+
+def _step_to_json(step: _CountStep | _ListStep) -> dict:
+    if isinstance(step, _CountStep):
+        return {"first_year": step.first_year, "last_year": step.last_year}
+    return {"start": step.start.isoformat(), "end": step.end.isoformat(), "offset": step.offset}
+
+
+def _step_from_json(data: dict) -> _CountStep | _ListStep:
+    if "first_year" in data:
+        return _CountStep(data["first_year"], data["last_year"])
+    return _ListStep(date.fromisoformat(data["start"]), date.fromisoformat(data["end"]), data["offset"])
+
+
+def _film_pattern(start: date, end: date) -> str:
+    return _FILM_PATTERN.substitute(
+        classes=" ".join(f"wd:{qid}" for qid in FILM_CLASSES), start=start.isoformat(), end=end.isoformat()
+    )
+
+
+def _contiguous_spans(years: list[int], max_span: int) -> list[list[int]]:
+    spans: list[list[int]] = []
+    for year in years:
+        if spans and year == spans[-1][-1] + 1 and len(spans[-1]) < max_span:
+            spans[-1].append(year)
+        else:
+            spans.append([year])
+    return spans
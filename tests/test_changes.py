@@ -0,0 +1,129 @@
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import (
+    AlternateName,
+    Base,
+    Credit,
+    EntityChange,
+    Film,
+    Identifier,
+    Person,
+    Title,
+)
+from open_cinema_index.services.changes import ChangeFeed, prune_changes
+from open_cinema_index.services.resolve import MergeCandidate, film_merge_candidates
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def changes(session):
+    return session.execute(select(EntityChange.entity_type, EntityChange.entity_id).order_by(EntityChange.id)).all()
+
+
+def test_claim_writes_record_the_entities_they_touch(session):
+    session.add_all([Film(id=1), Film(id=2), Person(id=7, name="Lana Wachowski")])
+    session.flush()
+    session.execute(
+        Title.__table__.insert(),
+        [{"film_id": 1, "title": "The Matrix"}, {"film_id": 1, "title": "Matrix"}, {"film_id": 2, "title": "Alien"}],
+    )
+    session.add(AlternateName(person_id=7, name="Larry"))
+    session.flush()
+    session.add(Credit(film_id=2, person_id=7, role="director"))
+    session.flush()
+    session.execute(Film.__table__.update().where(Film.id == 2).values(runtime_minutes=117))
+    session.execute(Film.__table__.delete().where(Film.id == 1))
+
+    assert changes(session) == [
+        ("film", 1),
+        ("film", 2),
+        ("person", 7),
+        ("film", 1),
+        ("film", 2),
+        ("person", 7),
+        ("film", 2),
+        ("person", 7),
+        ("film", 2),
+        ("film", 1),
+    ]
+
+
+def test_stages_keep_their_own_watermarks(session):
+    session.add_all([Film(id=1), Film(id=2), Film(id=3)])
+    session.flush()
+    resolve = ChangeFeed(session, "resolve", "film")
+    assert resolve.first_run
+    assert resolve.entity_ids() == {1, 2, 3}
+    resolve.advance()
+
+    session.add(Identifier(film_id=2, scheme="imdb", value="tt0133093", source="tmdb"))
+    session.flush()
+    assert ChangeFeed(session, "resolve", "film").entity_ids() == {2}
+    assert not ChangeFeed(session, "resolve", "film").first_run
+    assert prune_changes(session) == 3
+
+    ChangeFeed(session, "enrich", "film").advance()
+    assert prune_changes(session) == 0
+    ChangeFeed(session, "resolve", "film").advance()
+    assert prune_changes(session) == 1
+    assert ChangeFeed(session, "resolve", "film").entity_ids() == set()
+    with pytest.raises(ValueError):
+        ChangeFeed(session, "export", "film")
+
+
+def test_moving_a_claim_records_the_entity_it_left(session):
+    session.add_all([Film(id=1), Film(id=2), Person(id=7, name="Lana Wachowski"), Person(id=8, name="Lilly Wachowski")])
+    session.flush()
+    session.add_all(
+        [
+            Identifier(film_id=1, scheme="imdb", value="tt0133093", source="tmdb"),
+            Credit(film_id=1, person_id=7, role="director"),
+        ]
+    )
+    session.flush()
+    ChangeFeed(session, "resolve", "film").advance()
+    ChangeFeed(session, "resolve", "person").advance()
+
+    session.execute(Identifier.__table__.update().values(film_id=2))
+    session.execute(Credit.__table__.update().values(person_id=8))
+    session.execute(Identifier.__table__.update().values(source="wikidata"))
+
+    assert ChangeFeed(session, "resolve", "film").entity_ids() == {1, 2}
+    assert ChangeFeed(session, "resolve", "person").entity_ids() == {7, 8}
+
+
+def test_merge_candidates_of_changed_films_only(session):
+    session.add_all([Film(id=film_id) for film_id in (1, 2, 3, 4)])
+    session.flush()
+    session.add_all(
+        [
+            Identifier(film_id=1, scheme="imdb", value="tt0133093", source="tmdb"),
+            Identifier(film_id=2, scheme="imdb", value="tt0133093", source="wikidata"),
+            Identifier(film_id=3, scheme="tmdb", value="348", source="tmdb"),
+            Identifier(film_id=4, scheme="tmdb", value="348", source="wikidata"),
+            Identifier(film_id=4, scheme="imdb", value="tt0133093", source="letterboxd"),
+        ]
+    )
+    session.flush()
+
+    assert sorted(film_merge_candidates(session, film_ids=[3, 4]), key=lambda candidate: candidate.scheme) == [
+        MergeCandidate(1, 4, "imdb", "tt0133093"),
+        MergeCandidate(3, 4, "tmdb", "348"),
+    ]
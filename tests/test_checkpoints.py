@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import Base, DataSource, DataSourceCapability
+from open_cinema_index.services.checkpoints import RunCheckpoint
+from open_cinema_index.services.data_sources import DataSourceService, RunNotResumableError
+from open_cinema_index.services.fetch import FetchEngine, requests_for_ids
+from open_cinema_index.services.retries import RetryPolicy
+from open_cinema_index.services.stub_server import StubSourceServer
+from open_cinema_index.services.wikidata import WikidataFilmPlanner
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def stub_server():
+    with StubSourceServer() as server:
+        yield server
+
+
+def add_source(session, base_url):
+    source = DataSource(name="tmdb", kind="rest", base_url=base_url)
+    session.add(source)
+    session.commit()
+    session.add(DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path="/movie/{id}"))
+    session.commit()
+    return source
+
+
+def saving_checkpoint(plan):
+    def save(pending, failed, summary):
+        RunCheckpoint.for_fetch(pending, failed, summary, plan.cursors, {}).save(plan.run)
+
+    return save
+
+
+def test_engine_checkpoints_remaining_work(session, stub_server):
+    source = add_source(session, stub_server.base_url)
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+    remaining = []
+
+    engine = FetchEngine(
+        service,
+        plan,
+        concurrency=1,
+        checkpoint=lambda pending, failed, _summary: remaining.append((len(pending), len(failed))),
+        checkpoint_every=1,
+    )
+    asyncio.run(engine.run(requests_for_ids(source, "films", ["1", "2", "3"])))
+
+    assert remaining == [(2, 0), (1, 0), (0, 0)]
+
+
+def test_failed_run_resumes_and_retries_failed_requests(session, stub_server):
+    source = add_source(session, stub_server.base_url)
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+    stub_server.error_status = 500
+
+    summary = asyncio.run(
+        FetchEngine(service, plan, retry_policy=RetryPolicy(max_retries=0), checkpoint=saving_checkpoint(plan)).run(
+            requests_for_ids(source, "films", ["1", "2"])
+        )
+    )
+    assert summary.failed == 2
+    assert plan.run.status == "failed"
+    assert len(RunCheckpoint.load(plan.run).requests) == 2
+
+    stub_server.error_status = None
+    resumed = service.resume_fetch(plan.run.id)
+    checkpoint = RunCheckpoint.load(resumed.run)
+    engine = FetchEngine(service, resumed, summary=checkpoint.fetch_summary(), checkpoint=saving_checkpoint(resumed))
+    summary = asyncio.run(engine.run(checkpoint.requests))
+
+    assert resumed.run.id == plan.run.id
+    assert summary.fetched == 2
+    assert summary.failed == 0
+    assert resumed.run.status == "success"
+    assert resumed.run.checkpoint is None
+
+
+def test_resume_rejects_completed_runs_and_runs_without_checkpoint(session, stub_server):
+    add_source(session, stub_server.base_url)
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+
+    with pytest.raises(RunNotResumableError, match="no checkpoint"):
+        service.resume_fetch(plan.run.id)
+
+    RunCheckpoint().save(plan.run)
+    service.complete_run(plan, items_fetched=0)
+    with pytest.raises(RunNotResumableError, match="already completed"):
+        service.resume_fetch(plan.run.id)
+    with pytest.raises(RunNotResumableError, match="does not exist"):
+        service.resume_fetch(999)
+
+
+def test_planner_state_survives_checkpoint_round_trip(session):
+    source = DataSource(name="wikidata", kind="rest", base_url="https://query.wikidata.org/sparql")
+    session.add(source)
+    session.commit()
+    session.add(DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path="?query={query}"))
+    session.commit()
+    planner = WikidataFilmPlanner(source)
+    requests = planner.requests_for_years([2020, 2021]) + planner.requests_for_ids(["Q1", "Q2"])
+
+    checkpoint = RunCheckpoint(requests=requests, state={"wikidata": planner.checkpoint_state()})
+    restored = RunCheckpoint.from_json(checkpoint.to_json())
+    resumed = WikidataFilmPlanner(source)
+    resumed.restore(restored.state["wikidata"])
+
+    assert restored.requests == requests
+    assert resumed.checkpoint_state() == planner.checkpoint_state()
+    assert resumed.requests_for_ids(["Q1", "Q3"])[0].resource_key == "batch:Q3/1"
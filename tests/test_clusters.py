@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import Base, EntityCluster, EntityLink
+from open_cinema_index.services.clusters import EntityClusters, IdentityCollisionError
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def parents(session):
+    return dict(session.execute(select(EntityCluster.entity_id, EntityCluster.parent_id)).all())
+
+
+def test_merges_unite_clusters_under_the_lowest_id_and_lookups_compress_paths(session):
+    clusters = EntityClusters(session, "film")
+
+    assert clusters.find(7) == 7
+    assert clusters.merge(4, 5, "imdb:tt0133093") == 4
+    assert clusters.merge(3, 2) == 2
+    assert clusters.merge(5, 3, "tmdb:603") == 2
+    assert clusters.merge(4, 5, "imdb:tt0133093") == 2
+    assert clusters.canonical_ids([5, 4, 9]) == {4: 2, 5: 2, 9: 9}
+    assert clusters.members(5) == {2, 3, 4, 5}
+    assert session.scalar(select(EntityLink.evidence).where(EntityLink.entity_id == 3)) == "tmdb:603"
+
+    session.execute(EntityCluster.__table__.update().where(EntityCluster.entity_id == 2).values(parent_id=1))
+    session.execute(EntityCluster.__table__.insert().values(entity_type="film", entity_id=1, parent_id=1))
+    assert clusters.find(5) == 1
+    assert parents(session)[5] == 1
+    assert EntityClusters(session, "person").find(5) == 5
+
+
+def test_split_rebuilds_the_cluster_without_the_colliding_link(session):
+    clusters = EntityClusters(session, "person")
+    clusters.merge(1, 2, "name")
+    clusters.merge(2, 3, "wikidata:Q1")
+    clusters.merge(3, 4, "name")
+
+    # Links are replayed in the order they were recorded, so 3 stays with 2, the first one it was linked to.
+    assert clusters.split(4, 2, note="Father and son") == (4, 1)
+    assert clusters.members(1) == {1, 2, 3}
+    assert clusters.members(4) == {4}
+    with pytest.raises(IdentityCollisionError):
+        clusters.merge(3, 4)
+    assert clusters.merge(4, 5, "manual") == 4
+    with pytest.raises(IdentityCollisionError):
+        EntityClusters(session, "person").merge(5, 1)
+
+    assert clusters.resolved(2, 4)
+    assert clusters.resolved(5, 4)
+    assert not clusters.resolved(2, 5)
+    assert EntityClusters(session, "person").split(1, 6) == (1, 6)
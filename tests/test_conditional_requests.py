@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import (
+    Base,
+    DataSource,
+    DataSourceCapability,
+    DataSourceRefreshPolicy,
+    HttpCacheValidator,
+)
+from open_cinema_index.services.conditional_requests import ConditionalRequestCache
+from open_cinema_index.services.data_sources import DataSourceService
+from open_cinema_index.services.fetch import FetchEngine, requests_for_ids
+from open_cinema_index.services.stub_server import StubSourceServer
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def stub_server():
+    with StubSourceServer() as server:
+        yield server
+
+
+def add_source(session, base_url, supports_etags=True):
+    source = DataSource(name="tmdb", kind="rest", base_url=base_url)
+    session.add(source)
+    session.commit()
+    session.add_all(
+        [
+            DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path="/movie/{id}"),
+            DataSourceRefreshPolicy(data_source_id=source.id, supports_etags=supports_etags),
+        ]
+    )
+    session.commit()
+    return source
+
+
+def fetch_films(session, source, ids):
+    service = DataSourceService(session)
+    plan = service.prepare_fetch(source.name)
+    received = []
+    summary = asyncio.run(FetchEngine(service, plan, sink=received.append).run(requests_for_ids(source, "films", ids)))
+    session.commit()
+    return summary, received
+
+
+def test_unchanged_records_short_circuit_on_304(session, stub_server):
+    source = add_source(session, stub_server.base_url)
+
+    first, received = fetch_films(session, source, ["1", "2", "3"])
+    assert first.fetched == 3
+    assert len(received) == 3
+    assert session.query(HttpCacheValidator).count() == 3
+
+    second, received = fetch_films(session, source, ["1", "2", "3"])
+    assert second.not_modified == 3
+    assert second.fetched == 0
+    assert received == []
+
+
+def test_changed_record_is_refetched_and_validator_replaced(session, stub_server):
+    source = add_source(session, stub_server.base_url)
+    fetch_films(session, source, ["1", "2"])
+    old_etag = session.query(HttpCacheValidator).filter(HttpCacheValidator.url.endswith("/movie/2")).one().etag
+
+    stub_server.documents["/movie/2"] = {"id": "2", "title": "Film 2 (Director's Cut)"}
+    summary, received = fetch_films(session, source, ["1", "2"])
+
+    assert summary.not_modified == 1
+    assert [response.request.resource_key for response in received] == ["2"]
+    session.expire_all()
+    new_etag = session.query(HttpCacheValidator).filter(HttpCacheValidator.url.endswith("/movie/2")).one().etag
+    assert new_etag != old_etag
+
+
+def test_sources_without_etag_support_fetch_unconditionally(session, stub_server):
+    source = add_source(session, stub_server.base_url, supports_etags=False)
+    fetch_films(session, source, ["1"])
+
+    summary, received = fetch_films(session, source, ["1"])
+
+    assert summary.fetched == 1
+    assert len(received) == 1
+    assert session.query(HttpCacheValidator).count() == 0
+
+
+def test_cache_builds_conditional_headers_from_stored_validators(session):
+    source = DataSource(name="wikidata")
+    session.add(source)
+    session.commit()
+    session.add(
+        HttpCacheValidator(
+            data_source_id=source.id,
+            url="https://example.org/a",
+            etag='"abc"',
+            last_modified="Wed, 21 Oct 2026 07:28:00 GMT",
+        )
+    )
+    session.commit()
+
+    cache = ConditionalRequestCache(session, source)
+    cache.prime(["https://example.org/a", "https://example.org/b"])
+
+    assert cache.request_headers("https://example.org/a") == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 21 Oct 2026 07:28:00 GMT",
+    }
+    assert cache.request_headers("https://example.org/b") == {}
@@ -0,0 +1,140 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import (
+    Base,
+    DataSource,
+    DataSourceCapability,
+    DataSourceCredential,
+    DataSourceRateLimit,
+)
+from open_cinema_index.services.credentials import CredentialPool
+from open_cinema_index.services.data_sources import DataSourceService
+from open_cinema_index.services.fetch import FetchEngine, requests_for_ids
+from open_cinema_index.services.http_client import TransportResponse
+from open_cinema_index.services.rate_limits import RateLimiter, RateLimiterRegistry, RateLimitSpec
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class KeyedTransport:
+    """Answers 200 unless the request's ``api_key`` has scripted error responses left."""
+
+    def __init__(self, script=None):
+        self.script = {key: list(statuses) for key, statuses in (script or {}).items()}
+        self.keys = []
+
+    async def get(self, url, headers):  # noqa: ARG002 - transport interface
+        key = parse_qs(urlsplit(url).query)["api_key"][0]
+        self.keys.append(key)
+        if self.script.get(key):
+            status, response_headers = self.script[key].pop(0)
+            return TransportResponse(status, response_headers, b"{}")
+        return TransportResponse(200, {}, b'{"id": 1}')
+
+
+def api_keys(*tokens):
+    return [DataSourceCredential(id=index, kind="api_key", token=token) for index, token in enumerate(tokens, 1)]
+
+
+def add_source(session, keys):
+    source = DataSource(name="tmdb", kind="rest", base_url="https://api.example.org")
+    session.add(source)
+    session.commit()
+    session.add(DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path="/movie/{id}"))
+    session.add(DataSourceRateLimit(data_source_id=source.id, window_seconds=1, max_calls=40))
+    session.add_all(DataSourceCredential(data_source_id=source.id, kind="api_key", token=key) for key in keys)
+    session.commit()
+    return source
+
+
+def test_pool_alternates_credentials_and_multiplies_throughput():
+    clock = FakeClock()
+    limiters = [RateLimiter([RateLimitSpec(window_seconds=10, max_calls=1)], clock=clock) for _ in range(2)]
+    pool = CredentialPool(zip(api_keys("a", "b"), limiters, strict=True), clock=clock, sleep=clock.sleep)
+
+    async def acquire_four():
+        return [(await pool.acquire()).token for _ in range(4)]
+
+    assert asyncio.run(acquire_four()) == ["a", "b", "a", "b"]
+    # A single key would have waited 30 seconds for its fourth call.
+    assert sum(clock.sleeps) == pytest.approx(10.0)
+
+
+def test_benched_credential_is_skipped_until_it_returns():
+    clock = FakeClock()
+    limiters = [RateLimiter([], clock=clock) for _ in range(2)]
+    first, second = api_keys("a", "b")
+    pool = CredentialPool(zip([first, second], limiters, strict=True), clock=clock, sleep=clock.sleep)
+
+    pool.bench(first, "HTTP 401", seconds=60)
+    assert pool.available() == 1
+    assert asyncio.run(pool.acquire()) is second
+
+    pool.bench(second, "HTTP 401", seconds=30)
+    assert asyncio.run(pool.acquire()) is second
+    assert clock.sleeps == [30.0]
+
+
+def test_prepare_fetch_pools_active_credentials_with_own_buckets(session):
+    source = add_source(session, ["k1", "k2"])
+    expired_at = datetime.now(timezone.utc) - timedelta(days=1)
+    session.add(DataSourceCredential(data_source_id=source.id, kind="api_key", token="old", expired_at=expired_at))
+    session.commit()
+
+    plan = DataSourceService(session, rate_limiters=RateLimiterRegistry()).prepare_fetch("tmdb")
+
+    assert sorted(credential.token for credential in plan.credentials.credentials) == ["k1", "k2"]
+    first, second = (plan.credentials.limiter_for(credential) for credential in plan.credentials.credentials)
+    assert first is not second
+    assert plan.limiter is plan.credentials.limiter_for(plan.credential)
+
+
+def test_engine_moves_past_rejected_and_throttled_keys(session):
+    source = add_source(session, ["revoked", "busy", "good"])
+    service = DataSourceService(session, rate_limiters=RateLimiterRegistry())
+    plan = service.prepare_fetch("tmdb")
+    transport = KeyedTransport({"revoked": [(401, {})], "busy": [(429, {"retry-after": "60"})]})
+
+    engine = FetchEngine(service, plan, transport=transport, concurrency=1)
+    summary = asyncio.run(engine.run(requests_for_ids(source, "films", [str(i) for i in range(6)])))
+
+    assert summary.fetched == 6
+    assert summary.backoff_seconds < 1
+    assert transport.keys.count("revoked") == 1
+    assert transport.keys.count("busy") == 1
+    assert plan.credentials.available() == 2
+    assert plan.run.status == "success"
@@ -59,7 +59,7 @@ def test_prepare_fetch_requires_enabled_source(session):
         service.prepare_fetch("imdb")
 
 
-def test_prepare_fetch_enforces_rate_limits(session):
+def test_prepare_fetch_plans_share_one_rate_limiter(session):
     source = DataSource(name="wikidata")
     session.add(source)
     session.commit()
@@ -73,10 +73,15 @@ def test_prepare_fetch_enforces_rate_limits(session):
     session.commit()
 
     service = DataSourceService(session)
-    service.prepare_fetch("wikidata")
+    first = service.prepare_fetch("wikidata")
+    second = service.prepare_fetch("wikidata")
 
+    # Runs no longer consume quota; requests share one limiter and wait for a free slot.
+    assert first.limiter is second.limiter
+    assert first.limiter.try_acquire() is True
+    assert second.limiter.try_acquire() is False
     with pytest.raises(RateLimitExceededError):
-        service.prepare_fetch("wikidata")
+        second.limiter.reserve(max_wait=1.0)
 
 
 def test_prepare_fetch_picks_active_credential(session):
@@ -131,10 +136,12 @@ def test_rate_limits_are_isolated_per_source(session):
     session.commit()
 
     service = DataSourceService(session)
-    service.prepare_fetch("tmdb")
-    with pytest.raises(RateLimitExceededError):
-        service.prepare_fetch("tmdb")
+    tmdb_limiter = service.prepare_fetch("tmdb").limiter
+    assert tmdb_limiter.try_acquire() is True
+    assert tmdb_limiter.try_acquire() is False
 
     # Wikidata has its own window and quota; the TMDB calls above should not affect it.
-    service.prepare_fetch("wikidata")
-    service.prepare_fetch("wikidata")
\ No newline at end of file
+    wikidata_limiter = service.prepare_fetch("wikidata").limiter
+    assert wikidata_limiter.try_acquire() is True
+    assert wikidata_limiter.try_acquire() is True
+    assert wikidata_limiter.try_acquire() is False
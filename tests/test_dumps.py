@@ -0,0 +1,135 @@
+import bz2
+import gzip
+import json
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import Base, DataSource, DataSourceRun, RawData
+from open_cinema_index.services.data_sources import DataSourceService
+from open_cinema_index.services.dumps import DumpReader, dump_location, import_dump
+from open_cinema_index.services.raw_store import RawStore
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def export_lines(count):
+    return [json.dumps({"adult": False, "id": 1000 + i, "original_title": f"Film {i}"}) for i in range(count)]
+
+
+def test_reads_gzip_and_bz2_exports(tmp_path):
+    lines = export_lines(5)
+    content = ("\n".join(lines) + "\n").encode()
+    (tmp_path / "movies.json.gz").write_bytes(gzip.compress(content))
+    (tmp_path / "movies.json.bz2").write_bytes(bz2.compress(content))
+
+    for name in ("movies.json.gz", "movies.json.bz2"):
+        records = list(DumpReader(tmp_path / name).records())
+        assert [record.record_id for record in records] == ["1000", "1001", "1002", "1003", "1004"]
+        assert records[-1].end_offset == len(content)
+
+
+def test_reads_wikidata_array_dump(tmp_path):
+    path = tmp_path / "latest-all.json.gz"
+    path.write_bytes(
+        gzip.compress(b'[\n{"type":"item","id":"Q1","labels":{}},\n{"type":"item","id":"Q2","labels":{}}\n]\n')
+    )
+
+    records = list(DumpReader(path).records())
+
+    assert [record.record_id for record in records] == ["Q1", "Q2"]
+    assert records[0].payload == b'{"type":"item","id":"Q1","labels":{}}'
+
+
+def test_resumes_from_offset_and_skips_oversized_lines(tmp_path, caplog):
+    lines = export_lines(3)
+    lines.insert(1, json.dumps({"id": 1, "overview": "x" * 500}))
+    path = tmp_path / "movies.json.gz"
+    path.write_bytes(gzip.compress(("\n".join(lines) + "\n").encode()))
+    reader = DumpReader(path, chunk_size=64, max_line_bytes=100)
+
+    records = list(reader.records())
+    resumed = list(DumpReader(path).records(start_offset=records[0].end_offset))
+
+    assert [record.record_id for record in records] == ["1000", "1001", "1002"]
+    assert reader.skipped == 1
+    assert f"Skipped record at offset {records[0].end_offset} " in caplog.text
+    assert [record.record_id for record in resumed] == ["1", "1001", "1002"]
+
+
+def test_import_stores_records_as_raw_data(session, tmp_path):
+    path = tmp_path / "movie_ids.json.gz"
+    path.write_bytes(gzip.compress(("\n".join(export_lines(25)) + "\n").encode()))
+    session.add(DataSource(name="tmdb-export", kind="file", base_url=path.as_uri()))
+    session.commit()
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb-export")
+    checkpoints = []
+
+    summary = import_dump(
+        service,
+        plan,
+        RawStore(session, plan.data_source, plan.run),
+        dump_location(plan.data_source),
+        checkpoint_every=10,
+        on_checkpoint=checkpoints.append,
+    )
+
+    assert summary.records == 25
+    assert len(checkpoints) == 2
+    assert plan.run.status == "success"
+    assert plan.run.items_fetched == 25
+    keys = session.scalars(select(RawData.resource_key).order_by(RawData.id)).all()
+    assert keys[:2] == ["1000", "1001"]
+    assert len(keys) == 25
+
+
+def test_broken_dump_leaves_a_failed_run(session, tmp_path):
+    path = tmp_path / "movie_ids.json.gz"
+    compressed = gzip.compress(("\n".join(export_lines(50_000)) + "\n").encode())
+    path.write_bytes(compressed[: len(compressed) // 2])
+    session.add(DataSource(name="tmdb-export", kind="file", base_url=path.as_uri()))
+    session.commit()
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb-export")
+    run_id = plan.run.id
+    offsets = []
+
+    def commit(progress):
+        offsets.append(progress.end_offset)
+        session.commit()
+
+    with pytest.raises(EOFError):
+        import_dump(
+            service,
+            plan,
+            RawStore(session, plan.data_source, plan.run),
+            path,
+            checkpoint_every=1000,
+            # As in `oci fetch`: each checkpoint commits, and a failure rolls back whatever came after it.
+            on_checkpoint=commit,
+        )
+    session.rollback()
+
+    run = session.get(DataSourceRun, run_id)
+    assert run.status == "failed"
+    assert "EOFError" in run.error
+    kept = session.scalar(select(func.count()).select_from(RawData))
+    assert run.items_fetched == kept > 0
+    assert run.error.endswith(f"resume from offset {offsets[-1]}")
@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import (
+    Base,
+    DataSource,
+    DataSourceCapability,
+    DataSourceCredential,
+)
+from open_cinema_index.services.data_sources import DataSourceService
+from open_cinema_index.services.fetch import (
+    CapabilityNotConfiguredError,
+    FetchEngine,
+    build_url,
+    capability_request,
+    requests_for_ids,
+)
+from open_cinema_index.services.retries import RetryPolicy
+from open_cinema_index.services.stub_server import StubSourceServer
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def stub_server():
+    with StubSourceServer(latency=0.05) as server:
+        yield server
+
+
+def add_source(session, base_url, name="tmdb"):
+    source = DataSource(name=name, kind="rest", base_url=base_url)
+    session.add(source)
+    session.commit()
+    session.add_all(
+        [
+            DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path="/movie/{id}"),
+            DataSourceCapability(data_source_id=source.id, capability="updates", endpoint_path="/movie/changes"),
+        ]
+    )
+    session.commit()
+    return source
+
+
+def test_engine_keeps_requests_in_flight_and_records_run(session, stub_server):
+    source = add_source(session, stub_server.base_url)
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+    fetched = []
+
+    engine = FetchEngine(service, plan, concurrency=10, sink=fetched.append)
+    started = time.perf_counter()
+    summary = asyncio.run(engine.run(requests_for_ids(source, "films", [str(i) for i in range(20)])))
+    elapsed = time.perf_counter() - started
+
+    assert summary.fetched == 20
+    assert len(fetched) == 20
+    assert stub_server.peak_in_flight > 1
+    # 20 requests at 50ms each would take a full second serially.
+    assert elapsed < 0.8
+    assert plan.run.status == "success"
+    assert plan.run.items_fetched == 20
+    assert plan.run.completed_at is not None
+    assert source.last_error is None
+
+
+def test_engine_marks_run_failed_on_http_errors(session, stub_server):
+    source = add_source(session, stub_server.base_url)
+    stub_server.error_status = 500
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+
+    engine = FetchEngine(service, plan, retry_policy=RetryPolicy(max_retries=0))
+    summary = asyncio.run(engine.run(requests_for_ids(source, "films", ["1", "2"])))
+
+    assert summary.failed == 2
+    assert plan.run.status == "failed"
+    assert "HTTP 500" in plan.run.error
+    assert source.last_error == plan.run.error
+
+
+def test_engine_follows_expanded_requests(session, stub_server):
+    source = add_source(session, stub_server.base_url)
+    stub_server.changed_ids = ["7", "8"]
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+
+    def expand(response):
+        if response.request.capability != "updates":
+            return []
+        return requests_for_ids(source, "films", ["7", "8"])
+
+    engine = FetchEngine(service, plan, expand=expand)
+    summary = asyncio.run(engine.run([capability_request(source, "updates", params=[("start_date", "2026-01-01")])]))
+
+    assert summary.fetched == 3
+    assert sorted(stub_server.paths) == ["/movie/7", "/movie/8", "/movie/changes"]
+
+
+def test_requests_require_configured_endpoint(session):
+    source = DataSource(name="wikidata")
+    session.add(source)
+    session.commit()
+
+    with pytest.raises(CapabilityNotConfiguredError):
+        requests_for_ids(source, "films", ["Q1"])
+
+
+def test_build_url_keeps_credentials_out_of_recorded_url(session):
+    source = add_source(session, "https://api.example.org/3/")
+    session.add(DataSourceCredential(data_source_id=source.id, kind="api_key", token="secret"))
+    session.commit()
+    request = requests_for_ids(source, "films", ["a b"])[0]
+
+    assert build_url(source, request) == "https://api.example.org/3/movie/a%20b"
+    assert build_url(source, request, [("api_key", "secret")]) == "https://api.example.org/3/movie/a%20b?api_key=secret"
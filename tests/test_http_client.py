@@ -0,0 +1,91 @@
+import asyncio
+import zlib
+
+import pytest
+
+from open_cinema_index.models import DataSource
+from open_cinema_index.services.http_client import HttpClientRegistry, PooledHttpClient, _decode
+from open_cinema_index.services.stub_server import StubSourceServer
+
+
+@pytest.fixture
+def stub_server():
+    with StubSourceServer() as server:
+        yield server
+
+
+def test_client_reuses_keep_alive_connections(stub_server):
+    client = PooledHttpClient(stub_server.base_url, pool_size=4)
+
+    for film_id in range(5):
+        response = client.get_sync(f"{stub_server.base_url}/movie/{film_id}", {})
+        assert response.status == 200
+
+    assert stub_server.connections_opened == 1
+    assert client.stats.requests == 5
+    assert client.stats.pool_misses == 1
+    assert client.stats.pool_hits == 4
+    assert client.stats.max_latency >= client.stats.mean_latency > 0
+    client.close()
+
+
+def test_grown_client_keeps_its_idle_connections(stub_server):
+    client = PooledHttpClient(stub_server.base_url, pool_size=1)
+    client.get_sync(f"{stub_server.base_url}/movie/1", {})
+
+    client.grow(4)
+
+    async def fetch_all():
+        return await asyncio.gather(*(client.get(f"{stub_server.base_url}/movie/{n}", {}) for n in range(4)))
+
+    assert [response.status for response in asyncio.run(fetch_all())] == [200] * 4
+    assert client.pool_size == 4
+    assert client.stats.pool_hits >= 1
+    client.close()
+
+
+def test_client_decodes_gzip_bodies(stub_server):
+    client = PooledHttpClient(stub_server.base_url, user_agent="oci-test/1.0")
+
+    response = client.get_sync(f"{stub_server.base_url}/movie/42", {})
+
+    assert response.body.startswith(b'{"id": "42"')
+    assert "content-encoding" not in response.headers
+    client.close()
+
+
+def test_decode_accepts_zlib_and_raw_deflate():
+    payload = b'{"title": "Stalker"}'
+    raw = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    raw_deflate = raw.compress(payload) + raw.flush()
+
+    assert _decode(zlib.compress(payload), {"content-encoding": "deflate"}) == payload
+    assert _decode(raw_deflate, {"content-encoding": "deflate"}) == payload
+    assert _decode(payload, {}) == payload
+
+
+def test_client_rejects_other_origins(stub_server):
+    client = PooledHttpClient(stub_server.base_url)
+
+    with pytest.raises(ValueError):
+        client.get_sync("https://example.org/movie/1", {})
+    client.close()
+
+
+def test_registry_keys_clients_on_base_url_and_user_agent():
+    registry = HttpClientRegistry(pool_size=8)
+    tmdb = DataSource(name="tmdb", base_url="https://api.themoviedb.org/3", user_agent="oci/1")
+    tmdb_mirror = DataSource(name="tmdb-mirror", base_url="https://api.themoviedb.org/3", user_agent="oci/1")
+    tmdb_other_agent = DataSource(name="tmdb-bot", base_url="https://api.themoviedb.org/3", user_agent="oci/2")
+
+    client = registry.client_for(tmdb)
+
+    assert registry.client_for(tmdb_mirror) is client
+    assert registry.client_for(tmdb_other_agent) is not client
+    assert client.pool_size == 8
+    # A larger pool grows the shared client; a smaller one leaves it as it is.
+    assert registry.client_for(tmdb, pool_size=32) is client
+    assert client.pool_size == 32
+    assert registry.client_for(tmdb_mirror, pool_size=4) is client
+    assert client.pool_size == 32
+    registry.close()
@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import (
+    Base,
+    DataSource,
+    DataSourceCapability,
+    DataSourceCursor,
+    DataSourceRefreshPolicy,
+)
+from open_cinema_index.services.data_sources import DataSourceService
+from open_cinema_index.services.fetch import FetchEngine
+from open_cinema_index.services.incremental import UpdatesFeed
+from open_cinema_index.services.stub_server import StubSourceServer
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def stub_server():
+    with StubSourceServer(changed_ids=["7", "8"]) as server:
+        yield server
+
+
+def add_source(session, base_url, cursor_field=None):
+    source = DataSource(name="tmdb", kind="rest", base_url=base_url)
+    session.add(source)
+    session.commit()
+    session.add_all(
+        [
+            DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path="/movie/{id}"),
+            DataSourceCapability(data_source_id=source.id, capability="updates", endpoint_path="/movie/changes"),
+            DataSourceRefreshPolicy(data_source_id=source.id, incremental_cursor_field=cursor_field),
+        ]
+    )
+    session.commit()
+    return source
+
+
+def run_feed(session, since):
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+    feed = UpdatesFeed(plan, since)
+    summary = asyncio.run(FetchEngine(service, plan, expand=feed.expand).run(feed.requests()))
+    return service, plan, summary
+
+
+def test_successful_run_advances_cursor_to_run_date(session, stub_server):
+    source = add_source(session, stub_server.base_url)
+
+    service, plan, summary = run_feed(session, "2026-10-01")
+
+    assert summary.fetched == 3
+    assert sorted(stub_server.paths) == ["/movie/7", "/movie/8", "/movie/changes"]
+    assert service.cursor_value(source, "updates") == plan.run.started_at.date().isoformat()
+    assert session.query(DataSourceCursor).one().run_id == plan.run.id
+
+
+def test_failed_run_keeps_previous_cursor(session, stub_server):
+    source = add_source(session, stub_server.base_url)
+    session.add(DataSourceCursor(data_source_id=source.id, capability="updates", value="2026-10-01"))
+    session.commit()
+    stub_server.error_status = 400
+
+    service, plan, _ = run_feed(session, "2026-10-01")
+
+    assert plan.run.status == "failed"
+    assert service.cursor_value(source, "updates") == "2026-10-01"
+
+
+def test_cursor_field_tracks_highest_value_across_pages(session, stub_server):
+    source = add_source(session, stub_server.base_url, cursor_field="change_id")
+    stub_server.documents["/movie/changes"] = {
+        "results": [{"id": 7, "change_id": 95}, {"id": 8, "change_id": 120}, {"id": 7, "change_id": 101}],
+        "page": 1,
+        "total_pages": 3,
+    }
+
+    service, _, summary = run_feed(session, "90")
+
+    # Three feed pages, each changed film fetched once.
+    assert summary.fetched == 5
+    assert service.cursor_value(source, "updates") == "120"
+
+
+def test_cursor_never_moves_backwards(session, stub_server):
+    source = add_source(session, stub_server.base_url, cursor_field="change_id")
+    session.add(DataSourceCursor(data_source_id=source.id, capability="updates", value="500"))
+    session.commit()
+    stub_server.documents["/movie/changes"] = {"results": [{"id": 7, "change_id": 120}], "page": 1, "total_pages": 1}
+
+    service, _, _ = run_feed(session, "90")
+
+    assert service.cursor_value(source, "updates") == "500"
@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import Base, DataSource, DataSourceCapability
+from open_cinema_index.services.mappings import (
+    ExtractorCache,
+    InvalidPayloadMappingError,
+    PayloadExtractor,
+    parse_path,
+)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+MOVIE = {
+    "original_title": "The Matrix",
+    "runtime": 136,
+    "belongs_to_collection": None,
+    "genres": [{"id": 28, "name": "Action"}, {"id": 878, "name": "Science Fiction"}, {"id": 1}],
+    "release_dates": {
+        "results": [
+            {"iso_3166_1": "US", "release_dates": [{"certification": "R"}, {"certification": ""}]},
+            {"iso_3166_1": "DE", "release_dates": [{"certification": "16"}]},
+        ]
+    },
+}
+
+
+def test_extractor_reads_keys_nested_values_and_fans_out_lists():
+    extractor = PayloadExtractor(
+        {
+            "title": "original_title",
+            "runtime_minutes": "runtime",
+            "collection": "belongs_to_collection.name",
+            "genres": "genres[].name",
+            "first_country": "release_dates.results[0].iso_3166_1",
+            "certifications": "release_dates.results[].release_dates[].certification",
+            "missing": "production_companies[].name",
+        }
+    )
+
+    assert extractor(MOVIE) == {
+        "title": "The Matrix",
+        "runtime_minutes": 136,
+        "collection": None,
+        "genres": ["Action", "Science Fiction"],
+        "first_country": "US",
+        "certifications": ["R", "", "16"],
+        "missing": [],
+    }
+
+
+def test_paths_are_parsed_up_front():
+    assert parse_path("results[0].film.value") == ["results", 0, "film", "value"]
+    for path in ("", "a..b", "genres[x]", "genres]"):
+        with pytest.raises(InvalidPayloadMappingError):
+            parse_path(path)
+    with pytest.raises(InvalidPayloadMappingError):
+        PayloadExtractor.from_json('["title"]')
+    with pytest.raises(InvalidPayloadMappingError):
+        PayloadExtractor.from_json('{"title": "original_title[0"}')
+
+
+def test_cache_compiles_once_and_recompiles_changed_mappings(session):
+    source = DataSource(name="tmdb")
+    session.add(source)
+    session.commit()
+    capability = DataSourceCapability(
+        data_source_id=source.id, capability="films", payload_mapping='{"title": "original_title"}'
+    )
+    session.add(capability)
+    session.commit()
+    cache = ExtractorCache()
+
+    first = cache.extractor_for(capability)
+    assert cache.extractor_for(capability) is first
+
+    capability.payload_mapping = '{"title": "title"}'
+    session.commit()
+    changed = cache.extractor_for(capability)
+    assert changed is not first
+    assert changed({"title": "Matrix"}) == {"title": "Matrix"}
+
+    capability.payload_mapping = None
+    assert cache.extractor_for(capability) is None
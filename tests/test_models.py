@@ -2,6 +2,7 @@ from datetime import date, datetime
 
 import pytest
 from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import sessionmaker
 
@@ -143,17 +144,43 @@ def test_identifier_unique_constraint(session):
     session.add_all([f1, f2])
     session.commit()
 
-    i1 = Identifier(film_id=f1.id, scheme="imdb", value="tt0123456")
+    i1 = Identifier(film_id=f1.id, scheme="imdb", value="tt0123456", source="tmdb")
     session.add(i1)
     session.commit()
 
-    # Should fail even for different film if scheme/value is same
-    i2 = Identifier(film_id=f2.id, scheme="imdb", value="tt0123456")
+    # Another source may claim the same identifier for another film; resolution decides.
+    session.add(Identifier(film_id=f2.id, scheme="imdb", value="tt0123456", source="wikidata"))
+    session.commit()
+
+    # Should fail even for different film if the same source claims scheme/value again
+    i2 = Identifier(film_id=f2.id, scheme="imdb", value="tt0123456", source="tmdb")
     session.add(i2)
     with pytest.raises(IntegrityError):
         session.commit()
 
 
+def test_unsourced_identifier_is_unique(session):
+    f1 = Film()
+    f2 = Film()
+    session.add_all([f1, f2])
+    session.commit()
+
+    session.add(Identifier(film_id=f1.id, scheme="imdb", value="tt0123456"))
+    session.commit()
+
+    session.add(Identifier(film_id=f2.id, scheme="imdb", value="tt0123456"))
+    with pytest.raises(IntegrityError):
+        session.commit()
+    session.rollback()
+
+    # The normalizer's conflict-tolerant insert skips the duplicate instead of adding it.
+    session.execute(
+        sqlite_insert(Identifier.__table__).on_conflict_do_nothing(),
+        [{"film_id": f2.id, "scheme": "imdb", "value": "tt0123456"}],
+    )
+    assert session.query(Identifier).count() == 1
+
+
 def test_asset_unique_constraint(session):
     f = Film()
     session.add(f)
@@ -219,33 +246,25 @@ def test_data_source_capability_unique(session):
     session.add(source)
     session.commit()
 
-    cap1 = DataSourceCapability(
-        data_source_id=source.id,
-        capability="films",
-        payload_mapping='{"title": "name"}'
-    )
+    cap1 = DataSourceCapability(data_source_id=source.id, capability="films", payload_mapping='{"title": "name"}')
     cap2 = DataSourceCapability(data_source_id=source.id, capability="films")
     session.add_all([cap1, cap2])
     with pytest.raises(IntegrityError):
         session.commit()
 
     session.rollback()
-    
+
     saved_cap = session.query(DataSourceCapability).filter_by(data_source_id=source.id, capability="films").first()
     if saved_cap:
         # This part depends on if cap1 was added before exception
         # But actually IntegrityError happens at commit.
         pass
-    
+
     # Test saving and reading payload_mapping
-    cap3 = DataSourceCapability(
-        data_source_id=source.id,
-        capability="people",
-        payload_mapping='{"name": "fullname"}'
-    )
+    cap3 = DataSourceCapability(data_source_id=source.id, capability="people", payload_mapping='{"name": "fullname"}')
     session.add(cap3)
     session.commit()
-    
+
     fetched = session.query(DataSourceCapability).filter_by(data_source_id=source.id, capability="people").one()
     assert fetched.payload_mapping == '{"name": "fullname"}'
 
@@ -293,11 +312,7 @@ def test_data_source_rate_limit_retry_config(session):
     session.commit()
 
     limit = DataSourceRateLimit(
-        data_source_id=source.id,
-        window_seconds=60,
-        max_calls=10,
-        max_retries=5,
-        backoff_multiplier=3
+        data_source_id=source.id, window_seconds=60, max_calls=10, max_retries=5, backoff_multiplier=3
     )
     session.add(limit)
     session.commit()
@@ -341,16 +356,13 @@ def test_data_source_run_records(session):
     saved_run = session.query(DataSourceRun).filter_by(data_source_id=source.id).one()
     assert saved_run.status == "success"
 
+
 def test_data_source_refresh_policy_etags(session):
     source = DataSource(name="etag_test")
     session.add(source)
     session.commit()
 
-    policy = DataSourceRefreshPolicy(
-        data_source_id=source.id,
-        default_refresh_interval_minutes=60,
-        supports_etags=True
-    )
+    policy = DataSourceRefreshPolicy(data_source_id=source.id, default_refresh_interval_minutes=60, supports_etags=True)
     session.add(policy)
     session.commit()
 
@@ -0,0 +1,224 @@
+import json
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import (
+    Base,
+    DataSource,
+    DataSourceCapability,
+    Film,
+    Identifier,
+    MetadataAssertion,
+    RawData,
+    Release,
+    Title,
+)
+from open_cinema_index.services import normalize
+from open_cinema_index.services.fetch import CapabilityNotConfiguredError
+from open_cinema_index.services.mappings import ExtractorCache
+from open_cinema_index.services.normalize import Normalizer
+from open_cinema_index.services.raw_store import RawStore
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+TMDB_MAPPING = {
+    "id": "id",
+    "title": "title",
+    "original_title": "original_title",
+    "original_language": "original_language",
+    "runtime_minutes": "runtime",
+    "release_date": "release_date",
+    "imdb_id": "imdb_id",
+    "genres": "genres[].name",
+}
+
+
+def add_source(session, name, mapping):
+    source = DataSource(name=name, kind="rest")
+    session.add(source)
+    session.commit()
+    session.add(DataSourceCapability(data_source_id=source.id, capability="films", payload_mapping=json.dumps(mapping)))
+    session.commit()
+    return source
+
+
+def tmdb_movie(film_id, title="The Matrix", genres=("Action", "Science Fiction"), runtime=136):
+    return {
+        "id": film_id,
+        "title": title,
+        "original_title": title,
+        "original_language": "en",
+        "runtime": runtime,
+        "release_date": "1999-03-30",
+        "imdb_id": f"tt{film_id:07d}",
+        "genres": [{"id": index, "name": name} for index, name in enumerate(genres)],
+    }
+
+
+def store(session, source, *documents):
+    raw_store = RawStore(session, source)
+    for document in documents:
+        raw_store.put("films", json.dumps(document).encode())
+    raw_store.flush()
+    session.commit()
+
+
+def count(session, model):
+    return session.scalar(select(func.count()).select_from(model))
+
+
+def test_normalize_writes_films_and_claims_in_batches(session):
+    source = add_source(session, "tmdb", TMDB_MAPPING)
+    store(session, source, *(tmdb_movie(film_id, title=f"Film {film_id}") for film_id in range(1, 6)))
+    commits = []
+
+    summary = Normalizer(session, source, batch_size=2, extractors=ExtractorCache()).run(
+        on_batch=lambda progress: commits.append(progress.payloads)
+    )
+
+    assert commits == [2, 4, 5]
+    assert (summary.records, summary.films_created) == (5, 5)
+    assert count(session, Film) == 5
+    assert count(session, Identifier) == 10
+    assert count(session, Title) == 5
+    assert count(session, MetadataAssertion) == 10
+    film = session.scalars(select(Film).join(Identifier).where(Identifier.value == "3")).one()
+    assert (film.runtime_minutes, film.original_language) == (136, "en")
+    assert {(title.title, title.language, title.is_original) for title in film.titles} == {("Film 3", "en", True)}
+    assert [(release.date, release.source) for release in film.releases] == [(date(1999, 3, 30), "tmdb")]
+    assert session.scalar(select(func.count()).where(RawData.normalized_at.is_(None))) == 0
+
+
+def test_renormalizing_replaces_the_sources_claims(session):
+    source = add_source(session, "tmdb", TMDB_MAPPING)
+    store(session, source, tmdb_movie(603))
+    Normalizer(session, source, extractors=ExtractorCache()).run()
+    store(session, source, tmdb_movie(603, title="Matrix", genres=("Action",)), tmdb_movie(603, genres=("Drama",)))
+
+    summary = Normalizer(session, source, extractors=ExtractorCache()).run()
+
+    assert summary.films_created == 0
+    assert count(session, Film) == 1
+    # The newest payload wins; the earlier genres and titles from tmdb are gone rather than duplicated.
+    assert session.scalars(select(MetadataAssertion.value)).all() == ["Drama"]
+    assert session.scalars(select(Title.title)).all() == ["The Matrix"]
+    assert count(session, Release) == 1
+
+
+def test_records_split_from_sparql_bindings(session):
+    mapping = {
+        "records": "results.bindings[]",
+        "id": "film.value",
+        "title": "title.value",
+        "release_date": "release_date.value",
+        "runtime_minutes": "runtime.value",
+        "tmdb_id": "tmdb_id.value",
+        "original_language": "language.value",
+        "genres": "genre.value",
+    }
+    source = add_source(session, "wikidata", mapping)
+    bindings = [
+        {
+            "film": {"value": "http://www.wikidata.org/entity/Q83495"},
+            "title": {"value": "The Matrix"},
+            "release_date": {"value": "1999-03-31T00:00:00Z"},
+            "runtime": {"value": "136"},
+            "tmdb_id": {"value": "603"},
+            "language": {"value": "eng"},
+            "genre": {"value": "science fiction film"},
+        },
+        {"film": {"value": "http://www.wikidata.org/entity/Q189600"}, "title": {"value": "Ghost in the Shell"}},
+        {"title": {"value": "No identifier"}},
+    ]
+    store(session, source, {"results": {"bindings": bindings}}, [1, 2])
+
+    summary = Normalizer(session, source, extractors=ExtractorCache()).run()
+
+    assert (summary.payloads, summary.records, summary.skipped) == (2, 2, 1)
+    identifiers = set(session.execute(select(Identifier.scheme, Identifier.value)).all())
+    assert identifiers == {("wikidata", "Q83495"), ("wikidata", "Q189600"), ("tmdb", "603")}
+    assert session.scalar(select(Release.date)) == date(1999, 3, 31)
+    assert session.scalar(select(Film.runtime_minutes).where(Film.runtime_minutes.is_not(None))) == 136
+    # Codes and labels come out in their canonical spelling.
+    assert session.scalar(select(Film.original_language).where(Film.original_language.is_not(None))) == "en"
+    assert session.scalars(select(MetadataAssertion.value)).all() == ["Science Fiction"]
+
+
+def test_worker_processes_map_the_same_records(session):
+    source = add_source(session, "tmdb", TMDB_MAPPING)
+    # Film 2 appears twice in different shards; the later payload must still win.
+    store(session, source, *(tmdb_movie(film_id) for film_id in range(1, 9)), tmdb_movie(2, title="Remake"))
+
+    summary = Normalizer(session, source, batch_size=10, workers=2, extractors=ExtractorCache()).run()
+
+    assert (summary.payloads, summary.records, summary.films_created, summary.batches) == (9, 8, 8, 1)
+    film = session.scalars(select(Film).join(Identifier).where(Identifier.value == "2")).one()
+    assert [title.title for title in film.titles] == ["Remake"]
+
+
+def test_invalid_claims_are_rejected_without_failing_the_batch(session):
+    source = add_source(session, "tmdb", TMDB_MAPPING)
+    movie = tmdb_movie(603, genres=("Action", "x" * 101), runtime=-5)
+    movie["release_date"] = "0999-03-30"
+    store(session, source, movie, tmdb_movie(604))
+
+    summary = Normalizer(session, source, extractors=ExtractorCache()).run()
+
+    assert (summary.records, summary.films_created, summary.rejected) == (2, 2, 3)
+    assert summary.rejects == {
+        "films.runtime_minutes: out_of_range": 1,
+        "releases.date: out_of_range": 1,
+        "metadata_assertions.value: too_long": 1,
+    }
+    film = session.scalars(select(Film).join(Identifier).where(Identifier.value == "603")).one()
+    assert (film.runtime_minutes, film.original_language) == (None, "en")
+    assert [assertion.value for assertion in film.assertions] == ["Action"]
+    assert film.releases == []
+
+
+@pytest.mark.parametrize("loads", [normalize._loads, json.loads], ids=["default", "stdlib"])
+def test_identical_payloads_keep_their_resource_keys(session, monkeypatch, loads):
+    monkeypatch.setattr(normalize, "_loads", loads)
+    mapping = {key: path for key, path in TMDB_MAPPING.items() if key not in ("id", "imdb_id")}
+    source = add_source(session, "tmdb", mapping)
+    movie = tmdb_movie(603)
+    movie["credits"] = {"cast": [{"id": index, "name": f"Actor {index}"} for index in range(500)]}
+    raw_store = RawStore(session, source)
+    for resource_key in ("603", "604"):
+        raw_store.put("films", json.dumps(movie).encode(), resource_key=resource_key)
+    raw_store.put("films", b'{"title": NaN', resource_key="605")
+    raw_store.flush()
+    session.commit()
+
+    summary = Normalizer(session, source, extractors=ExtractorCache()).run()
+
+    assert (summary.payloads, summary.records, summary.skipped) == (3, 2, 1)
+    assert set(session.scalars(select(Identifier.value))) == {"603", "604"}
+
+
+def test_source_without_mapping_cannot_be_normalized(session):
+    source = DataSource(name="imdb", kind="file")
+    session.add(source)
+    session.commit()
+
+    with pytest.raises(CapabilityNotConfiguredError):
+        Normalizer(session, source)
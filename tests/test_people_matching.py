@@ -0,0 +1,124 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import AlternateName, Base, Person
+from open_cinema_index.services import people_matching
+from open_cinema_index.services.people_matching import (
+    PersonBlockingIndex,
+    PersonMatch,
+    PersonNameIndex,
+    blocking_keys,
+    person_candidates,
+    phonetic_key,
+    score_person_candidates,
+    soundex,
+)
+from open_cinema_index.services.title_matching import title_shingles
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def add_person(session, name, born=None, alternate_names=()):
+    person = Person(name=name, birth_date=born)
+    person.alternate_names = [AlternateName(name=alternate) for alternate in alternate_names]
+    session.add(person)
+    session.flush()
+    return person.id
+
+
+def test_phonetic_keys_ignore_spelling_and_word_order():
+    assert soundex("robert") == soundex("rupert") == "R163"
+    assert soundex("ashcraft") == "A261"
+    assert soundex("тарковский") == ""
+    assert phonetic_key("John Smith") == phonetic_key("Jon Smyth") == phonetic_key("Smith, John")
+    assert phonetic_key("John Ronald Smith") == phonetic_key("John Smith")
+    assert phonetic_key("Андрей Тарковский") == "андреи+тарковскии"
+
+
+def test_join_blocks_on_trigrams_and_sounds_within_birth_years():
+    index = PersonBlockingIndex()
+    names = [
+        (1, "Akira Kurosawa", date(1910, 3, 23)),
+        (2, "Kurosawa Akira", None),
+        (3, "Akira Kurosawa", date(1950, 1, 1)),
+        (4, "Jon Smyth", date(1911, 1, 1)),
+        (5, "John Smith", date(1910, 6, 1)),
+        (5, "Johnny Smith", date(1910, 6, 1)),
+        (6, "Ingmar Bergman", None),
+    ]
+
+    assert list(index.join(names)) == [(1, 2), (2, 3), (4, 5)]
+    assert len(index) == 7
+
+
+def test_sketch_collisions_never_hide_similar_names(monkeypatch):
+    # With a one-bit sketch every trigram collides; the filter must still let similar names through.
+    monkeypatch.setattr(people_matching, "_SKETCH_MASK", 0)
+    names = [(1, "Akira Kurosawa", None), (2, "Akira Kurosava", None), (3, "Ingmar Bergman", None)]
+
+    assert list(PersonBlockingIndex().join(names)) == [(1, 2)]
+
+
+def test_blocking_keys_prefer_rare_trigrams():
+    frequencies = dict.fromkeys(title_shingles("Akira Kurosawa"), 10) | {"kir": 3, "aki": 900}
+
+    trigrams, phonetic = blocking_keys("Akira Kurosawa", frequencies)
+
+    assert trigrams[0] == "kir"
+    assert len(trigrams) == 9
+    assert "aki" not in trigrams
+    assert phonetic == phonetic_key("Akira Kurosawa")
+    assert blocking_keys("Akira Kurosawa", {phonetic: 101})[1] is None
+
+
+def test_alternate_names_make_people_candidates(session):
+    tarkovsky = add_person(session, "Andrei Tarkovsky", date(1932, 4, 4), alternate_names=["Андрей Тарковский"])
+    cyrillic = add_person(session, "Андрей Тарковский", date(1932, 4, 4))
+    add_person(session, "Andrei Tarkovsky", date(1890, 1, 1))
+    add_person(session, "Arseny Tarkovsky", date(1907, 6, 25))
+    PersonNameIndex(session).rebuild()
+
+    candidates = list(person_candidates(session))
+
+    assert (tarkovsky, cyrillic) in candidates
+    assert list(person_candidates(session, person_ids=[cyrillic])) == [(tarkovsky, cyrillic)]
+    assert list(score_person_candidates(session, candidates)) == [PersonMatch(tarkovsky, cyrillic, 1.0)]
+
+
+def test_name_index_updates_changed_people_and_their_key_counts(session):
+    kurosawa = add_person(session, "Akira Kurosawa", date(1910, 3, 23))
+    kiyoshi = add_person(session, "Kiyoshi Kurosawa", date(1955, 7, 19))
+    bergman = add_person(session, "Ingmar Bergman", date(1918, 7, 14))
+    names = PersonNameIndex(session)
+    assert names.update([]) == 3
+
+    romanized = add_person(session, "Kurosawa Akira", None)
+    session.execute(Person.__table__.update().where(Person.id == bergman).values(name="Ernst Ingmar Bergman"))
+    session.execute(Person.__table__.delete().where(Person.id == kiyoshi))
+    assert names.update([romanized, bergman, kiyoshi]) == 2
+
+    assert names.people_with(["kur", "ros"]) == {kurosawa, romanized}
+    assert names.people_with(["kur"], phonetic_key("Kurosawa Akira")) == {kurosawa, romanized}
+    assert list(person_candidates(session, person_ids=[romanized])) == [(kurosawa, romanized)]
+    counts = names.frequencies()
+    assert counts["kur"] == 2
+    assert names.rebuild() == 3
+    assert names.frequencies() == counts
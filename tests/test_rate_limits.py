@@ -0,0 +1,190 @@
+import asyncio
+import multiprocessing
+import random
+
+import pytest
+
+from open_cinema_index.models import DataSource, DataSourceRateLimit
+from open_cinema_index.services.rate_limits import (
+    RateLimiter,
+    RateLimiterRegistry,
+    RateLimitExceededError,
+    RateLimitSpec,
+    SharedRateLimiter,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_bucket_allows_max_calls_then_waits_for_the_window():
+    clock = FakeClock()
+    limiter = RateLimiter([RateLimitSpec(window_seconds=10, max_calls=40)], clock=clock)
+
+    assert all(limiter.try_acquire() for _ in range(40))
+    assert limiter.try_acquire() is False
+    assert limiter.delay() == pytest.approx(10.0)
+
+    clock.now += 10
+    assert limiter.try_acquire() is True
+
+
+@pytest.mark.parametrize(
+    "specs",
+    [
+        [RateLimitSpec(window_seconds=10, max_calls=40)],
+        [RateLimitSpec(window_seconds=10, max_calls=40, burst=5)],
+        [RateLimitSpec(window_seconds=1, max_calls=4), RateLimitSpec(window_seconds=10, max_calls=25, burst=10)],
+    ],
+)
+def test_no_window_ever_holds_more_than_max_calls(specs):
+    clock = FakeClock()
+    limiter = RateLimiter(specs, clock=clock)
+    idle = random.Random(2)
+    sends = []
+    for _ in range(500):
+        if idle.random() < 0.05:
+            clock.now += idle.uniform(0, 15)
+        clock.now += limiter.reserve()
+        sends.append(clock.now)
+
+    for spec in specs:
+        spans = [later - earlier for earlier, later in zip(sends, sends[spec.max_calls :], strict=False)]
+        assert min(spans) >= spec.window_seconds - 1e-6
+
+
+def test_burst_caps_back_to_back_calls():
+    clock = FakeClock()
+    limiter = RateLimiter([RateLimitSpec(window_seconds=10, max_calls=40, burst=5)], clock=clock)
+
+    assert all(limiter.try_acquire() for _ in range(5))
+    assert limiter.try_acquire() is False
+
+
+def test_acquire_waits_on_every_window():
+    clock = FakeClock()
+    limiter = RateLimiter(
+        [RateLimitSpec(window_seconds=1, max_calls=10), RateLimitSpec(window_seconds=60, max_calls=2)],
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+    async def acquire_three():
+        for _ in range(3):
+            await limiter.acquire()
+
+    asyncio.run(acquire_three())
+
+    # The per-minute window is the binding one: two calls at once, then a third once the minute is up.
+    assert clock.sleeps == [pytest.approx(60.0)]
+
+
+def test_reserve_respects_max_wait_without_booking():
+    clock = FakeClock()
+    limiter = RateLimiter([RateLimitSpec(window_seconds=60, max_calls=1)], clock=clock)
+    limiter.reserve()
+
+    with pytest.raises(RateLimitExceededError):
+        limiter.reserve(max_wait=5)
+    assert limiter.delay() == pytest.approx(60.0)
+
+
+def test_concurrent_waiters_are_queued_in_order():
+    clock = FakeClock()
+    limiter = RateLimiter([RateLimitSpec(window_seconds=1, max_calls=2, burst=1)], clock=clock)
+
+    delays = [limiter.reserve() for _ in range(4)]
+
+    assert delays == [0.0, pytest.approx(0.5), pytest.approx(1.0), pytest.approx(1.5)]
+
+
+def test_pause_holds_calls_then_resumes_without_burst(tmp_path):
+    clock = FakeClock()
+    limiter = RateLimiter([RateLimitSpec(window_seconds=10, max_calls=40)], clock=clock)
+    shared = SharedRateLimiter([RateLimitSpec(window_seconds=10, max_calls=40)], tmp_path / "tmdb.gcra", clock=clock)
+    other = SharedRateLimiter([RateLimitSpec(window_seconds=10, max_calls=40)], tmp_path / "tmdb.gcra", clock=clock)
+
+    limiter.pause(30)
+    shared.pause(30)
+
+    assert limiter.delay() == pytest.approx(30.0)
+    assert other.delay() == pytest.approx(30.0)
+    clock.now += 30
+    assert limiter.try_acquire() is True
+    assert limiter.try_acquire() is False
+    shared.close()
+    other.close()
+
+
+def test_registry_reuses_limiter_until_limits_change():
+    registry = RateLimiterRegistry()
+    source = DataSource(id=1, name="tmdb")
+    source.rate_limits = [DataSourceRateLimit(window_seconds=10, max_calls=40)]
+
+    limiter = registry.for_source(source)
+    assert registry.for_source(source) is limiter
+
+    source.rate_limits[0].max_calls = 20
+    assert registry.for_source(source) is not limiter
+
+
+def test_shared_limiter_persists_buckets_in_state_file(tmp_path):
+    clock = FakeClock()
+    specs = [RateLimitSpec(window_seconds=10, max_calls=3)]
+    first = SharedRateLimiter(specs, tmp_path / "tmdb.gcra", clock=clock)
+    second = SharedRateLimiter(specs, tmp_path / "tmdb.gcra", clock=clock)
+
+    assert first.try_acquire() is True
+    assert second.try_acquire() is True
+    assert first.try_acquire() is True
+    assert second.try_acquire() is False
+    assert first.delay() == pytest.approx(second.delay())
+
+    first.close()
+    second.close()
+
+
+def _drain_shared_bucket(path, results):
+    limiter = SharedRateLimiter([RateLimitSpec(window_seconds=3600, max_calls=50)], path)
+    granted = 0
+    for _ in range(100):
+        granted += limiter.try_acquire()
+    limiter.close()
+    results.put(granted)
+
+
+def test_shared_limiter_is_one_quota_across_processes(tmp_path):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    workers = [
+        context.Process(target=_drain_shared_bucket, args=(tmp_path / "wikidata.gcra", results)) for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sum(results.get() for _ in workers) == 50
+
+
+def test_registry_with_state_dir_hands_out_shared_limiters(tmp_path):
+    registry = RateLimiterRegistry(state_dir=tmp_path)
+    source = DataSource(id=1, name="tmdb")
+    source.rate_limits = [DataSourceRateLimit(window_seconds=10, max_calls=40)]
+
+    limiter = registry.for_source(source)
+
+    assert isinstance(limiter, SharedRateLimiter)
+    assert limiter.path.parent == tmp_path
+    assert limiter.path.name.startswith("tmdb-")
+    registry.close()
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import Base, DataSource, RawBlob, RawData
+from open_cinema_index.services.raw_store import RawPayloadNotFoundError, RawStore, build_dictionary
+from open_cinema_index.services.stub_server import film_document
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def source(session):
+    source = DataSource(name="tmdb", kind="rest", base_url="https://api.themoviedb.org/3")
+    session.add(source)
+    session.commit()
+    return source
+
+
+def film_payload(film_id):
+    return json.dumps(film_document(str(film_id))).encode()
+
+
+def test_refetching_unchanged_payloads_adds_references_not_blobs(session, source):
+    first = RawStore(session, source)
+    for film_id in range(20):
+        first.put("films", film_payload(film_id), resource_key=str(film_id))
+    first.flush()
+
+    second = RawStore(session, source)
+    for film_id in range(20):
+        second.put("films", film_payload(film_id), resource_key=str(film_id))
+    second.flush()
+    session.commit()
+
+    assert first.stats.new_blobs == 20
+    assert second.stats.new_blobs == 0
+    assert second.stats.deduplicated == 20
+    assert session.scalar(select(func.count()).select_from(RawBlob)) == 20
+    assert session.scalar(select(func.count()).select_from(RawData)) == 40
+
+
+def test_payloads_are_compressed_and_round_trip(session, source):
+    store = RawStore(session, source)
+    payload = json.dumps([film_document(str(film_id)) for film_id in range(50)]).encode()
+
+    digest = store.put("films", payload)
+    store.flush()
+
+    blob = session.get(RawBlob, digest)
+    assert blob.codec == "zlib"
+    assert blob.stored_size < blob.size / 3
+    assert store.read_payload(digest) == payload
+
+
+def test_open_payload_streams_in_bounded_chunks(session, source):
+    store = RawStore(session, source)
+    payload = b"x" * 500_000
+    digest = store.put("dumps", payload)
+    store.flush()
+
+    chunks = list(store.iter_payload(digest, chunk_size=4096))
+    assert max(len(chunk) for chunk in chunks) <= 4096
+    assert b"".join(chunks) == payload
+    with store.open_payload(digest) as reader:
+        assert reader.read(10) == b"x" * 10
+        assert len(reader.read()) == len(payload) - 10
+
+
+def test_dictionary_codec_shrinks_small_documents(session, source):
+    samples = [film_payload(film_id) for film_id in range(100, 200)]
+    plain = RawStore(session, source)
+    trained = RawStore(session, source, dictionary=build_dictionary(samples))
+
+    plain_digest = plain.put("films", film_payload(1))
+    plain.flush()
+    trained_digest = trained.put("films", film_payload(2))
+    trained.flush()
+
+    plain_blob = session.get(RawBlob, plain_digest)
+    trained_blob = session.get(RawBlob, trained_digest)
+    assert trained_blob.codec == "zlib-dict"
+    assert trained_blob.stored_size < plain_blob.stored_size
+    # A fresh store finds the dictionary through the blob row.
+    assert RawStore(session, source).read_payload(trained_digest) == film_payload(2)
+    assert RawStore(session, source).read_payloads([plain_digest, trained_digest, "0" * 64]) == {
+        plain_digest: film_payload(1),
+        trained_digest: film_payload(2),
+    }
+
+
+def test_unknown_digest_raises(session, source):
+    with pytest.raises(RawPayloadNotFoundError):
+        RawStore(session, source).read_payload("0" * 64)
@@ -0,0 +1,210 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from typer.testing import CliRunner
+
+from open_cinema_index.cli import _refresh_due, _run_requests, app
+from open_cinema_index.models import (
+    Base,
+    DataSource,
+    DataSourceCapability,
+    DataSourceCredential,
+    DataSourceRateLimit,
+    DataSourceRefreshPolicy,
+    Film,
+    Identifier,
+    RefreshScheduleEntry,
+)
+from open_cinema_index.services.data_sources import DataSourceService
+from open_cinema_index.services.fetch import requests_for_ids
+from open_cinema_index.services.http_client import HttpClientRegistry
+from open_cinema_index.services.raw_store import RawStore
+from open_cinema_index.services.refresh import (
+    RefreshNotConfiguredError,
+    RefreshScheduler,
+    refresh_requests,
+    request_budget,
+)
+from open_cinema_index.services.stub_server import StubSourceServer
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def add_source(session, name="tmdb", endpoint_path="/movie/{id}", interval_minutes=60 * 24):
+    source = DataSource(name=name, kind="rest", base_url="https://api.example.org")
+    session.add(source)
+    session.commit()
+    session.add_all(
+        [
+            DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path=endpoint_path),
+            DataSourceRefreshPolicy(data_source_id=source.id, default_refresh_interval_minutes=interval_minutes),
+        ]
+    )
+    session.commit()
+    return source
+
+
+def schedule(session):
+    return {
+        entry.resource_key: entry.next_due_at.replace(tzinfo=timezone.utc)
+        for entry in session.scalars(select(RefreshScheduleEntry))
+    }
+
+
+def test_claim_leases_most_overdue_records_first(session):
+    source = add_source(session)
+    scheduler = RefreshScheduler(session, source)
+    now = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+    for key, days_ago in [("fresh", 0), ("older", 3), ("oldest", 5), ("old", 2)]:
+        scheduler.track([key], fetched_at=now - timedelta(days=days_ago))
+
+    assert scheduler.claim(2, now=now) == ["oldest", "older"]
+    assert scheduler.claim(2, now=now) == ["old"]
+    assert schedule(session)["oldest"] == now + timedelta(days=1)
+
+    scheduler.release(["older"], now=now)
+    assert scheduler.claim(10, now=now) == ["older"]
+
+
+def test_budget_fills_tightest_window_for_every_active_credential(session):
+    source = add_source(session)
+    session.add_all(
+        [
+            DataSourceRateLimit(data_source_id=source.id, window_seconds=1, max_calls=40),
+            DataSourceRateLimit(data_source_id=source.id, window_seconds=3600, max_calls=100_000),
+            DataSourceCredential(data_source_id=source.id, kind="api_key", token="a"),
+            DataSourceCredential(data_source_id=source.id, kind="api_key", token="b"),
+            DataSourceCredential(
+                data_source_id=source.id,
+                kind="api_key",
+                token="old",
+                expired_at=datetime.now(timezone.utc) - timedelta(days=1),
+            ),
+        ]
+    )
+    session.commit()
+
+    assert request_budget(source, timedelta(minutes=60)) == 2 * 100_000
+    assert request_budget(source, timedelta(seconds=30)) == 2 * 833
+    assert request_budget(add_source(session, name="imdb"), timedelta(minutes=60)) is None
+    with pytest.raises(RefreshNotConfiguredError):
+        RefreshScheduler(session, add_source(session, name="omdb", interval_minutes=None))
+
+
+def test_sync_identifiers_only_reads_new_identifiers(session):
+    source = add_source(session)
+    scheduler = RefreshScheduler(session, source)
+    films = [Film(), Film()]
+    session.add_all(films)
+    session.flush()
+    session.add_all(
+        [
+            Identifier(film_id=films[0].id, scheme="tmdb", value="603"),
+            Identifier(film_id=films[0].id, scheme="imdb", value="tt0133093"),
+        ]
+    )
+    session.flush()
+    scheduler.track(["603"], fetched_at=datetime.now(timezone.utc))
+
+    assert scheduler.sync_identifiers() == 1
+    assert schedule(session)["603"] > datetime.now(timezone.utc)
+
+    session.add(Identifier(film_id=films[1].id, scheme="tmdb", value="604"))
+    session.flush()
+
+    assert scheduler.sync_identifiers() == 1
+    assert scheduler.sync_identifiers() == 0
+    assert scheduler.claim(10) == ["604"]
+    assert {entry.resource_key: entry.film_id for entry in session.scalars(select(RefreshScheduleEntry))} == {
+        "603": films[0].id,
+        "604": films[1].id,
+    }
+
+
+def test_refresh_reschedules_fetched_records_and_drops_missing_ones(session):
+    with StubSourceServer() as server:
+        source = add_source(session)
+        source.base_url = server.base_url
+        session.commit()
+        RefreshScheduler(session, source).track(["1", "2"], fetched_at=datetime.now(timezone.utc) - timedelta(days=2))
+        server.missing_ids = {"2"}
+        clients = HttpClientRegistry()
+
+        failed = _refresh_due(
+            session, DataSourceService(session), clients, budget=timedelta(minutes=1), concurrency=2, pool_size=None
+        )
+        clients.close()
+
+    due = schedule(session)
+    assert failed is False
+    assert sorted(due) == ["1"]
+    assert due["1"] > datetime.now(timezone.utc) + timedelta(hours=23)
+
+
+def test_explicit_fetch_reschedules_records_answered_not_modified(session):
+    with StubSourceServer() as server:
+        source = add_source(session)
+        source.base_url = server.base_url
+        source.refresh_policy.supports_etags = True
+        session.commit()
+        service = DataSourceService(session)
+        clients = HttpClientRegistry()
+
+        def fetch_film():
+            plan = service.prepare_fetch("tmdb")
+            summary = _run_requests(
+                session,
+                service,
+                plan,
+                RawStore(session, source, plan.run),
+                clients.client_for(source),
+                requests_for_ids(source, "films", ["1"]),
+                {},
+                concurrency=1,
+                scheduler=RefreshScheduler(session, source),
+            )
+            session.commit()
+            return summary
+
+        fetch_film()
+        RefreshScheduler(session, source).track(["1"], fetched_at=datetime.now(timezone.utc) - timedelta(days=2))
+        session.commit()
+        unchanged = fetch_film()
+        clients.close()
+
+    assert unchanged.not_modified == 1
+    assert schedule(session)["1"] > datetime.now(timezone.utc) + timedelta(hours=23)
+
+
+def test_fetch_options_without_a_source_are_rejected():
+    result = CliRunner().invoke(app, ["fetch", "--film-id", "603"])
+
+    assert result.exit_code == 2
+    assert "need a source" in result.output
+
+
+def test_sparql_refresh_batches_map_back_to_their_records(session):
+    source = add_source(session, name="wikidata", endpoint_path="/sparql?query={query}")
+    qids = [f"Q{number}" for number in range(450)]
+
+    batches = refresh_requests(source, "films", qids)
+
+    assert [len(keys) for keys in batches.values()] == [200, 200, 50]
+    assert [key for keys in batches.values() for key in keys] == qids
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import Base, DataSource, DataSourceCapability, Identifier
+from open_cinema_index.services.mappings import ExtractorCache
+from open_cinema_index.services.normalize import Normalizer
+from open_cinema_index.services.raw_store import RawStore
+from open_cinema_index.services.resolve import (
+    IdentifierIndex,
+    MergeCandidate,
+    film_merge_candidates,
+)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def test_join_keys_numeric_schemes_by_number():
+    index = IdentifierIndex()
+    claims = [
+        ("imdb", "tt0133093", 1),
+        ("tmdb", "603", 1),
+        ("imdb", "tt0133093", 1),
+        ("imdb", "tt0133093", 2),
+        ("tmdb", "0603", 0),
+        ("wikidata", "Q83495", 2),
+        ("letterboxd", "the-matrix", 4),
+        ("letterboxd", "the-matrix", 5),
+    ]
+
+    assert list(index.join(claims)) == [
+        MergeCandidate(1, 2, "imdb", "tt0133093"),
+        MergeCandidate(0, 1, "tmdb", "0603"),
+        MergeCandidate(4, 5, "letterboxd", "the-matrix"),
+    ]
+    assert len(index) == 4
+    assert index.film_for("wikidata", "Q83495") == 2
+    assert index.film_for("imdb", "tt9999999") is None
+
+
+def test_identifiers_claimed_by_two_sources_become_merge_candidates(session):
+    mappings = {
+        "tmdb": {"id": "id", "title": "title", "imdb_id": "imdb_id"},
+        "wikidata": {"id": "film", "title": "title", "imdb_id": "imdb", "tmdb_id": "tmdb"},
+    }
+    sources = {}
+    for name, mapping in mappings.items():
+        sources[name] = DataSource(name=name, kind="rest")
+        session.add(sources[name])
+        session.flush()
+        session.add(
+            DataSourceCapability(
+                data_source_id=sources[name].id, capability="films", payload_mapping=json.dumps(mapping)
+            )
+        )
+    session.commit()
+    payloads = {
+        "tmdb": [{"id": 603, "title": "The Matrix", "imdb_id": "tt0133093"}, {"id": 604, "title": "Reloaded"}],
+        "wikidata": [
+            {"film": "Q83495", "title": "The Matrix", "imdb": "tt0133093", "tmdb": "603"},
+            {"film": "Q189600", "title": "Ghost in the Shell", "imdb": "tt0113568"},
+        ],
+    }
+    for name, documents in payloads.items():
+        raw_store = RawStore(session, sources[name])
+        for document in documents:
+            raw_store.put("films", json.dumps(document).encode())
+        raw_store.flush()
+        Normalizer(session, sources[name], extractors=ExtractorCache()).run()
+    session.commit()
+
+    matrix = session.scalar(select(Identifier.film_id).where(Identifier.value == "603", Identifier.source == "tmdb"))
+    matrix_wikidata = session.scalar(select(Identifier.film_id).where(Identifier.value == "Q83495"))
+
+    assert sorted(film_merge_candidates(session), key=lambda candidate: candidate.scheme) == [
+        MergeCandidate(matrix, matrix_wikidata, "imdb", "tt0133093"),
+        MergeCandidate(matrix, matrix_wikidata, "tmdb", "603"),
+    ]
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import Base, DataSource, DataSourceCapability, DataSourceRateLimit
+from open_cinema_index.services.data_sources import DataSourceService
+from open_cinema_index.services.fetch import FetchEngine, requests_for_ids
+from open_cinema_index.services.http_client import TransportResponse
+from open_cinema_index.services.retries import RetryPolicy, RetryScheduler, parse_retry_after
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def source(session):
+    source = DataSource(name="tmdb", kind="rest", base_url="https://api.example.org")
+    session.add(source)
+    session.commit()
+    session.add(DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path="/movie/{id}"))
+    session.commit()
+    return source
+
+
+class ScriptedTransport:
+    """Answers each path with its scripted error responses first, then with 200."""
+
+    def __init__(self, script):
+        self.script = {path: list(responses) for path, responses in script.items()}
+        self.calls = []
+
+    async def get(self, url, headers):  # noqa: ARG002 - transport interface
+        path = url.removeprefix("https://api.example.org")
+        self.calls.append((path, time.monotonic()))
+        responses = self.script.get(path)
+        if responses:
+            status, response_headers = responses.pop(0)
+            return TransportResponse(status, response_headers, b"{}")
+        return TransportResponse(200, {}, b'{"id": 1}')
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates():
+    now = datetime(2026, 10, 17, 12, 0, 0, tzinfo=timezone.utc)
+
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Sat, 17 Oct 2026 12:00:30 GMT", now=now) == 30.0
+    assert parse_retry_after("Sat, 17 Oct 2026 11:00:00 GMT", now=now) == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_policy_uses_most_cautious_rate_limit_rows():
+    source = DataSource(
+        name="tmdb",
+        rate_limits=[
+            DataSourceRateLimit(window_seconds=1, max_calls=40, retry_delay_seconds=2, max_retries=5),
+            DataSourceRateLimit(window_seconds=60, max_calls=1000, retry_delay_seconds=10, max_retries=3),
+        ],
+    )
+
+    policy = RetryPolicy.for_data_source(source)
+
+    assert (policy.retry_delay, policy.max_retries) == (10.0, 3)
+    assert [policy.backoff(attempt) for attempt in (1, 2, 3)] == [10.0, 20.0, 40.0]
+
+
+def test_scheduler_releases_items_in_due_order():
+    released = []
+
+    async def scenario():
+        scheduler = RetryScheduler(released.append)
+        task = asyncio.create_task(scheduler.run())
+        scheduler.schedule("late", 0.06)
+        scheduler.schedule("early", 0.02)
+        await asyncio.sleep(0)
+        scheduler.schedule("earliest", 0.0)
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(scenario())
+
+    assert released == ["earliest", "early", "late"]
+
+
+def test_parked_requests_do_not_block_other_requests(session, source):
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+    transport = ScriptedTransport({"/movie/1": [(503, {}), (502, {})]})
+
+    engine = FetchEngine(service, plan, transport=transport, concurrency=1, retry_policy=RetryPolicy(retry_delay=0.05))
+    summary = asyncio.run(engine.run(requests_for_ids(source, "films", ["1", "2", "3"])))
+
+    assert [path for path, _ in transport.calls] == ["/movie/1", "/movie/2", "/movie/3", "/movie/1", "/movie/1"]
+    assert summary.fetched == 3
+    assert summary.requested == 3
+    assert plan.run.status == "success"
+    assert plan.run.retry_count == 2
+    assert plan.run.backoff_seconds == pytest.approx(0.15)
+
+
+def test_too_many_requests_pauses_source_until_retry_after(session, source):
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+    transport = ScriptedTransport({"/movie/1": [(429, {"retry-after": "1"}), (429, {"retry-after": "1"})]})
+
+    engine = FetchEngine(service, plan, transport=transport, retry_policy=RetryPolicy(max_retries=1))
+    summary = asyncio.run(engine.run(requests_for_ids(source, "films", ["1"])))
+    followers = asyncio.run(
+        FetchEngine(service, service.prepare_fetch("tmdb"), transport=transport).run(
+            requests_for_ids(source, "films", ["2"])
+        )
+    )
+
+    (_, first), (_, retried), (_, follower) = transport.calls
+    assert retried - first >= 0.9
+    assert follower - first >= 1.9
+    assert summary.failed == 1
+    assert "HTTP 429 after 1 retries" in plan.run.error
+    assert followers.fetched == 1
+
+
+def test_long_waits_are_capped_at_max_delay(session, source):
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+    transport = ScriptedTransport({"/movie/1": [(503, {"retry-after": "3600"}), (503, {}), (503, {})]})
+    policy = RetryPolicy(retry_delay=0.1, backoff_multiplier=10.0, max_delay=0.2)
+
+    engine = FetchEngine(service, plan, transport=transport, retry_policy=policy)
+    summary = asyncio.run(engine.run(requests_for_ids(source, "films", ["1"])))
+
+    sent = [at for _, at in transport.calls]
+    assert len(sent) == 4
+    assert all(0.15 <= later - earlier < 5 for earlier, later in zip(sent, sent[1:], strict=False))
+    assert summary.failed == 0
+    assert summary.fetched == 1
+    assert plan.run.retry_count == 3
+    assert plan.run.backoff_seconds == pytest.approx(0.6, abs=0.03)
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import Base, DataSource, DataSourceCapability
+from open_cinema_index.services.data_sources import DataSourceService
+from open_cinema_index.services.fetch import FetchEngine, requests_for_ids
+from open_cinema_index.services.single_flight import SingleFlight
+from open_cinema_index.services.stub_server import StubSourceServer
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def stub_server():
+    with StubSourceServer(latency=0.05) as server:
+        yield server
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch_person():
+        calls.append("person/42")
+        await asyncio.sleep(0.01)
+        return {"id": 42}
+
+    async def scenario():
+        return await asyncio.gather(*(flights.run("person/42", fetch_person) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert all(result == {"id": 42} for result, _ in results)
+    assert (flights.stats.calls, flights.stats.joined) == (1, 4)
+
+
+def test_results_are_reused_until_ttl_and_errors_are_not():
+    clock = FakeClock()
+    flights = SingleFlight(ttl=30, cacheable=lambda status: status == 200, clock=clock)
+    statuses = iter([200, 200, 503, 503])
+
+    async def call():
+        return next(statuses)
+
+    async def failing():
+        raise ConnectionError("reset")
+
+    async def scenario():
+        first = await flights.run("film/1", call)
+        repeat = await flights.run("film/1", call)
+        clock.now += 31
+        expired = await flights.run("film/1", call)
+        unavailable = [await flights.run("film/2", call) for _ in range(2)]
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await flights.run("film/3", failing)
+        return first, repeat, expired, unavailable
+
+    first, repeat, expired, unavailable = asyncio.run(scenario())
+
+    assert (first, repeat, expired) == ((200, False), (200, True), (200, False))
+    assert unavailable == [(503, False), (503, False)]
+    assert flights.stats.calls == 6
+
+
+def test_engine_sends_duplicate_requests_once(session, stub_server):
+    source = DataSource(name="tmdb", kind="rest", base_url=stub_server.base_url)
+    session.add(source)
+    session.commit()
+    session.add(DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path="/movie/{id}"))
+    session.commit()
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("tmdb")
+    fetched = []
+
+    engine = FetchEngine(service, plan, concurrency=4, sink=fetched.append)
+    summary = asyncio.run(engine.run(requests_for_ids(source, "films", ["1", "1", "1", "2"])))
+
+    assert stub_server.requests_served == 2
+    assert summary.coalesced == 2
+    assert summary.fetched == 4
+    assert len(fetched) == 4
@@ -0,0 +1,106 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.models import Base, Film, Release, Title
+from open_cinema_index.services.title_matching import (
+    BANDS,
+    TitleLshIndex,
+    TitleMatch,
+    band_buckets,
+    minhash,
+    normalize_title,
+    score_candidates,
+    title_shingles,
+)
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+def add_film(session, title, year=None, runtime=None):
+    film = Film(runtime_minutes=runtime)
+    session.add(film)
+    session.flush()
+    session.add(Title(film_id=film.id, title=title))
+    if year is not None:
+        session.add(Release(film_id=film.id, date=date(year, 1, 1)))
+    session.flush()
+    return film.id
+
+
+def test_similar_titles_share_a_band_bucket():
+    assert normalize_title("  Amélie: Le Fabuleux Destin!") == "amelie le fabuleux destin"
+    assert title_shingles("Up") == {" up", "up "}
+
+    def buckets(title):
+        return set(enumerate(band_buckets(minhash(title_shingles(title)))))
+
+    assert buckets("The Matrix") == buckets("the matrix!")
+    assert buckets("Le Fabuleux Destin d'Amélie Poulain") & buckets("Le fabuleux destin d'Amelie Poulain ")
+    assert not buckets("The Matrix") & buckets("Ghost in the Shell")
+
+
+def test_index_updates_incrementally_and_blocks_by_year(session):
+    matrix = add_film(session, "The Matrix", 1999, runtime=136)
+    matrix_again = add_film(session, "Matrix, The", 1999, runtime=138)
+    add_film(session, "The Matrix", 1933)
+    add_film(session, "Ghost in the Shell", 1995)
+    index = TitleLshIndex(session)
+
+    assert index.update() == 4
+    assert index.update() == 0
+    assert set(index.candidates()) == {(matrix, matrix_again)}
+    [match] = score_candidates(session, index.candidates())
+    assert (match.film_id, match.other_film_id) == (matrix, matrix_again)
+    assert match.score > 0.5
+
+    reloaded = add_film(session, "The Matrix Reloaded", 2000, runtime=138)
+    assert index.update() == 1
+    assert set(index.candidates(film_ids=[reloaded])) <= {(matrix, reloaded), (matrix_again, reloaded)}
+    assert list(index.candidates(film_ids=[matrix_again, matrix])).count((matrix, matrix_again)) == 1
+
+    # Replaced titles take their buckets with them.
+    session.execute(Title.__table__.delete().where(Title.film_id == matrix_again))
+    assert (matrix, matrix_again) not in set(index.candidates())
+
+
+def test_late_releases_move_buckets_to_their_year(session):
+    matrix = add_film(session, "The Matrix", 1999)
+    undated = add_film(session, "The Matrix")
+    index = TitleLshIndex(session)
+    index.update()
+    assert list(index.candidates(film_ids=[undated])) == []
+
+    session.add(Release(film_id=undated, date=date(1999, 3, 31)))
+    session.flush()
+    assert index.refresh_years([undated]) == BANDS
+    assert index.refresh_years() == 0
+
+    assert list(index.candidates(film_ids=[undated])) == [(matrix, undated)]
+
+
+def test_runtime_gap_lowers_the_score(session):
+    close = add_film(session, "Solaris", 1972, runtime=167)
+    remake = add_film(session, "Solaris", 1972, runtime=99)
+    same = add_film(session, "Solaris", 1972, runtime=165)
+
+    matches = list(score_candidates(session, [(close, remake), (close, same)], threshold=0.0))
+
+    assert matches == [TitleMatch(close, remake, 0.8), TitleMatch(close, same, 1.0)]
@@ -0,0 +1,55 @@
+from datetime import date
+
+from open_cinema_index.services.validation import (
+    AssertionSchema,
+    AssertionSchemaRegistry,
+    BatchValidator,
+    Reject,
+)
+
+
+def test_claims_are_checked_column_by_column():
+    validator = BatchValidator()
+    titles = [
+        {"title": "The Matrix", "language": "en", "region": "US", "confidence": 90},
+        {"title": "x" * 1001, "language": "en"},
+        {"title": None, "region": "USA", "confidence": 101},
+        {"title": "Line\nbreak", "language": "English"},
+    ]
+    releases = [{"date": date(1999, 3, 31), "release_type": "theatrical"}, {"date": date(1066, 1, 1)}]
+    films = [{"runtime_minutes": 136, "original_language": "en"}, {"runtime_minutes": 0, "original_language": None}]
+
+    assert validator.validate("titles", titles) == [
+        Reject(1, "title", "too_long"),
+        Reject(2, "title", "missing"),
+        Reject(3, "title", "bad_shape"),
+        Reject(3, "language", "bad_shape"),
+        Reject(2, "region", "bad_shape"),
+        Reject(2, "confidence", "out_of_range"),
+    ]
+    assert validator.validate("releases", releases) == [Reject(1, "date", "out_of_range")]
+    assert validator.validate("films", films) == [Reject(1, "runtime_minutes", "out_of_range")]
+    assert validator.validate("identifiers", [{"value": None}]) == []
+
+
+def test_assertions_follow_the_schema_registered_for_their_type():
+    registry = AssertionSchemaRegistry()
+    registry.register(AssertionSchema("tagline", max_length=50, languages=frozenset({"en", "de"})))
+    rows = [
+        {"type": "genre", "value": "Science Fiction"},
+        {"type": "genre", "value": "Science Fiction", "confidence": -1},
+        {"type": "tagline", "value": "Free your mind", "language": "en"},
+        {"type": "tagline", "value": "Befreie deinen Geist", "language": "fr"},
+        {"type": "color_palette", "value": "green"},
+        {"type": "rating", "value": "PG-13\nR"},
+    ]
+
+    assert registry.validator().validate("metadata_assertions", rows) == [
+        Reject(1, "confidence", "out_of_range"),
+        Reject(3, "language", "language_not_allowed"),
+        Reject(4, "type", "unknown_type"),
+        Reject(5, "value", "bad_shape"),
+    ]
+    assert registry.validator() is registry.validator()
+    registry.register(AssertionSchema("color_palette", max_length=20))
+    assert registry.validator().validate("metadata_assertions", rows[4:5]) == []
@@ -0,0 +1,50 @@
+from open_cinema_index.services.vocabulary import (
+    Vocabulary,
+    canonical_genre,
+    canonical_language,
+    canonical_region,
+    canonical_role,
+)
+
+
+def test_language_and_region_codes_are_canonicalized():
+    assert [canonical_language(value) for value in ("en", " EN ", "eng", "fre", "pt-BR", "zh_Hant", "iw")] == [
+        "en",
+        "en",
+        "en",
+        "fr",
+        "pt",
+        "zh",
+        "he",
+    ]
+    assert canonical_language("tlh") == "tlh"
+    assert canonical_language("xx") is None
+    assert canonical_language("English") == "english"
+    assert [canonical_region(value) for value in ("us", "USA", "UK", "gbr", "XK")] == ["US", "US", "GB", "GB", "XK"]
+
+
+def test_labels_are_nfkc_normalized_and_genre_aliases_mapped():
+    assert canonical_genre("science fiction film") == "Science Fiction"
+    assert canonical_genre("Ｓｃｉ-Ｆｉ") == "Science Fiction"
+    assert canonical_genre("  Film   Noir ") == "Film Noir"
+    assert canonical_role("DIRECTOR") == canonical_role("Director") == "director"
+    assert canonical_genre("   ") is None
+
+
+def test_vocabulary_interns_results_and_counts_hits():
+    vocabulary = Vocabulary(maxsize=2)
+    first = vocabulary.language("ENG")
+    second = vocabulary.language("en-GB")
+    assert first is second
+    for _ in range(3):
+        vocabulary.language("ENG")
+    vocabulary.language("de")
+    vocabulary.language("fr")
+
+    stats = vocabulary.stats()["language"]
+    assert (stats.hits, stats.misses, stats.size) == (3, 4, 2)
+    assert stats.hit_rate == 3 / 7
+    assert vocabulary.stats()["genre"].hit_rate == 0.0
+
+    vocabulary.clear()
+    assert vocabulary.stats()["language"].size == 0
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from open_cinema_index.cli import _run_requests
+from open_cinema_index.models import Base, DataSource, DataSourceCapability, Film, RawData
+from open_cinema_index.services.data_sources import DataSourceService
+from open_cinema_index.services.fetch import FetchEngine, build_url
+from open_cinema_index.services.http_client import TransportResponse
+from open_cinema_index.services.mappings import ExtractorCache
+from open_cinema_index.services.normalize import Normalizer
+from open_cinema_index.services.raw_store import RawStore
+from open_cinema_index.services.wikidata import ENTITY_PREFIX, WikidataFilmPlanner, uses_sparql
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite:///:memory:")
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def source(session):
+    source = DataSource(name="wikidata", kind="rest", base_url="https://query.wikidata.org/sparql")
+    session.add(source)
+    session.commit()
+    session.add(DataSourceCapability(data_source_id=source.id, capability="films", endpoint_path="?query={query}"))
+    session.commit()
+    return source
+
+
+class FakeWdqs:
+    """Answers the planner's three query shapes from a table of film release months."""
+
+    def __init__(self, films_by_month):
+        self.films_by_month = films_by_month
+        self.queries = []
+
+    async def get(self, url, headers):  # noqa: ARG002 - transport interface
+        query = parse_qs(urlsplit(url).query)["query"][0]
+        self.queries.append(query)
+        if "COUNT" in query:
+            rows = [
+                {"year": {"value": str(year)}, "month": {"value": str(month)}, "films": {"value": str(len(films))}}
+                for (year, month), films in self.films_by_month.items()
+            ]
+        elif "VALUES ?film" in query:
+            qids = re.findall(r"wd:(Q\d+)", query.split("VALUES ?film")[1])
+            rows = [{"film": {"value": ENTITY_PREFIX + qid}, "title": {"value": f"Film {qid}"}} for qid in qids]
+        else:
+            start, end = re.findall(r'"(\d{4})-(\d{2})-01T', query)
+            months = [
+                key for key in sorted(self.films_by_month) if tuple(map(int, start)) <= key < tuple(map(int, end))
+            ]
+            films = sorted(qid for key in months for qid in self.films_by_month[key])
+            limit, offset = map(int, re.search(r"LIMIT (\d+) OFFSET (\d+)", query).groups())
+            rows = [{"film": {"value": ENTITY_PREFIX + qid}} for qid in films[offset : offset + limit]]
+        return TransportResponse(200, {}, json.dumps({"results": {"bindings": rows}}).encode())
+
+
+def test_ids_are_packed_into_values_batches(source):
+    planner = WikidataFilmPlanner(source, batch_size=50)
+
+    requests = planner.requests_for_ids([f"Q{i}" for i in range(120)] + ["Q1"])
+
+    assert [request.resource_key for request in requests] == ["batch:Q0/50", "batch:Q50/50", "batch:Q100/20"]
+
+
+def test_batches_stay_under_url_limit(source):
+    planner = WikidataFilmPlanner(source, batch_size=1000, max_url_length=4000)
+
+    requests = planner.requests_for_ids([f"Q{100000 + i}" for i in range(1000)])
+
+    assert len(requests) > 1
+    assert all(len(build_url(source, request)) <= 4000 for request in requests)
+
+
+def test_year_is_split_into_ranges_and_paged(session, source):
+    films_by_month = {
+        (1999, 1): [f"Q1{i:03}" for i in range(30)],
+        (1999, 2): [f"Q2{i:03}" for i in range(5)],
+        (1999, 6): [f"Q3{i:03}" for i in range(10)],
+        (2000, 3): [f"Q4{i:03}" for i in range(3)],
+    }
+    wdqs = FakeWdqs(films_by_month)
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("wikidata")
+    planner = WikidataFilmPlanner(source, batch_size=25, page_size=20, max_range_films=32)
+    fetched = []
+
+    engine = FetchEngine(service, plan, transport=wdqs, sink=fetched.append, expand=planner.expand)
+    summary = asyncio.run(engine.run(planner.requests_for_years([1999])))
+
+    keys = [response.request.resource_key for response in fetched]
+    assert keys[0] == "years:1999-1999"
+    # January alone fills a range; February and June share the next; 2000 was not requested.
+    ranges = sorted(key for key in keys if key.startswith("range:"))
+    assert ranges == [
+        "range:1999-01-01/1999-02-01/0",
+        "range:1999-01-01/1999-02-01/20",
+        "range:1999-02-01/2000-01-01/0",
+    ]
+    batched = [key for key in keys if key.startswith("batch:")]
+    assert sum(int(key.rsplit("/", 1)[1]) for key in batched) == 45
+    assert summary.failed == 0
+
+
+def test_only_detail_batches_of_a_year_are_stored_and_normalized(session, source):
+    mapping = {"records": "results.bindings[]", "id": "film.value", "title": "title.value"}
+    source.capabilities[0].payload_mapping = json.dumps(mapping)
+    session.commit()
+    wdqs = FakeWdqs({(1999, 1): [f"Q1{i:03}" for i in range(30)], (1999, 6): [f"Q3{i:03}" for i in range(10)]})
+    service = DataSourceService(session)
+    plan = service.prepare_fetch("wikidata")
+    planner = WikidataFilmPlanner(source, batch_size=25, page_size=20)
+    raw_store = RawStore(session, source, plan.run)
+
+    _run_requests(
+        session,
+        service,
+        plan,
+        raw_store,
+        wdqs,
+        planner.requests_for_years([1999]),
+        {"wikidata": planner},
+        concurrency=2,
+    )
+    summary = Normalizer(session, source, extractors=ExtractorCache()).run()
+
+    assert set(session.scalars(select(RawData.capability))) == {"films"}
+    assert (summary.records, summary.skipped) == (40, 0)
+    assert session.scalar(select(func.count()).select_from(Film)) == 40
+    assert session.scalar(select(func.count()).select_from(Film).where(~Film.titles.any())) == 0
+
+
+def test_uses_sparql_detects_query_templates(session, source):
+    tmdb = DataSource(name="tmdb", base_url="https://api.themoviedb.org/3")
+    session.add(tmdb)
+    session.commit()
+    session.add(DataSourceCapability(data_source_id=tmdb.id, capability="films", endpoint_path="/movie/{id}"))
+    session.commit()
+
+    assert uses_sparql(source) is True
+    assert uses_sparql(tmdb) is False